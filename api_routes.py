@@ -1,13 +1,54 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context
 from werkzeug.utils import secure_filename
+import math
 import os
+import numpy as np
 from file_processor import FileProcessor
 from app import app, db
 from models import FloorPlan, IlotProfile, IlotPlacement
+from sqlalchemy import insert
+from sqlalchemy.orm import defer
 
 # Create API blueprint
 api = Blueprint('api', __name__, url_prefix='/api')
 
+# Request fields passed to LayoutGenerator.generate_layout
+LAYOUT_OPTIONS = (
+    'seed', 'islands', 'migration_interval', 'workers',
+    'population_size', 'generations', 'mutation_rate',
+    'time_budget_ms', 'target_score', 'patience', 'maxrects_seeds'
+)
+# Number types, smallest and largest value, and whether null is allowed, per option
+LAYOUT_OPTION_RULES = {
+    'seed': ((int,), None, None, True),
+    'islands': ((int,), 1, None, False),
+    'migration_interval': ((int,), 1, None, False),
+    'workers': ((int,), 1, None, True),
+    'population_size': ((int,), 2, None, False),
+    'generations': ((int,), 1, None, True),
+    'mutation_rate': ((int, float), 0, 1, False),
+    'time_budget_ms': ((int, float), 0, None, True),
+    'target_score': ((int, float), 0, 1, True),
+    'patience': ((int,), 1, None, True),
+    'maxrects_seeds': ((int,), 0, None, False),
+}
+# Options clamped to an app config maximum; workers are also clamped to the CPU count
+LAYOUT_OPTION_LIMITS = {
+    'workers': 'LAYOUT_MAX_WORKERS',
+    'islands': 'LAYOUT_MAX_ISLANDS',
+    'population_size': 'LAYOUT_MAX_POPULATION',
+    'maxrects_seeds': 'LAYOUT_MAX_POPULATION',
+    'generations': 'LAYOUT_MAX_GENERATIONS',
+    'time_budget_ms': 'LAYOUT_MAX_TIME_BUDGET_MS',
+}
+# Genetic search details copied into the response
+SEARCH_RESULT_KEYS = ('generations_completed', 'convergence', 'stop_reason')
+# Default and largest page of floor plan records
+RECORDS_PAGE_SIZE = 100
+RECORDS_MAX_PAGE_SIZE = 1000
+# Most wall segments returned for one viewport
+SEGMENTS_MAX_PAGE_SIZE = 50000
+
 @api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -33,7 +74,7 @@ def get_projects():
 @api.route('/floor-plans', methods=['GET'])
 def get_floor_plans():
     """Get all floor plans"""
-    plans = FloorPlan.query.order_by(FloorPlan.created_at.desc()).all()
+    plans = FloorPlan.query.options(defer(FloorPlan.analysis_data)).order_by(FloorPlan.created_at.desc()).all()
     return jsonify({
         'floor_plans': [
             {
@@ -71,7 +112,7 @@ def project_detail(project_id):
     project = Project.query.get_or_404(project_id)
     
     if request.method == 'GET':
-        floor_plans = FloorPlan.query.filter_by(project_id=project_id).all()
+        floor_plans = FloorPlan.query.options(defer(FloorPlan.analysis_data)).filter_by(project_id=project_id).all()
         profiles = IlotProfile.query.filter_by(project_id=project_id).all()
         
         return jsonify({
@@ -158,6 +199,142 @@ def floor_plan_detail(plan_id):
         db.session.commit()
         return jsonify({'message': 'Floor plan deleted successfully'})
 
+def parse_bbox(value):
+    """``min_x,min_y,max_x,max_y`` as four floats; None if absent, False if malformed"""
+    if not value:
+        return None
+    try:
+        bbox = [float(part) for part in value.split(',')]
+    except ValueError:
+        return False
+    return bbox if len(bbox) == 4 else False
+
+def parse_layout_options(source):
+    """The generation options given in a request body, clamped to the configured limits
+    
+    Raises ValueError naming the first option of the wrong type or out of range.
+    """
+    options = {}
+    for key in LAYOUT_OPTIONS:
+        if key not in source:
+            continue
+        value = source[key]
+        types, minimum, maximum, nullable = LAYOUT_OPTION_RULES[key]
+        if value is None:
+            if not nullable:
+                raise ValueError(f'{key} must not be null')
+            options[key] = None
+            continue
+        if isinstance(value, bool) or not isinstance(value, types) or not math.isfinite(value):
+            raise ValueError(f'{key} must be {"an integer" if types == (int,) else "a number"}')
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            bounds = f'at least {minimum}' if maximum is None else f'between {minimum} and {maximum}'
+            raise ValueError(f'{key} must be {bounds}')
+        limit = app.config.get(LAYOUT_OPTION_LIMITS[key]) if key in LAYOUT_OPTION_LIMITS else None
+        if key == 'workers':
+            limit = min(limit or os.cpu_count() or 1, os.cpu_count() or 1)
+        options[key] = value if limit is None else min(value, limit)
+    return options
+
+@api.route('/floor-plans/<int:plan_id>/records/<collection>', methods=['GET'])
+def floor_plan_records(plan_id, collection):
+    """Page through a floor plan's entities, walls, rooms or page text
+    
+    Optional filters: ``type`` (DXF entity type), ``layer`` and
+    ``bbox=min_x,min_y,max_x,max_y``; ``offset`` and ``limit`` select the page.
+    """
+    from record_store import COLLECTIONS, open_store
+    
+    plan = FloorPlan.query.get_or_404(plan_id)
+    if collection not in COLLECTIONS:
+        return jsonify({'error': f'Unknown collection, expected one of {", ".join(COLLECTIONS)}'}), 404
+    
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(0, request.args.get('limit', RECORDS_PAGE_SIZE, type=int)), RECORDS_MAX_PAGE_SIZE)
+    bbox = parse_bbox(request.args.get('bbox'))
+    if bbox is False:
+        return jsonify({'error': 'bbox must be min_x,min_y,max_x,max_y'}), 400
+    
+    store = open_store(plan.analysis_data)
+    if store is None:
+        total, items = 0, []
+    else:
+        total, items = store.page(collection, offset, limit, kind=request.args.get('type'),
+                                  layer=request.args.get('layer'), bbox=bbox)
+    
+    return jsonify({
+        'id': plan.id,
+        'collection': collection,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'items': items
+    })
+
+@api.route('/floor-plans/<int:plan_id>/segments', methods=['GET'])
+def floor_plan_segments(plan_id):
+    """Wall segments intersecting a viewport ``bbox=min_x,min_y,max_x,max_y``
+    
+    Segments are ``[x0, y0, x1, y1, layer]`` rows, ``layer`` indexing
+    ``layers``; at most ``limit`` are returned. Without a bbox, the whole plan.
+    """
+    from segment_store import open_segments
+    
+    plan = FloorPlan.query.get_or_404(plan_id)
+    limit = min(max(0, request.args.get('limit', SEGMENTS_MAX_PAGE_SIZE, type=int)), SEGMENTS_MAX_PAGE_SIZE)
+    bbox = parse_bbox(request.args.get('bbox'))
+    if bbox is False:
+        return jsonify({'error': 'bbox must be min_x,min_y,max_x,max_y'}), 400
+    
+    store = open_segments(plan.analysis_data)
+    if store is None:
+        return jsonify({'id': plan.id, 'total': 0, 'truncated': False, 'layers': [], 'segments': []})
+    
+    indexes = np.arange(len(store)) if bbox is None else store.query(*bbox)
+    rows = store.records[indexes[:limit]]
+    return jsonify({
+        'id': plan.id,
+        'total': int(indexes.size),
+        'truncated': bool(indexes.size > limit),
+        'layers': store.layers,
+        'segments': [list(row) for row in rows.tolist()]
+    })
+
+def floor_plan_tiles_root(plan):
+    """Directory holding a floor plan's tile pyramid, or None before it is generated"""
+    dzi_path = (plan.analysis_data or {}).get('tiles')
+    if not dzi_path or not os.path.exists(dzi_path):
+        return None
+    return os.path.dirname(dzi_path)
+
+def send_tile_file(path, mimetype):
+    """Send a pyramid file with an ETag, answering conditional requests with 304"""
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True,
+                         max_age=app.config.get('TILE_MAX_AGE', 86400))
+    response.cache_control.public = True
+    return response
+
+@api.route('/floor-plans/<int:plan_id>/tiles.dzi', methods=['GET'])
+def floor_plan_tiles(plan_id):
+    """Deep Zoom descriptor of a floor plan's preview; tiles are under ``tiles_files/``"""
+    from tile_pyramid import DZI_FILE
+    
+    root = floor_plan_tiles_root(FloorPlan.query.get_or_404(plan_id))
+    if root is None:
+        return jsonify({'error': 'No tiles generated for this floor plan'}), 404
+    return send_tile_file(os.path.join(root, DZI_FILE), 'application/xml')
+
+@api.route('/floor-plans/<int:plan_id>/tiles_files/<int:level>/<int:column>_<int:row>.png', methods=['GET'])
+def floor_plan_tile(plan_id, level, column, row):
+    """One 256px tile of a zoom level"""
+    from tile_pyramid import tile_path
+    
+    root = floor_plan_tiles_root(FloorPlan.query.get_or_404(plan_id))
+    path = tile_path(root, level, column, row) if root is not None else None
+    if path is None or not os.path.exists(path):
+        return jsonify({'error': 'Tile not found'}), 404
+    return send_tile_file(path, 'image/png')
+
 @api.route('/profiles/<int:profile_id>', methods=['GET', 'PUT', 'DELETE'])
 def profile_detail(profile_id):
     """Get, update, or delete a specific profile"""
@@ -238,7 +415,7 @@ def create_project():
 
 @api.route('/floor-plans', methods=['POST'])
 def upload_floor_plan():
-    """Upload a new floor plan"""
+    """Upload a new floor plan; it is processed in the background"""
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
     
@@ -249,6 +426,11 @@ def upload_floor_plan():
     if not allowed_file(file.filename):
         return jsonify({'error': 'File type not supported'}), 400
     
+    from ingestion import ingestion_queue, processing_status, QueueFull, DEFAULT_PLAN_SIZE
+    
+    if ingestion_queue.is_full():
+        return jsonify({'error': 'Too many uploads being processed, retry later'}), 503, {'Retry-After': '5'}
+    
     try:
         # Save file
         filename = secure_filename(file.filename)
@@ -258,62 +440,62 @@ def upload_floor_plan():
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], new_filename)
         file.save(file_path)
         
-        # Process file
-        processor = FileProcessor()
-        processing_result = processor.process_file(file_path, 
-            os.path.join(app.config['UPLOAD_FOLDER'], 'processed', file_id))
-        
-        # Determine file type
-        detected_type = processor.detect_file_type(file_path)
-        if detected_type == 'cad':
-            file_type = 'cad'
-        elif detected_type == 'pdf':
-            file_type = 'pdf'
-        elif detected_type == 'image':
-            file_type = 'image'
-        else:
-            file_type = 'unknown'
-        
-        # Extract dimensions
-        width = height = 100.0
-        if processing_result['success'] and processing_result['data']:
-            data = processing_result['data']
-            if 'bounds' in data and data['bounds']:
-                bounds = data['bounds']
-                width = bounds['width']
-                height = bounds['height']
-            elif 'width' in data:
-                width = data['width']
-                height = data['height']
-        
-        # Create floor plan record
+        # Type, dimensions and analysis are filled in by the ingestion queue
         floor_plan = FloorPlan(
             project_id=request.form.get('project_id', 1),
             name=request.form.get('name', filename),
             original_file_name=filename,
             file_path=file_path,
-            file_type=file_type,
+            file_type='unknown',
             file_size=os.path.getsize(file_path),
-            width=width,
-            height=height,
-            processed=processing_result['success'],
-            processed_at=datetime.utcnow() if processing_result['success'] else None,
-            analysis_data=processing_result['data'] if processing_result['success'] else None
+            width=DEFAULT_PLAN_SIZE,
+            height=DEFAULT_PLAN_SIZE,
+            processed=False
         )
         
         db.session.add(floor_plan)
         db.session.commit()
         
-        return jsonify({
-            'id': floor_plan.id,
-            'name': floor_plan.name,
-            'file_type': floor_plan.file_type,
-            'processed': floor_plan.processed,
-            'processing_result': processing_result
-        }), 201
-        
     except Exception as e:
-        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+    
+    try:
+        ingestion_queue.submit(floor_plan.id)
+    except QueueFull:
+        db.session.delete(floor_plan)
+        db.session.commit()
+        os.remove(file_path)
+        return jsonify({'error': 'Too many uploads being processed, retry later'}), 503, {'Retry-After': '5'}
+    
+    return jsonify({
+        'id': floor_plan.id,
+        'name': floor_plan.name,
+        'file_type': floor_plan.file_type,
+        'processed': floor_plan.processed,
+        'status': processing_status(floor_plan),
+        'status_url': f'/api/floor-plans/{floor_plan.id}/processing'
+    }), 202
+
+@api.route('/floor-plans/<int:plan_id>/processing', methods=['GET'])
+def floor_plan_processing(plan_id):
+    """Get the background processing status of an uploaded floor plan"""
+    from ingestion import ingestion_queue, processing_status
+    
+    plan = FloorPlan.query.get_or_404(plan_id)
+    state = ingestion_queue.get_state(plan_id)
+    
+    return jsonify({
+        'id': plan.id,
+        'file_type': plan.file_type,
+        'processed': plan.processed,
+        'processed_at': plan.processed_at.isoformat() if plan.processed_at else None,
+        # In-memory state is ahead of the row while a stage is running
+        'status': state['status'] if state else processing_status(plan),
+        'stage': state['stage'] if state else None,
+        'attempts': state['attempts'] if state else None,
+        'error': state['error'] if state else None,
+        'failed_stages': state['failed_stages'] if state else {}
+    })
 
 @api.route('/profiles', methods=['POST'])
 def create_profile():
@@ -410,15 +592,35 @@ def generate_layout():
         
         floor_plan = FloorPlan.query.get_or_404(floor_plan_id)
         profile = IlotProfile.query.get_or_404(profile_id)
-        zones = ZoneAnnotation.query.filter_by(floor_plan_id=floor_plan_id).all()
         
-        # Import the layout generator
-        from layout_generator import LayoutGenerator
+        # Optional reproducibility, island-model parallelism and search limit settings
+        try:
+            options = parse_layout_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if options.get('seed') is None and app.config.get('LAYOUT_DEFAULT_SEED') is not None:
+            options['seed'] = app.config['LAYOUT_DEFAULT_SEED']
+        
+        from layout_cache import layout_cache, layout_cache_key
         
-        generator = LayoutGenerator(floor_plan, profile, zones)
+        zones = ZoneAnnotation.query.filter_by(floor_plan_id=floor_plan_id).order_by(ZoneAnnotation.id).all()
+        cache_key = layout_cache_key(floor_plan, profile, zones, algorithm, options)
         start_time = datetime.utcnow()
         
-        result = generator.generate_layout(algorithm=algorithm)
+        # Identical seeded requests reuse the stored layout, even when async was asked for
+        result = layout_cache.get(cache_key) if cache_key else None
+        cached = result is not None
+        if not cached:
+            if data.get('async'):
+                return queue_layout_job(data, floor_plan_id, profile_id, algorithm, options)
+            
+            # Import the layout generator
+            from layout_generator import LayoutGenerator
+            
+            generator = LayoutGenerator(floor_plan, profile, zones)
+            result = generator.generate_layout(algorithm=algorithm, **options)
+            if cache_key:
+                layout_cache.put(cache_key, result)
         
         generation_time = (datetime.utcnow() - start_time).total_seconds()
         
@@ -441,6 +643,10 @@ def generate_layout():
         db.session.add(placement)
         db.session.commit()
         
+        # Async cache hits are recorded as finished jobs, answered like queued ones
+        if data.get('async'):
+            return layout_job_response(placement)
+        
         return jsonify({
             'id': placement.id,
             'layout': {
@@ -449,7 +655,9 @@ def generate_layout():
                 'utilization_percentage': result['utilization_percentage'],
                 'optimization_score': result.get('optimization_score', 0.75),
                 'generation_time': generation_time,
-                'algorithm': algorithm
+                'algorithm': algorithm,
+                'cached': cached,
+                **{key: result[key] for key in SEARCH_RESULT_KEYS if key in result}
             }
         }), 201
         
@@ -457,6 +665,235 @@ def generate_layout():
         app.logger.error(f"Layout generation error: {traceback.format_exc()}")
         return jsonify({'error': f'Layout generation failed: {str(e)}'}), 500
 
+@api.route('/generate-layout/batch', methods=['POST'])
+def generate_layout_batch():
+    """Generate layouts for many (floor_plan_id, profile_id, algorithm) items at once
+    
+    Each entry of ``items`` takes the fields of ``/generate-layout``
+    (``name`` and the generation options, which default to those given at
+    the top level). Items run in parallel worker processes and every
+    successful layout is stored in one bulk insert; failed items report
+    their error instead of an id.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        items = data.get('items')
+        max_items = app.config.get('LAYOUT_BATCH_MAX_ITEMS', 64)
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'items must list at least one layout'}), 400
+        if len(items) > max_items:
+            return jsonify({'error': f'At most {max_items} layouts per batch'}), 400
+        
+        try:
+            defaults = parse_layout_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        item_options = []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('must be an object')
+                for key in ('floor_plan_id', 'profile_id'):
+                    if isinstance(item.get(key), bool) or not isinstance(item.get(key), int):
+                        raise ValueError(f'{key} must be an integer')
+                if not isinstance(item.get('algorithm', 'genetic'), str):
+                    raise ValueError('algorithm must be a string')
+                item_options.append(parse_layout_options(item))
+            except ValueError as e:
+                return jsonify({'error': f'items[{index}]: {e}'}), 400
+        if defaults.get('seed') is None and app.config.get('LAYOUT_DEFAULT_SEED') is not None:
+            defaults['seed'] = app.config['LAYOUT_DEFAULT_SEED']
+        batch = [{
+            'floor_plan_id': item['floor_plan_id'],
+            'profile_id': item['profile_id'],
+            'algorithm': item.get('algorithm', 'genetic'),
+            'options': {**defaults, **options}
+        } for item, options in zip(items, item_options)]
+        
+        from layout_batch import MissingInputs, generate_batch
+        
+        try:
+            outcomes = generate_batch(batch, app.config.get('LAYOUT_BATCH_WORKERS'))
+        except MissingInputs as e:
+            return jsonify({
+                'error': 'Unknown floor plans or profiles',
+                'floor_plan_ids': e.floor_plan_ids,
+                'profile_ids': e.profile_ids
+            }), 404
+        
+        now = datetime.utcnow()
+        created = now.strftime("%Y%m%d_%H%M%S")
+        rows = []
+        for index, (item, entry, outcome) in enumerate(zip(items, batch, outcomes)):
+            if 'error' in outcome:
+                continue
+            result = outcome['result']
+            rows.append({
+                'floor_plan_id': entry['floor_plan_id'],
+                'configuration_id': entry['profile_id'],
+                'name': item.get('name', f'Layout {created} #{index + 1}'),
+                'total_ilots': len(result['ilots']),
+                'total_area': sum(ilot['area'] for ilot in result['ilots']),
+                'utilization_percentage': result['utilization_percentage'],
+                'ilot_data': result['ilots'],
+                'corridor_data': result['corridors'],
+                'optimization_score': result.get('optimization_score', 0.75),
+                'generation_time': outcome['generation_time'],
+                'algorithm': entry['algorithm'],
+                'status': 'completed',
+                'created_at': now
+            })
+        
+        # One multi-row INSERT ... RETURNING on PostgreSQL, with ids in row order
+        ids = []
+        if rows:
+            ids = db.session.scalars(
+                insert(IlotPlacement).returning(IlotPlacement.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.session.commit()
+        ids = iter(ids)
+        
+        layouts = []
+        for entry, outcome in zip(batch, outcomes):
+            layout = {
+                'floor_plan_id': entry['floor_plan_id'],
+                'profile_id': entry['profile_id'],
+                'algorithm': entry['algorithm']
+            }
+            if 'error' in outcome:
+                layout['error'] = f"Layout generation failed: {outcome['error']}"
+            else:
+                result = outcome['result']
+                layout.update({
+                    'id': next(ids),
+                    'utilization_percentage': result['utilization_percentage'],
+                    'optimization_score': result.get('optimization_score', 0.75),
+                    'generation_time': outcome['generation_time'],
+                    'cached': outcome['cached'],
+                    **{key: result[key] for key in SEARCH_RESULT_KEYS if key in result}
+                })
+            layouts.append(layout)
+        
+        failed = sum(1 for outcome in outcomes if 'error' in outcome)
+        return jsonify({'layouts': layouts, 'completed': len(rows), 'failed': failed}), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Batch layout generation error: {traceback.format_exc()}")
+        return jsonify({'error': f'Batch layout generation failed: {str(e)}'}), 500
+
+def queue_layout_job(data, floor_plan_id, profile_id, algorithm, options):
+    """Insert a queued placement and hand generation to the background job queue
+    
+    ``options`` must come from ``parse_layout_options``.
+    """
+    from layout_jobs import job_queue, QueueFull, QUEUED
+    
+    if job_queue.is_full():
+        return jsonify({'error': 'Too many layout jobs pending, retry later'}), 503, {'Retry-After': '5'}
+    
+    placement = IlotPlacement(
+        floor_plan_id=floor_plan_id,
+        configuration_id=profile_id,
+        name=data.get('name', f'Layout {datetime.utcnow().strftime("%Y%m%d_%H%M%S")}'),
+        total_ilots=0,
+        total_area=0.0,
+        utilization_percentage=0.0,
+        ilot_data=[],
+        corridor_data=[],
+        generation_time=0.0,
+        algorithm=algorithm,
+        status=QUEUED
+    )
+    db.session.add(placement)
+    db.session.commit()
+    
+    try:
+        job_queue.submit(placement.id, algorithm, options)
+    except QueueFull:
+        db.session.delete(placement)
+        db.session.commit()
+        return jsonify({'error': 'Too many layout jobs pending, retry later'}), 503, {'Retry-After': '5'}
+    
+    return layout_job_response(placement)
+
+def layout_job_response(placement):
+    """202 response pointing at the job status of an async layout request"""
+    return jsonify({
+        'id': placement.id,
+        'job_id': placement.id,
+        'status': placement.status,
+        'status_url': f'/api/jobs/{placement.id}'
+    }), 202
+
+@api.route('/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    """Get status and progress of a background layout job"""
+    from layout_jobs import job_queue, RESULT_STATUSES
+    
+    placement = IlotPlacement.query.get_or_404(job_id)
+    state = job_queue.get_state(job_id)
+    
+    response = {
+        'id': placement.id,
+        'status': placement.status,
+        'progress': state['progress'] if state else (1.0 if placement.status in RESULT_STATUSES else 0.0),
+        'error': state['error'] if state else None,
+        'algorithm': placement.algorithm
+    }
+    if placement.status in RESULT_STATUSES:
+        response['layout'] = {
+            'ilots': placement.ilot_data,
+            'corridors': placement.corridor_data,
+            'utilization_percentage': placement.utilization_percentage,
+            'optimization_score': placement.optimization_score,
+            'generation_time': placement.generation_time,
+            'algorithm': placement.algorithm
+        }
+    return jsonify(response)
+
+@api.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running layout job"""
+    from layout_jobs import job_queue
+    
+    placement = IlotPlacement.query.get_or_404(job_id)
+    if not job_queue.cancel(job_id):
+        return jsonify({'error': f'Job already {placement.status}'}), 409
+    
+    return jsonify({'id': placement.id, 'status': placement.status})
+
+@api.route('/jobs/<int:job_id>/stop', methods=['POST'])
+def stop_job(job_id):
+    """Finish a running genetic layout job early, keeping its best layout so far"""
+    from layout_jobs import job_queue
+    
+    placement = IlotPlacement.query.get_or_404(job_id)
+    if not job_queue.stop(job_id):
+        return jsonify({'error': f'Job is {placement.status}, not running'}), 409
+    
+    return jsonify({'id': placement.id, 'status': placement.status})
+
+@api.route('/jobs/<int:job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream per-generation progress of a layout job as Server-Sent Events
+    
+    ``interval`` (seconds) throttles progress events; it is raised to the
+    server's LAYOUT_EVENTS_MIN_INTERVAL if lower.
+    """
+    from layout_jobs import job_queue
+    
+    IlotPlacement.query.get_or_404(job_id)
+    interval = request.args.get('interval', type=float)
+    return Response(
+        stream_with_context(job_queue.events(job_id, interval)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @api.route('/placements/<int:placement_id>', methods=['GET', 'PUT', 'DELETE'])
 def placement_detail(placement_id):
     """Get, update, or delete a specific placement"""
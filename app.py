@@ -37,6 +37,57 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB max file size
 app.config["UPLOAD_FOLDER"] = os.path.join(os.getcwd(), "uploads")
 
+# Content-addressed cache of file processing results (0 disables it)
+app.config["PROCESSING_CACHE_DIR"] = os.path.join(app.config["UPLOAD_FOLDER"], "processed", "cache")
+app.config["PROCESSING_CACHE_MAX_BYTES"] = int(os.environ.get("PROCESSING_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# File processing: DXF files above this size are streamed; PDF pages are rendered in parallel
+app.config["DXF_STREAMING_THRESHOLD"] = int(os.environ.get("DXF_STREAMING_THRESHOLD", 64 * 1024 * 1024))
+# DXF entity types to extract, comma-separated (default: all supported; INSERT expands blocks),
+# and the tolerance in drawing units for flattening curved hatch boundaries
+app.config["DXF_ENTITY_TYPES"] = os.environ["DXF_ENTITY_TYPES"].split(",") if os.environ.get("DXF_ENTITY_TYPES") else None
+app.config["DXF_CURVE_TOLERANCE"] = float(os.environ.get("DXF_CURVE_TOLERANCE", 0.01))
+app.config["PDF_RENDER_DPI"] = int(os.environ.get("PDF_RENDER_DPI", 144))
+app.config["PDF_MAX_PAGES"] = int(os.environ["PDF_MAX_PAGES"]) if os.environ.get("PDF_MAX_PAGES") else None
+app.config["PDF_WORKERS"] = int(os.environ["PDF_WORKERS"]) if os.environ.get("PDF_WORKERS") else None
+# Images above IMAGE_TILE_THRESHOLD pixels are analyzed in tiles within IMAGE_MEMORY_LIMIT bytes
+app.config["IMAGE_TILE_THRESHOLD"] = int(os.environ.get("IMAGE_TILE_THRESHOLD", 64 * 1024 * 1024))
+app.config["IMAGE_MEMORY_LIMIT"] = int(os.environ.get("IMAGE_MEMORY_LIMIT", 512 * 1024 * 1024))
+# Zoom tiles: longer side in pixels of PDF/DXF renders, and how long clients may cache tiles
+app.config["TILE_RENDER_SIZE"] = int(os.environ.get("TILE_RENDER_SIZE", 4096))
+app.config["TILE_MAX_AGE"] = int(os.environ.get("TILE_MAX_AGE", 86400))
+
+# Background processing of uploads: worker threads, pending uploads, concurrent
+# extraction/rendering stages, and attempts per stage with a growing delay between them
+app.config["INGESTION_WORKERS"] = int(os.environ.get("INGESTION_WORKERS", 4))
+app.config["INGESTION_MAX_PENDING"] = int(os.environ.get("INGESTION_MAX_PENDING", 32))
+app.config["INGESTION_HEAVY_JOBS"] = int(os.environ.get("INGESTION_HEAVY_JOBS", 1))
+app.config["INGESTION_MAX_ATTEMPTS"] = int(os.environ.get("INGESTION_MAX_ATTEMPTS", 3))
+app.config["INGESTION_RETRY_DELAY"] = float(os.environ.get("INGESTION_RETRY_DELAY", 1.0))
+
+# Background layout generation jobs
+app.config["LAYOUT_JOB_WORKERS"] = int(os.environ.get("LAYOUT_JOB_WORKERS", 2))
+app.config["LAYOUT_JOB_MAX_PENDING"] = int(os.environ.get("LAYOUT_JOB_MAX_PENDING", 16))
+# Largest island count and worker processes a layout request may ask for; larger values
+# are clamped (workers never exceed the CPU count, which is also the default limit)
+app.config["LAYOUT_MAX_ISLANDS"] = int(os.environ.get("LAYOUT_MAX_ISLANDS", 16))
+app.config["LAYOUT_MAX_WORKERS"] = int(os.environ["LAYOUT_MAX_WORKERS"]) if os.environ.get("LAYOUT_MAX_WORKERS") else None
+# Largest genetic search a layout request may ask for, also clamped: population, generations and time budget
+app.config["LAYOUT_MAX_POPULATION"] = int(os.environ.get("LAYOUT_MAX_POPULATION", 500))
+app.config["LAYOUT_MAX_GENERATIONS"] = int(os.environ.get("LAYOUT_MAX_GENERATIONS", 1000))
+app.config["LAYOUT_MAX_TIME_BUDGET_MS"] = float(os.environ.get("LAYOUT_MAX_TIME_BUDGET_MS", 5 * 60 * 1000))
+# Batch generation: items per request, and worker processes (default: CPU count)
+app.config["LAYOUT_BATCH_MAX_ITEMS"] = int(os.environ.get("LAYOUT_BATCH_MAX_ITEMS", 64))
+app.config["LAYOUT_BATCH_WORKERS"] = int(os.environ["LAYOUT_BATCH_WORKERS"]) if os.environ.get("LAYOUT_BATCH_WORKERS") else None
+# Generated layouts for repeated identical, seeded requests; the disk tier is optional
+app.config["LAYOUT_CACHE_SIZE"] = int(os.environ.get("LAYOUT_CACHE_SIZE", 128))
+app.config["LAYOUT_CACHE_DIR"] = os.environ.get("LAYOUT_CACHE_DIR") or None
+app.config["LAYOUT_CACHE_MAX_BYTES"] = int(os.environ.get("LAYOUT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Seed used when a request gives none, making repeats deterministic and cacheable
+app.config["LAYOUT_DEFAULT_SEED"] = int(os.environ["LAYOUT_DEFAULT_SEED"]) if os.environ.get("LAYOUT_DEFAULT_SEED") else None
+# Shortest interval between progress events streamed to one client, in seconds
+app.config["LAYOUT_EVENTS_MIN_INTERVAL"] = float(os.environ.get("LAYOUT_EVENTS_MIN_INTERVAL", 0.5))
+
 # Security configurations
 app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 300
 app.config["SESSION_COOKIE_SECURE"] = os.environ.get("FLASK_ENV") == "production"
@@ -58,6 +109,18 @@ with app.app_context():
     import models
     db.create_all()
     
+    from layout_jobs import job_queue
+    job_queue.init_app(app)
+    
+    from processing_cache import processing_cache
+    processing_cache.init_app(app)
+    
+    from ingestion import ingestion_queue
+    ingestion_queue.init_app(app)
+    
+    from layout_cache import layout_cache
+    layout_cache.init_app(app)
+    
     # Import routes
     import routes
     import api_routes
@@ -0,0 +1,5 @@
+"""Performance benchmarks for the layout generator and file processor.
+
+Run individual benchmarks from the repository root, e.g.
+``python -m benchmarks.bench_fitness``. None of them need the database.
+"""
@@ -0,0 +1,289 @@
+"""DXF geometry extraction: columnar accumulator versus per-entity dicts, and block expansion.
+
+Builds an in-memory drawing of random lines, closed and open polylines,
+circles and texts, then extracts it with ``_DxfEntityAccumulator`` (with
+and without the entity list) and with the previous per-entity path, which
+built a dict for every entity and ran the bounds, wall-length and
+room-area checks one entity and one point at a time. Entities are read
+from the same loaded document, so the times exclude DXF parsing. Reports
+the best time of ``--repeat`` runs per entity count.
+
+Then places ``--blocks`` block definitions many times each and compares the
+accumulator's cached expansion, which extracts every definition once and
+transforms it per reference, with exploding every reference through ezdxf's
+``virtual_entities``. Exits non-zero if the walls, rooms, bounds, counts
+or entities of the two sides ever differ.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+
+import ezdxf
+from ezdxf.math import Vec3
+
+from file_processor import FileProcessor, _DxfEntityAccumulator
+
+
+def make_drawing(count: int, seed: int = 0):
+    """A DXF document with ``count`` modelspace entities over a few layers"""
+    rng = random.Random(seed)
+    doc = ezdxf.new()
+    for name in ('A-WALL', 'A-DOOR', 'A-FURN', 'A-ANNO'):
+        doc.layers.add(name)
+    msp = doc.modelspace()
+    size = math.sqrt(count) * 20
+    for _ in range(count):
+        x, y = rng.uniform(0, size), rng.uniform(0, size)
+        layer = {'layer': rng.choice(('A-WALL', 'A-DOOR', 'A-FURN', 'A-ANNO'))}
+        choice = rng.random()
+        if choice < 0.6:
+            length, angle = rng.uniform(1, 40), rng.uniform(0, 2 * math.pi)
+            msp.add_line((x, y), (x + length * math.cos(angle), y + length * math.sin(angle)), dxfattribs=layer)
+        elif choice < 0.85:
+            w, h = rng.uniform(2, 30), rng.uniform(2, 30)
+            points = [(x, y), (x + w, y), (x + w, y + h), (x + w / 2, y + h * 1.2), (x, y + h)]
+            msp.add_lwpolyline(points[:rng.randint(3, 5)], close=rng.random() < 0.7, dxfattribs=layer)
+        elif choice < 0.95:
+            msp.add_circle((x, y), rng.uniform(0.5, 5), dxfattribs=layer)
+        else:
+            msp.add_text(f'Room {rng.randint(1, 999)}', dxfattribs={**layer, 'insert': (x, y)})
+    return doc
+
+
+def make_block_drawing(blocks: int, block_entities: int, inserts: int, seed: int = 0):
+    """A DXF document placing ``blocks`` furniture-like blocks ``inserts`` times in total, a quarter mirrored"""
+    rng = random.Random(seed)
+    doc = ezdxf.new()
+    names = []
+    for index in range(blocks):
+        block = doc.blocks.new(f'B{index}')
+        names.append(block.name)
+        for _ in range(block_entities):
+            x, y = rng.uniform(0, 20), rng.uniform(0, 20)
+            choice = rng.random()
+            if choice < 0.5:
+                block.add_line((x, y), (x + rng.uniform(-15, 15), y + rng.uniform(-15, 15)))
+            elif choice < 0.7:
+                w, h = rng.uniform(5, 15), rng.uniform(5, 15)
+                block.add_lwpolyline([(x, y), (x + w, y), (x + w, y + h), (x, y + h)], close=True)
+            elif choice < 0.85:
+                block.add_arc((x, y), rng.uniform(1, 5), rng.uniform(0, 360), rng.uniform(0, 360))
+            elif choice < 0.95:
+                block.add_circle((x, y), rng.uniform(0.5, 3))
+            else:
+                block.add_text('Chair', dxfattribs={'insert': (x, y), 'height': 0.5, 'rotation': rng.uniform(0, 360)})
+    msp = doc.modelspace()
+    size = math.sqrt(inserts) * 40
+    for _ in range(inserts):
+        scale = rng.uniform(0.5, 2)
+        mirror = -1 if rng.random() < 0.25 else 1
+        msp.add_blockref(rng.choice(names), (rng.uniform(0, size), rng.uniform(0, size)),
+                         dxfattribs={'rotation': rng.uniform(0, 360), 'xscale': mirror * scale, 'yscale': scale,
+                                     'layer': rng.choice(('A-FURN', 'A-EQPM'))})
+    return doc
+
+
+def per_entity_extract(entities, keep_entities: bool = True):
+    """The per-entity extraction the accumulator replaced, as a reference"""
+    kept, walls, rooms = [], [], []
+    counts = {'lines': 0, 'polylines': 0, 'circles': 0, 'texts': 0}
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+    total = 0
+    for entity in entities:
+        dxftype = entity.dxftype()
+        entity_data = {'type': dxftype, 'layer': entity.dxf.layer,
+                       'color': entity.dxf.color if hasattr(entity.dxf, 'color') else None}
+        if dxftype == 'LINE':
+            start, end = entity.dxf.start, entity.dxf.end
+            entity_data['start'] = [start.x, start.y]
+            entity_data['end'] = [end.x, end.y]
+            counts['lines'] += 1
+            length = ((end.x - start.x) ** 2 + (end.y - start.y) ** 2) ** 0.5
+            if length > FileProcessor.WALL_MIN_LENGTH:
+                walls.append({'type': 'wall', 'start': entity_data['start'], 'end': entity_data['end'],
+                              'length': length, 'layer': entity_data['layer']})
+            min_x, max_x = min(min_x, start.x, end.x), max(max_x, start.x, end.x)
+            min_y, max_y = min(min_y, start.y, end.y), max(max_y, start.y, end.y)
+        elif dxftype == 'LWPOLYLINE':
+            points = []
+            for point in entity.get_points():
+                points.append([point[0], point[1]])
+                min_x, max_x = min(min_x, point[0]), max(max_x, point[0])
+                min_y, max_y = min(min_y, point[1]), max(max_y, point[1])
+            entity_data['points'] = points
+            entity_data['closed'] = entity.closed
+            counts['polylines'] += 1
+            if entity.closed and len(points) > 3:
+                area = 0
+                for i in range(len(points)):
+                    j = (i + 1) % len(points)
+                    area += points[i][0] * points[j][1]
+                    area -= points[j][0] * points[i][1]
+                area = abs(area) / 2
+                if area > FileProcessor.ROOM_MIN_AREA:
+                    rooms.append({'type': 'room', 'points': points, 'area': area,
+                                  'layer': entity_data['layer']})
+        elif dxftype == 'CIRCLE':
+            center, radius = entity.dxf.center, entity.dxf.radius
+            entity_data['center'] = [center.x, center.y]
+            entity_data['radius'] = radius
+            counts['circles'] += 1
+            min_x, max_x = min(min_x, center.x - radius), max(max_x, center.x + radius)
+            min_y, max_y = min(min_y, center.y - radius), max(max_y, center.y + radius)
+        elif dxftype == 'TEXT':
+            entity_data.update({'text': entity.dxf.text, 'position': [entity.dxf.insert.x, entity.dxf.insert.y],
+                                'height': entity.dxf.height, 'rotation': entity.dxf.rotation})
+            counts['texts'] += 1
+        total += 1
+        if keep_entities:
+            kept.append(entity_data)
+    return {
+        'entities': kept,
+        'bounds': {'min_x': min_x, 'max_x': max_x, 'min_y': min_y, 'max_y': max_y,
+                   'width': max_x - min_x, 'height': max_y - min_y},
+        'analysis': {'total_entities': total, **counts, 'potential_walls': walls, 'potential_rooms': rooms},
+    }
+
+
+def columnar_extract(entities, keep_entities: bool = True):
+    accumulator = _DxfEntityAccumulator(FileProcessor(), keep_entities=keep_entities)
+    for entity in entities:
+        accumulator.add(entity)
+    data = {'entities': []}
+    accumulator.update_data(data)
+    return data
+
+
+def _to_wcs(entity) -> None:
+    """Re-express the OCS geometry of a mirrored virtual entity in WCS, as the accumulator reports it
+
+    ezdxf mirrors the circles, arcs, texts and polylines of a mirrored block
+    reference by flipping their extrusion to -Z.
+    """
+    dxf = entity.dxf
+    if not dxf.is_supported('extrusion') or dxf.extrusion.z >= 0:
+        return
+    ocs = entity.ocs()
+
+    def angle(degrees):
+        return math.degrees(ocs.to_wcs(Vec3.from_deg_angle(degrees)).angle)
+
+    dxftype = entity.dxftype()
+    if dxftype == 'TEXT':
+        dxf.insert, dxf.rotation = ocs.to_wcs(dxf.insert), angle(dxf.rotation)
+    elif dxftype in ('CIRCLE', 'ARC'):
+        dxf.center = ocs.to_wcs(dxf.center)
+        if dxftype == 'ARC':
+            # Counter-clockwise around -Z is clockwise in WCS
+            dxf.start_angle, dxf.end_angle = angle(dxf.end_angle), angle(dxf.start_angle)
+    elif dxftype == 'LWPOLYLINE':
+        entity.set_points([(*ocs.to_wcs((x, y)).vec2, start, end, -bulge)
+                           for x, y, start, end, bulge in entity.get_points()])
+    dxf.extrusion = (0, 0, 1)
+
+
+def exploded_extract(entities):
+    """Expand every block reference on its own, through ezdxf's virtual entities
+
+    Virtual entities keep the block's own layer and color, so layer ``0``
+    and BYBLOCK are resolved to the reference's here, as the accumulator
+    does, and mirrored ones are brought back to WCS.
+    """
+    processor = FileProcessor(dxf_entity_types=[t for t in FileProcessor.DXF_ENTITY_TYPES if t != 'INSERT'])
+    accumulator = _DxfEntityAccumulator(processor, keep_entities=True)
+
+    def add(entity):
+        if entity.dxftype() == 'INSERT':
+            for child in entity.virtual_entities():
+                if child.dxf.layer == '0':
+                    child.dxf.layer = entity.dxf.layer
+                if child.dxf.color == 0:
+                    child.dxf.color = entity.dxf.color
+                _to_wcs(child)
+                add(child)
+        else:
+            accumulator.add(entity)
+
+    for entity in entities:
+        add(entity)
+    data = {'entities': []}
+    accumulator.update_data(data)
+    return data
+
+
+def _same_expansion(a, b) -> bool:
+    """Equal up to the block statistics only the cached expansion reports, and arc angles mod 360"""
+    for data in (a, b):
+        data['analysis'] = {key: value for key, value in data['analysis'].items()
+                            if key not in ('block_references', 'blocks')}
+        for entity in data['entities']:
+            for key in ('start_angle', 'end_angle', 'rotation'):
+                if key in entity:
+                    entity[key] = round(entity[key] % 360, 6) % 360
+    return _same(a, b)
+
+
+def _same(a, b) -> bool:
+    """Equal results, allowing rounding differences in computed lengths and areas"""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+def best_of(repeat: int, run):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entities', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--blocks', type=int, default=50)
+    parser.add_argument('--block-entities', type=int, default=40)
+    parser.add_argument('--inserts', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    wrong = 0
+    for count in args.entities:
+        entities = list(make_drawing(count, seed=args.seed).modelspace())
+        for keep in (True, False):
+            reference_time, reference = best_of(args.repeat, lambda: per_entity_extract(entities, keep))
+            columnar_time, columnar = best_of(args.repeat, lambda: columnar_extract(entities, keep))
+            # The reference predates the arc, hatch and block counts
+            columnar['analysis'] = {key: columnar['analysis'][key] for key in reference['analysis']}
+            same = _same(reference, columnar)
+            wrong += not same
+            analysis = columnar['analysis']
+            print(f"{count:>8} entities  keep entities: {keep!s:<5}  per-entity: {reference_time:7.2f} s  "
+                  f"columnar: {columnar_time:7.2f} s  ({reference_time / columnar_time:4.1f}x)  "
+                  f"walls: {len(analysis['potential_walls'])}  rooms: {len(analysis['potential_rooms'])}  "
+                  f"{'match' if same else 'MISMATCH'}")
+
+    for inserts in args.inserts:
+        entities = list(make_block_drawing(args.blocks, args.block_entities, inserts, seed=args.seed).modelspace())
+        exploded_time, exploded = best_of(args.repeat, lambda: exploded_extract(entities))
+        cached_time, cached = best_of(args.repeat, lambda: columnar_extract(entities))
+        records = cached['analysis']['total_entities']
+        same = _same_expansion(exploded, cached)
+        wrong += not same
+        print(f"{inserts:>8} references of {args.blocks} blocks  ({records} records)  "
+              f"exploded: {exploded_time:7.2f} s  cached: {cached_time:7.2f} s  "
+              f"({exploded_time / cached_time:4.1f}x)  {'match' if same else 'MISMATCH'}")
+    return 0 if wrong == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Compare scalar and incremental fitness evaluation.
+
+Scores the same random population with ``LayoutGenerator._evaluate_fitness``
+and the incremental ``LayoutFitness`` caches the genetic algorithm uses,
+reports the largest score difference and the time taken by each path. Exits
+non-zero if the scores disagree.
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import make_fixture
+from layout_generator import LayoutGenerator
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=300)
+    parser.add_argument('--height', type=float, default=200)
+    parser.add_argument('--obstacles', type=int, default=10)
+    parser.add_argument('--population', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=1e-9)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    generator = LayoutGenerator(*make_fixture(args.width, args.height, args.obstacles, seed=args.seed))
+
+    # Crossover children grow large and contain duplicate ids, like real GA populations
+    population = [generator._create_random_layout() for _ in range(args.population)]
+    population += [generator._crossover(random.choice(population), random.choice(population))
+                   for _ in range(args.population)]
+
+    # The scalar path scores Ilot/Corridor lists, as greedy placement builds them
+    reference = []
+    for layout in population:
+        ilots = layout['ilots'].to_ilots()
+        reference.append({'ilots': ilots, 'corridors': generator._generate_corridors(ilots)})
+
+    start = time.perf_counter()
+    scalar = np.array([generator._evaluate_fitness(layout) for layout in reference])
+    scalar_time = time.perf_counter() - start
+
+    fresh = [generator.incremental_fitness.new_layout(layout['ilots']) for layout in population]
+    start = time.perf_counter()
+    incremental = np.array([fitness.score() for fitness in fresh])
+    incremental_time = time.perf_counter() - start
+
+    max_error = float(np.max(np.abs(scalar - incremental)))
+    print(f"layouts: {len(population)}  ilots: {sum(len(l['ilots']) for l in population)}")
+    print(f"scalar: {scalar_time * 1000:.1f} ms  incremental (first score): {incremental_time * 1000:.1f} ms  "
+          f"speedup: {scalar_time / incremental_time:.1f}x")
+    print(f"max abs difference: {max_error:.3e}")
+    return 0 if max_error <= args.tolerance else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Allocation and memory cost of GA layout storage.
+
+Builds the same random population as lists of the previous ``__dict__``
+dataclasses, lists of the slotted ``geometry`` dataclasses, and columnar
+``IlotBatch`` layouts, and reports for each the traced bytes and live
+allocations per layout, the time to copy and to cross over the population,
+and the pickled size (what island workers send between processes).
+"""
+import argparse
+import gc
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, replace
+from typing import List
+
+from benchmarks.fixtures import make_fixture
+from geometry import Ilot, IlotBatch, Rectangle
+from layout_generator import LayoutGenerator
+
+
+@dataclass
+class _LegacyRectangle:
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+@dataclass
+class _LegacyIlot:
+    id: str
+    rect: _LegacyRectangle
+    room_type: str
+    area: float
+    min_size: float
+    max_size: float
+
+
+def _legacy_ilots(batch: IlotBatch) -> List[_LegacyIlot]:
+    return [
+        _LegacyIlot(ilot.id, _LegacyRectangle(ilot.rect.x, ilot.rect.y, ilot.rect.width, ilot.rect.height),
+                    ilot.room_type, ilot.area, ilot.min_size, ilot.max_size)
+        for ilot in batch.to_ilots()
+    ]
+
+
+def _copy_objects(ilots: list) -> list:
+    # The per-ilot copy the list-based GA made for every child
+    return [replace(ilot, rect=replace(ilot.rect)) for ilot in ilots]
+
+
+def _crossover_objects(first: list, second: list) -> list:
+    child = _copy_objects(first)
+    for ilot in second:
+        rect = ilot.rect
+        if not any(not (rect.x + rect.width < other.rect.x or other.rect.x + other.rect.width < rect.x or
+                        rect.y + rect.height < other.rect.y or other.rect.y + other.rect.height < rect.y)
+                   for other in child):
+            child.append(replace(ilot, rect=replace(rect)))
+    return child
+
+
+def _crossover_batch(first: IlotBatch, second: IlotBatch) -> IlotBatch:
+    touching = ((second.x[:, None] <= (first.x + first.width)[None, :]) &
+                (first.x[None, :] <= (second.x + second.width)[:, None]) &
+                (second.y[:, None] <= (first.y + first.height)[None, :]) &
+                (first.y[None, :] <= (second.y + second.height)[:, None]))
+    return IlotBatch.concatenate([first, second.take(~touching.any(axis=1))])
+
+
+def _traced(build):
+    """Build under tracemalloc; return the result, traced bytes and live blocks"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return (result,
+            sum(stat.size_diff for stat in stats),
+            sum(stat.count_diff for stat in stats))
+
+
+def _timed(operation, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=300)
+    parser.add_argument('--height', type=float, default=200)
+    parser.add_argument('--obstacles', type=int, default=10)
+    parser.add_argument('--population', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    generator = LayoutGenerator(*make_fixture(args.width, args.height, args.obstacles, seed=args.seed))
+    batches = [generator._create_random_layout()['ilots'] for _ in range(args.population)]
+    records = [[(i.id, i.rect.x, i.rect.y, i.rect.width, i.rect.height, i.room_type,
+                 i.area, i.min_size, i.max_size) for i in batch.to_ilots()] for batch in batches]
+    total = sum(len(batch) for batch in batches)
+    pairs = [(random.randrange(args.population), random.randrange(args.population))
+             for _ in range(args.population)]
+
+    builders = {
+        'dataclass': lambda: [_legacy_ilots(batch) for batch in batches],
+        'slotted': lambda: [
+            [Ilot(r[0], Rectangle(r[1], r[2], r[3], r[4]), r[5], r[6], r[7], r[8]) for r in layout]
+            for layout in records
+        ],
+        'batch': lambda: [IlotBatch.from_records(layout) for layout in records],
+    }
+
+    print(f"layouts: {args.population}  ilots: {total}")
+    print(f"{'storage':<10} {'KiB/layout':>10} {'blocks/layout':>13} {'bytes/ilot':>10} "
+          f"{'copy ms':>8} {'crossover ms':>12} {'pickle KiB':>10}")
+    for name, build in builders.items():
+        population, size, blocks = _traced(build)
+        if name == 'batch':
+            copy = lambda: [layout.copy() for layout in population]
+            crossover = lambda: [_crossover_batch(population[i], population[j]) for i, j in pairs]
+        else:
+            copy = lambda: [_copy_objects(layout) for layout in population]
+            crossover = lambda: [_crossover_objects(population[i], population[j]) for i, j in pairs]
+        copy_time = _timed(copy, args.repeat)
+        crossover_time = _timed(crossover, args.repeat)
+        pickled = len(pickle.dumps(population, protocol=pickle.HIGHEST_PROTOCOL))
+        print(f"{name:<10} {size / args.population / 1024:>10.1f} {blocks / args.population:>13.0f} "
+              f"{size / total:>10.0f} {copy_time * 1000:>8.1f} {crossover_time * 1000:>12.1f} "
+              f"{pickled / 1024:>10.1f}")
+
+    # The two crossover implementations must keep the same ilots
+    i, j = pairs[0]
+    legacy = [_legacy_ilots(batch) for batch in batches]
+    expected = [ilot.id for ilot in _crossover_objects(legacy[i], legacy[j])]
+    actual = _crossover_batch(batches[i], batches[j]).ids.tolist()
+    return 0 if expected == actual else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Peak memory of raster floor plan analysis.
+
+Writes a synthetic grayscale-on-white scan of ``--megapixels`` to a temporary
+PNG and analyzes it in a fresh process with both the current
+``FileProcessor.process_image`` and the previous pipeline (PIL pixel list plus
+a second ``cv2.imread`` decode), reporting peak RSS and time for each.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def make_scan(path: str, megapixels: float, seed: int = 0) -> None:
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (width, height), (245, 245, 240))
+    draw = ImageDraw.Draw(image)
+    for _ in range(400):
+        x0, x1 = rng.integers(0, width, 2)
+        y0, y1 = rng.integers(0, height, 2)
+        if rng.random() < 0.5:
+            draw.line([(int(x0), int(y0)), (int(x1), int(y0))], fill=(30, 30, 30), width=6)
+        else:
+            draw.line([(int(x0), int(y0)), (int(x0), int(y1))], fill=(30, 30, 30), width=6)
+    image.save(path)
+
+
+def _legacy_analysis(path: str) -> dict:
+    """The pre-NumPy pipeline: per-pixel Python list, then a second decode for OpenCV"""
+    import cv2
+    from file_processor import FileProcessor
+
+    image = Image.open(path)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    pixels = list(image.convert('L').getdata())
+    total = len(pixels)
+    analysis = {
+        'total_pixels': total,
+        'dark_pixel_ratio': sum(1 for p in pixels if p < 128) / total,
+        'average_brightness': sum(pixels) / total,
+    }
+    del pixels
+    gray = cv2.cvtColor(cv2.imread(path), cv2.COLOR_BGR2GRAY)
+    analysis.update(FileProcessor()._advanced_image_analysis(gray))
+    return analysis
+
+
+def _measure(mode: str, path: str, queue) -> None:
+    from file_processor import FileProcessor
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'legacy':
+        _legacy_analysis(path)
+    else:
+        FileProcessor().process_image(path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    queue.put((baseline / 1024, peak / 1024, elapsed))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, default=40)
+    parser.add_argument('--modes', nargs='+', default=['legacy', 'current'],
+                        choices=['legacy', 'current'])
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'scan.png')
+        make_scan(path, args.megapixels)
+        print(f"scan: {args.megapixels:g} MP, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+
+        for mode in args.modes:
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(mode, path, queue))
+            process.start()
+            baseline, peak, elapsed = queue.get()
+            process.join()
+            print(f"{mode:>8}: peak RSS {peak:.0f} MB (+{peak - baseline:.0f} MB over imports)  "
+                  f"{elapsed:.2f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Wall-clock comparison of the single-process and island-model GA.
+
+Both runs use the same total evaluation budget: the island model splits the
+50-layout population across ``--islands`` sub-populations of 50 // islands
+layouts, each evolved for the same number of generations.
+"""
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.fixtures import make_fixture
+from layout_generator import LayoutGenerator
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=300)
+    parser.add_argument('--height', type=float, default=200)
+    parser.add_argument('--obstacles', type=int, default=10)
+    parser.add_argument('--islands', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--migration-interval', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fixture = make_fixture(args.width, args.height, args.obstacles, seed=args.seed)
+
+    start = time.perf_counter()
+    single = LayoutGenerator(*fixture).generate_layout('genetic', seed=args.seed)
+    single_time = time.perf_counter() - start
+
+    islands = max(2, args.islands)
+    start = time.perf_counter()
+    island = LayoutGenerator(*fixture).generate_layout(
+        'genetic', seed=args.seed, islands=islands,
+        migration_interval=args.migration_interval, workers=args.workers
+    )
+    island_time = time.perf_counter() - start
+
+    print(f"single process : {single_time:8.2f} s  score {single['optimization_score']:.4f}")
+    print(f"{islands:2d} islands     : {island_time:8.2f} s  score {island['optimization_score']:.4f}")
+    print(f"speedup        : {single_time / island_time:8.2f}x on {os.cpu_count()} CPUs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
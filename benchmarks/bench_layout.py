@@ -0,0 +1,184 @@
+"""Layout generation benchmark suite.
+
+Runs every algorithm on the synthetic scenarios in ``benchmarks.fixtures``,
+each case in a fresh process, and records wall time (median of ``--repeat``
+seeded runs), fitness evaluations per second, peak RSS growth over the
+process's imports and fixture, and the final optimization score. Results
+are printed and can be written to JSON with ``--output``; two result files
+are compared with ``--compare BASELINE CURRENT``, or a fresh run against
+``--baseline``. The exit status is 1 when a comparison finds a regression.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.fixtures import SCENARIOS, make_scenario
+from layout_generator import LayoutGenerator
+
+ALGORITHMS = ['genetic', 'greedy', 'random', 'maxrects']
+
+# Relative change in time/throughput/memory, and absolute score drop, that count as regressions
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_SCORE_TOLERANCE = 0.005
+# Smaller absolute changes are measurement noise, whatever the ratio
+TIME_NOISE_S = 0.005
+MEMORY_NOISE_BYTES = 1024 * 1024
+
+
+def run_case(scenario: str, algorithm: str, repeat: int, seed: int) -> Dict[str, Any]:
+    """Benchmark one algorithm on one scenario in a fresh process"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_measure_case, scenario, algorithm, repeat, seed).result()
+
+
+def _measure_case(scenario: str, algorithm: str, repeat: int, seed: int) -> Dict[str, Any]:
+    fixture = make_scenario(scenario, seed=seed)
+    # ru_maxrss is in kilobytes on Linux
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    evaluations = 0
+    result = None
+    for _ in range(repeat):
+        generator = LayoutGenerator(*fixture)
+        start = time.perf_counter()
+        result = generator.generate_layout(algorithm, seed=seed)
+        times.append(time.perf_counter() - start)
+        evaluations = generator.fitness_evaluations
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    wall_time = statistics.median(times)
+    return {
+        'scenario': scenario,
+        'algorithm': algorithm,
+        'seed': seed,
+        'wall_time_s': wall_time,
+        'wall_times_s': times,
+        'fitness_evaluations': evaluations,
+        'evaluations_per_s': evaluations / wall_time if wall_time > 0 else None,
+        'peak_memory_bytes': (peak - baseline) * 1024,
+        'optimization_score': result['optimization_score'],
+        'ilots': len(result['ilots']),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Where the results came from, so files from different commits can be told apart"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE,
+            score_tolerance: float = DEFAULT_SCORE_TOLERANCE) -> List[str]:
+    """Print a per-case comparison and return descriptions of the regressions"""
+    previous = {(r['scenario'], r['algorithm']): r for r in baseline['results']}
+    regressions = []
+    print(f"{'case':<28} {'time':>8} {'evals/s':>8} {'memory':>8} {'score':>9}")
+    for result in current['results']:
+        case = (result['scenario'], result['algorithm'])
+        old = previous.get(case)
+        name = '/'.join(case)
+        if old is None:
+            print(f"{name:<28} {'(new)':>8}")
+            continue
+
+        time_ratio = _ratio(result['wall_time_s'], old['wall_time_s'])
+        rate_ratio = _ratio(result['evaluations_per_s'], old['evaluations_per_s'])
+        memory_ratio = _ratio(result['peak_memory_bytes'], old['peak_memory_bytes'])
+        score_delta = result['optimization_score'] - old['optimization_score']
+        print(f"{name:<28} {_format_ratio(time_ratio)} {_format_ratio(rate_ratio)} "
+              f"{_format_ratio(memory_ratio)} {score_delta:+9.4f}")
+
+        slower = result['wall_time_s'] - old['wall_time_s'] > TIME_NOISE_S
+        if slower and time_ratio is not None and time_ratio > 1 + tolerance:
+            regressions.append(f"{name}: wall time x{time_ratio:.2f}")
+        if slower and rate_ratio is not None and rate_ratio < 1 / (1 + tolerance):
+            regressions.append(f"{name}: evaluations/s x{rate_ratio:.2f}")
+        grew = result['peak_memory_bytes'] - old['peak_memory_bytes'] > MEMORY_NOISE_BYTES
+        if grew and memory_ratio is not None and memory_ratio > 1 + tolerance:
+            regressions.append(f"{name}: peak memory x{memory_ratio:.2f}")
+        if score_delta < -score_tolerance:
+            regressions.append(f"{name}: score {score_delta:+.4f}")
+    return regressions
+
+
+def _ratio(new: Optional[float], old: Optional[float]) -> Optional[float]:
+    if new is None or not old:
+        return None
+    return new / old
+
+
+def _format_ratio(ratio: Optional[float]) -> str:
+    return f"{'-':>8}" if ratio is None else f"{ratio:>7.2f}x"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare the run against this JSON file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two result files without running anything')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--score-tolerance', type=float, default=DEFAULT_SCORE_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline, current = (_load(path) for path in args.compare)
+    else:
+        current = {'environment': environment(), 'results': []}
+        for scenario in args.scenarios:
+            for algorithm in args.algorithms:
+                result = run_case(scenario, algorithm, max(1, args.repeat), args.seed)
+                current['results'].append(result)
+                print(f"{scenario:>16} {algorithm:>8}: {result['wall_time_s'] * 1000:10.1f} ms  "
+                      f"{result['evaluations_per_s'] or 0:10.0f} evals/s  "
+                      f"+{result['peak_memory_bytes'] / 2 ** 20:6.1f} MB  "
+                      f"score {result['optimization_score']:.4f}")
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+
+    regressions = compare(baseline, current, args.tolerance, args.score_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Obstacle checks: spatial index versus rasterized occupancy grid.
+
+Tests the same random candidate rectangles against the generator's obstacle
+index, the occupancy grid one at a time (``is_free``) and the grid in one
+vectorized call (``free_mask``), and reports the time per candidate of each
+and the available area both ways. Exits non-zero if the grid reports as free
+a candidate the index finds blocked (the grid may only err the other way).
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.fixtures import make_fixture
+from geometry import Rectangle
+from layout_generator import LayoutGenerator
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=1000)
+    parser.add_argument('--height', type=float, default=800)
+    parser.add_argument('--obstacles', type=int, default=500)
+    parser.add_argument('--resolution', type=float, default=0.5)
+    parser.add_argument('--candidates', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    fixture = make_fixture(args.width, args.height, args.obstacles, seed=args.seed)
+    index_generator = LayoutGenerator(*fixture)
+    start = time.perf_counter()
+    grid_generator = LayoutGenerator(*fixture, occupancy_resolution=args.resolution)
+    grid = grid_generator.occupancy
+    grid.table
+    build_time = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    candidates = []
+    for _ in range(args.candidates):
+        width, height = rng.uniform(3, 8), rng.uniform(3, 8)
+        candidates.append(Rectangle(rng.uniform(0, args.width - width),
+                                    rng.uniform(0, args.height - height), width, height))
+    xs, ys, widths, heights = (np.array([getattr(c, name) for c in candidates])
+                               for name in ('x', 'y', 'width', 'height'))
+
+    obstacle_index = index_generator.obstacle_index
+    start = time.perf_counter()
+    blocked = [obstacle_index.intersects_any(c) for c in candidates]
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    free = [grid.is_free(c) for c in candidates]
+    grid_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask = grid.free_mask(xs, ys, widths, heights)
+    batch_time = time.perf_counter() - start
+
+    missed = sum(1 for b, f in zip(blocked, free) if b and f)
+    rejected = sum(1 for b, f in zip(blocked, free) if not b and not f)
+    per_candidate = 1e6 / args.candidates
+    print(f"obstacles: {len(index_generator.restricted_areas + index_generator.entrance_areas)}  "
+          f"grid: {grid.columns}x{grid.rows} cells, built in {build_time * 1000:.1f} ms")
+    print(f"index: {index_time * per_candidate:.2f} us  grid: {grid_time * per_candidate:.2f} us  "
+          f"grid batch: {batch_time * per_candidate:.3f} us per candidate")
+    print(f"available area: {index_generator.available_area:.1f} (rectangles)  "
+          f"{grid_generator.available_area:.1f} (grid)")
+    print(f"blocked only at grid resolution: {rejected}  missed: {missed}")
+    return 0 if missed == 0 and list(mask) == free else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
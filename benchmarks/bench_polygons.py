@@ -0,0 +1,78 @@
+"""Placement checks against polygon zones versus their bounding boxes.
+
+Scatters L-shaped and diagonal restricted zones over a plan and builds one
+generator from the polygons and one from each polygon's bounding box. Tests
+the same random candidates with ``_is_valid_placement`` on both and reports
+the time per check (best of ``--repeat``, over the candidates both agree
+on, so neither side gains from scanning less), how many candidates only the
+polygons accept, and the available area of each.
+"""
+import argparse
+import random
+import sys
+import timeit
+
+from benchmarks.fixtures import SyntheticFloorPlan, SyntheticProfile, SyntheticZone
+from geometry import Rectangle
+from layout_generator import LayoutGenerator
+
+
+def make_polygon_zones(width: float, height: float, count: int, seed: int = 0):
+    """(polygon zones, bounding-box zones) for the same random L shapes and diagonal bands"""
+    rng = random.Random(seed)
+    polygons, boxes = [], []
+    for _ in range(count):
+        w, h = rng.uniform(5, 20), rng.uniform(5, 20)
+        x, y = rng.uniform(0, width - w), rng.uniform(0, height - h)
+        if rng.random() < 0.5:
+            points = [(x, y), (x + w, y), (x + w, y + h / 3), (x + w / 3, y + h / 3),
+                      (x + w / 3, y + h), (x, y + h)]
+        else:
+            points = [(x, y), (x + w, y + h), (x + w - 2, y + h), (x, y + 2)]
+        box = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        polygons.append(SyntheticZone('restricted', [{'x': px, 'y': py} for px, py in points]))
+        boxes.append(SyntheticZone('restricted', [{'x': px, 'y': py} for px, py in box]))
+    return polygons, boxes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=600)
+    parser.add_argument('--height', type=float, default=400)
+    parser.add_argument('--zones', type=int, default=200)
+    parser.add_argument('--candidates', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    polygons, boxes = make_polygon_zones(args.width, args.height, args.zones, seed=args.seed)
+    floor_plan = SyntheticFloorPlan(args.width, args.height)
+    generators = {
+        'bounding box': LayoutGenerator(floor_plan, SyntheticProfile(), boxes),
+        'polygon': LayoutGenerator(floor_plan, SyntheticProfile(), polygons),
+    }
+
+    rng = random.Random(args.seed)
+    candidates = []
+    for _ in range(args.candidates):
+        width, height = rng.uniform(3, 7), rng.uniform(3, 7)
+        candidates.append(Rectangle(rng.uniform(0, args.width - width),
+                                    rng.uniform(0, args.height - height), width, height))
+    ilot_index = generators['polygon']._new_ilot_index()
+    valid = {name: [generator._is_valid_placement(c, ilot_index) for c in candidates]
+             for name, generator in generators.items()}
+    agreed = [c for c, a, b in zip(candidates, *valid.values()) if a == b]
+
+    for name, generator in generators.items():
+        best = min(timeit.repeat(lambda: [generator._is_valid_placement(c, ilot_index) for c in agreed],
+                                 number=1, repeat=args.repeat))
+        print(f"{name:<13} {best / len(agreed) * 1e6:6.2f} us/check  "
+              f"valid: {sum(valid[name]):6d}  available area: {generator.available_area:.1f}")
+
+    # Polygons lie within their boxes, so they may only accept more
+    wrong = sum(1 for a, b in zip(valid['bounding box'], valid['polygon']) if a and not b)
+    return 0 if wrong == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Wall segment queries: memory-mapped packed R-tree versus a full scan.
+
+Writes random wall segments (a grid of rooms with gaps for doors) to a
+SegmentStore in a temporary directory, then answers the same random
+viewport and ilot-sized queries with ``SegmentStore.query`` and with an
+exact test over every segment, reporting the build time and the time per
+query of each. Exits non-zero if the two ever disagree.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from segment_store import SegmentStore, _segments_touch_box
+
+
+def make_walls(width: float, height: float, count: int, seed: int = 0):
+    """Coordinate columns and layers of axis-aligned and diagonal wall segments"""
+    rng = np.random.default_rng(seed)
+    x0 = rng.uniform(0, width, count)
+    y0 = rng.uniform(0, height, count)
+    length = rng.uniform(2, 30, count)
+    angle = rng.choice([0, np.pi / 2, np.pi / 4, rng.uniform(0, np.pi)], count)
+    x1 = x0 + length * np.cos(angle)
+    y1 = y0 + length * np.sin(angle)
+    layers = rng.choice(['A-WALL', 'A-WALL-EXT', 'S-COLS'], count)
+    return x0, y0, x1, y1, layers
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=float, default=5000)
+    parser.add_argument('--height', type=float, default=4000)
+    parser.add_argument('--segments', type=int, default=500000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--viewport', type=float, default=200, help='Side of the viewport queries')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    x0, y0, x1, y1, layers = make_walls(args.width, args.height, args.segments, seed=args.seed)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        store = SegmentStore.write(f'{root}/segments', x0, y0, x1, y1, layers)
+        build_time = time.perf_counter() - start
+        records = np.array(store.records)
+
+        wrong = 0
+        for name, side in (('viewport', args.viewport), ('ilot', 6.0)):
+            boxes = []
+            for _ in range(args.queries):
+                x, y = rng.uniform(0, args.width - side), rng.uniform(0, args.height - side)
+                boxes.append((x, y, x + side, y + side))
+
+            start = time.perf_counter()
+            indexed = [store.query(*box) for box in boxes]
+            index_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scanned = [np.flatnonzero(_segments_touch_box(records, *box)) for box in boxes]
+            scan_time = time.perf_counter() - start
+
+            wrong += sum(1 for a, b in zip(indexed, scanned) if not np.array_equal(a, b))
+            hits = sum(len(a) for a in indexed) / len(boxes)
+            print(f"{name:<8} {hits:8.1f} segments/query  index: {index_time / len(boxes) * 1e6:8.1f} us  "
+                  f"scan: {scan_time / len(boxes) * 1e6:9.1f} us")
+        print(f"segments: {len(store)}  build: {build_time:.2f} s  mismatches: {wrong}")
+    return 0 if wrong == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
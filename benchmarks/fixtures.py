@@ -0,0 +1,89 @@
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from layout_generator import DEFAULT_SIZE_DISTRIBUTION
+
+
+@dataclass
+class SyntheticFloorPlan:
+    """Stand-in for models.FloorPlan exposing the fields the generator reads"""
+    width: float
+    height: float
+    id: int = 0
+
+
+@dataclass
+class SyntheticProfile:
+    """Stand-in for models.IlotProfile"""
+    size_distribution: List[Dict[str, Any]] = field(
+        default_factory=lambda: [dict(d) for d in DEFAULT_SIZE_DISTRIBUTION]
+    )
+    corridor_width: float = 1.5
+    id: int = 0
+
+
+@dataclass
+class SyntheticZone:
+    """Stand-in for models.ZoneAnnotation"""
+    type: str
+    coordinates: List[Dict[str, float]]
+
+
+def make_zones(width: float, height: float, count: int, seed: int = 0,
+               max_extent: float = 20.0) -> List[SyntheticZone]:
+    """Scatter rectangular wall, restricted and entrance zones over a plan"""
+    rng = random.Random(seed)
+    zones = []
+    for _ in range(count):
+        w = rng.uniform(3, max_extent)
+        h = rng.uniform(3, max_extent)
+        x = rng.uniform(0, max(0.0, width - w))
+        y = rng.uniform(0, max(0.0, height - h))
+        zone_type = rng.choice(['wall', 'restricted', 'entrance'])
+        zones.append(SyntheticZone(zone_type, [
+            {'x': x, 'y': y}, {'x': x + w, 'y': y},
+            {'x': x + w, 'y': y + h}, {'x': x, 'y': y + h}
+        ]))
+    return zones
+
+
+def make_fixture(width: float = 300, height: float = 200, obstacles: int = 10,
+                 size_distribution: Optional[List[Dict[str, Any]]] = None, seed: int = 0,
+                 max_obstacle_extent: float = 20.0):
+    """Return a (floor_plan, profile, zones) tuple for LayoutGenerator"""
+    profile = SyntheticProfile()
+    if size_distribution is not None:
+        profile.size_distribution = size_distribution
+    return (
+        SyntheticFloorPlan(width, height),
+        profile,
+        make_zones(width, height, obstacles, seed=seed, max_extent=max_obstacle_extent)
+    )
+
+
+# Named make_fixture arguments covering floor size, obstacle density and ilot mix
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    'small': {'width': 120, 'height': 80, 'obstacles': 4},
+    'medium': {'width': 300, 'height': 200, 'obstacles': 10},
+    'large-cluttered': {'width': 600, 'height': 400, 'obstacles': 60, 'max_obstacle_extent': 40.0},
+    'small-ilots': {
+        'width': 300, 'height': 200, 'obstacles': 10,
+        'size_distribution': [
+            {'min_size': 4, 'max_size': 8, 'percentage': 70},
+            {'min_size': 8, 'max_size': 15, 'percentage': 30}
+        ]
+    },
+    'large-ilots': {
+        'width': 300, 'height': 200, 'obstacles': 10,
+        'size_distribution': [
+            {'min_size': 50, 'max_size': 80, 'percentage': 60},
+            {'min_size': 80, 'max_size': 120, 'percentage': 40}
+        ]
+    },
+}
+
+
+def make_scenario(name: str, seed: int = 0):
+    """make_fixture for one of SCENARIOS"""
+    return make_fixture(seed=seed, **SCENARIOS[name])
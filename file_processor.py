@@ -1,18 +1,33 @@
 
 import os
 import json
+import math
 import logging
+import multiprocessing
 from typing import Dict, List, Tuple, Optional, Any
 from PIL import Image, ImageOps, ImageDraw
 import magic
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from tile_pyramid import write_pyramid
+from tiled_image import (
+    DEFAULT_MEMORY_LIMIT, ArrayBandSource, RawBandSource, TiledImageAnalyzer, make_thumbnail,
+    open_image_header
+)
+
 # Optional imports for different file formats
 try:
     import ezdxf
     from ezdxf.addons import drawing
     from ezdxf.addons.drawing import RenderContext, Frontend
     from ezdxf.addons.drawing.matplotlib import MatplotlibBackend
+    from ezdxf.addons import iterdxf
+    from ezdxf.filemanagement import dxf_file_info
+    from ezdxf.lldxf.tagger import ascii_tags_loader
+    from ezdxf.lldxf.validator import is_binary_dxf_file
+    from ezdxf.path import from_hatch as hatch_paths
     DXF_AVAILABLE = True
 except ImportError:
     DXF_AVAILABLE = False
@@ -27,7 +42,6 @@ except ImportError:
 
 try:
     import cv2
-    import numpy as np
     CV2_AVAILABLE = True
 except ImportError:
     CV2_AVAILABLE = False
@@ -36,6 +50,16 @@ except ImportError:
 class FileProcessor:
     """Comprehensive file processor for DWG, DXF, PDF, JPG, PNG formats"""
     
+    # Bump whenever the analysis output changes so cached results are not reused
+    PROCESSOR_VERSION = '4'
+
+    # Simple heuristics: long straight lines might be walls, large closed polylines rooms
+    WALL_MIN_LENGTH = 10
+    ROOM_MIN_AREA = 100
+
+    # DXF entity types extracted by default; INSERT expands block references
+    DXF_ENTITY_TYPES = ('LINE', 'LWPOLYLINE', 'POLYLINE', 'CIRCLE', 'ARC', 'TEXT', 'HATCH', 'INSERT')
+
     SUPPORTED_FORMATS = {
         'dxf': 'AutoCAD DXF',
         'dwg': 'AutoCAD DWG', 
@@ -49,8 +73,60 @@ class FileProcessor:
         'tif': 'TIFF Image'
     }
     
-    def __init__(self):
+    def __init__(self, cache=None, dxf_streaming_threshold: Optional[int] = 64 * 1024 * 1024,
+                 keep_dxf_entities: bool = False, pdf_dpi: int = 144,
+                 pdf_max_pages: Optional[int] = None, pdf_workers: Optional[int] = None,
+                 image_tile_threshold: Optional[int] = 64 * 1024 * 1024,
+                 image_memory_limit: int = DEFAULT_MEMORY_LIMIT, tile_render_size: int = 4096,
+                 dxf_entity_types: Optional[List[str]] = None, dxf_curve_tolerance: float = 0.01):
         self.logger = logging.getLogger(__name__)
+        # Optional processing_cache.ProcessingCache shared between uploads
+        self.cache = cache
+        # DXF files above this size are streamed (None disables streaming)
+        self.dxf_streaming_threshold = dxf_streaming_threshold
+        # Whether streamed DXF analysis keeps the full per-entity list
+        self.keep_dxf_entities = keep_dxf_entities
+        # DXF entity types to extract (others are listed by type only), and the
+        # largest distance in drawing units between curved hatch edges and their flattening
+        entity_types = self.DXF_ENTITY_TYPES if dxf_entity_types is None else dxf_entity_types
+        self.dxf_entity_types = tuple(sorted({dxftype.strip().upper() for dxftype in entity_types} - {''}))
+        self.dxf_curve_tolerance = dxf_curve_tolerance
+        # PDF page rendering resolution, page cap and worker processes (None = all cores)
+        self.pdf_dpi = pdf_dpi
+        self.pdf_max_pages = pdf_max_pages
+        self.pdf_workers = pdf_workers
+        # Images with more pixels than this are analyzed in tiles within image_memory_limit bytes
+        self.image_tile_threshold = image_tile_threshold
+        self.image_memory_limit = image_memory_limit
+        # Longer side in pixels of the PDF page and DXF renders cut into zoom tiles
+        self.tile_render_size = tile_render_size
+    
+    @classmethod
+    def from_config(cls, config, **kwargs) -> 'FileProcessor':
+        """Build a processor from Flask-style configuration keys"""
+        options = {
+            'dxf_streaming_threshold': config.get('DXF_STREAMING_THRESHOLD', 64 * 1024 * 1024),
+            'keep_dxf_entities': config.get('DXF_KEEP_ENTITIES', False),
+            'dxf_entity_types': config.get('DXF_ENTITY_TYPES'),
+            'dxf_curve_tolerance': config.get('DXF_CURVE_TOLERANCE', 0.01),
+            'pdf_dpi': config.get('PDF_RENDER_DPI', 144),
+            'pdf_max_pages': config.get('PDF_MAX_PAGES'),
+            'pdf_workers': config.get('PDF_WORKERS'),
+            'image_tile_threshold': config.get('IMAGE_TILE_THRESHOLD', 64 * 1024 * 1024),
+            'image_memory_limit': config.get('IMAGE_MEMORY_LIMIT', DEFAULT_MEMORY_LIMIT),
+            'tile_render_size': config.get('TILE_RENDER_SIZE', 4096),
+        }
+        options.update(kwargs)
+        return cls(**options)
+    
+    @property
+    def cache_version(self) -> str:
+        """Processor version plus the options that change the analysis output"""
+        return ':'.join(str(part) for part in (
+            self.PROCESSOR_VERSION, self.dxf_streaming_threshold, self.keep_dxf_entities,
+            ','.join(self.dxf_entity_types), self.dxf_curve_tolerance,
+            self.pdf_dpi, self.pdf_max_pages, self.image_tile_threshold, self.image_memory_limit
+        ))
     
     def detect_file_type(self, file_path: str) -> str:
         """Detect file type using python-magic for accurate detection"""
@@ -58,13 +134,13 @@ class FileProcessor:
             mime = magic.from_file(file_path, mime=True)
             extension = os.path.splitext(file_path)[1].lower().lstrip('.')
             
-            # Map MIME types to our format categories
-            if mime.startswith('image/'):
+            # Map MIME types to our format categories; libmagic reports DXF as image/vnd.dxf
+            if extension in ['dxf', 'dwg']:
+                return 'cad'
+            elif mime.startswith('image/'):
                 return 'image'
             elif mime == 'application/pdf':
                 return 'pdf'
-            elif extension in ['dxf', 'dwg']:
-                return 'cad'
             else:
                 return 'unknown'
         except Exception as e:
@@ -84,6 +160,15 @@ class FileProcessor:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
+        cache_key = None
+        if self.cache is not None and self.cache.enabled:
+            cache_key = self.cache.key_for(file_path, self.cache_version, bool(output_dir))
+            cached = self.cache.get(cache_key, output_dir)
+            if cached is not None:
+                cached['file_path'] = file_path
+                cached['cached'] = True
+                return cached
+        
         file_type = self.detect_file_type(file_path)
         file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
         
@@ -117,14 +202,168 @@ class FileProcessor:
             result['error'] = str(e)
             self.logger.error(f"Error processing file {file_path}: {e}")
         
+        if cache_key and result['success']:
+            self.cache.put(cache_key, result, output_dir)
+        
         return result
     
-    def process_dxf(self, file_path: str, output_dir: str = None) -> Dict[str, Any]:
-        """Process DXF files and extract geometric data"""
+    def render_preview(self, file_path: str, file_type: str, output_dir: str) -> Dict[str, str]:
+        """Write the preview artifacts of an analyzed file; returns their paths by name
+        
+        Renders only, without analysis: the DXF drawing, the first PDF page,
+        or the grayscale and high-contrast copies of an image, as
+        ``process_file`` writes them when given an output directory. DXF
+        files that would be streamed and images that would be tiled get no
+        preview.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+        
+        if file_type == 'cad' and file_ext == 'dxf':
+            if not DXF_AVAILABLE or self._dxf_streamed(file_path):
+                return {}
+            preview_path = self._generate_dxf_preview(ezdxf.readfile(file_path), output_dir)
+            if preview_path is None:
+                raise RuntimeError("Could not generate DXF preview")
+            return {'preview_image': preview_path}
+        
+        if file_type == 'pdf' and PDF_AVAILABLE:
+            with fitz.open(file_path) as doc:
+                if not len(doc):
+                    return {}
+                zoom = self.pdf_dpi / 72.0
+                image_path = os.path.join(output_dir, 'page_1.png')
+                doc[0].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).save(image_path)
+            return {'preview_image': image_path}
+        
+        if file_type == 'image':
+            with Image.open(file_path) as image:
+                if (self.image_tile_threshold is not None and
+                        image.width * image.height > self.image_tile_threshold):
+                    return {}
+                return self._generate_derived_images(self._flatten_image(image), output_dir)
+        
+        return {}
+    
+    def render_thumbnail(self, file_path: str, file_type: str, output_dir: str,
+                         preview_path: Optional[str] = None) -> Dict[str, str]:
+        """Write ``thumbnail.png`` for a file, from its preview for CAD and PDF files"""
+        os.makedirs(output_dir, exist_ok=True)
+        if file_type != 'image':
+            if not preview_path:
+                return {}
+            with Image.open(preview_path) as preview:
+                return {'thumbnail': self._save_thumbnail(self._flatten_image(preview), output_dir)}
+        
+        source = self._open_large_image(file_path)
+        if isinstance(source, RawBandSource):
+            thumb_path = os.path.join(output_dir, 'thumbnail.png')
+            make_thumbnail(source).save(thumb_path)
+            return {'thumbnail': thumb_path}
+        with source:
+            # JPEG decoders can scale down while decoding
+            source.draft(None, (400, 400))
+            return {'thumbnail': self._save_thumbnail(self._flatten_image(source), output_dir)}
+    
+    def render_tiles(self, file_path: str, file_type: str, output_dir: str) -> Dict[str, str]:
+        """Write a Deep Zoom tile pyramid of a file; returns the .dzi path as ``tiles``
+        
+        Images are tiled at full resolution: in color from memory up to
+        ``image_tile_threshold`` pixels, and above it in grayscale from a
+        BandSource, read from disk for uncompressed rasters. Other large
+        images are decoded once to grayscale, as for their analysis, and get
+        no tiles if that decode would exceed ``image_memory_limit``. The
+        first PDF page and DXF drawings are first rendered with their longer
+        side at ``tile_render_size`` pixels.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower().lstrip('.')
+        
+        if file_type == 'image':
+            source = self._open_large_image(file_path)
+            if not isinstance(source, RawBandSource):
+                source = self._decoded_tile_source(file_path, source)
+                if source is None:
+                    return {}
+        elif file_type == 'pdf' and PDF_AVAILABLE:
+            with fitz.open(file_path) as doc:
+                if not len(doc):
+                    return {}
+                page = doc[0]
+                zoom = self.tile_render_size / max(page.rect.width, page.rect.height)
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            source = Image.frombuffer('RGB', (pix.width, pix.height), pix.samples,
+                                      'raw', 'RGB', pix.stride, 1)
+        elif (file_type == 'cad' and file_ext == 'dxf' and DXF_AVAILABLE and
+              not self._dxf_streamed(file_path)):
+            source = self._flatten_image(self._render_dxf(ezdxf.readfile(file_path), self.tile_render_size))
+        else:
+            return {}
+        
+        return {'tiles': write_pyramid(source, os.path.join(output_dir, 'tiles'))}
+    
+    def _decoded_tile_source(self, file_path: str, image: Image.Image):
+        """The pixels to tile of an image PIL decodes; None if they don't fit image_memory_limit"""
+        if self.image_tile_threshold is None or image.width * image.height <= self.image_tile_threshold:
+            # Loading releases the file of a single-frame image
+            image.load()
+            image = self._flatten_image(image)
+            return image if image.mode in ('L', 'RGB') else image.convert('RGB')
+        with image:
+            # 4 bytes per pixel for PIL's RGB(A) buffer plus the grayscale copy
+            if image.width * image.height * 5 > self.image_memory_limit:
+                self.logger.warning(
+                    f"{file_path} is not stored uncompressed; decoding it for tiles "
+                    f"would exceed the {self.image_memory_limit >> 20} MB image memory limit"
+                )
+                return None
+            return ArrayBandSource(np.asarray(self._flatten_image(image).convert('L')))
+    
+    def _open_large_image(self, file_path: str):
+        """A RawBandSource for images above the tile threshold stored raw, else the opened image
+        
+        As in ``_process_image_tiled``, large images are only decoded whole
+        when their pixels can't be read band by band from disk.
+        """
+        try:
+            image = Image.open(file_path)
+        except Image.DecompressionBombError:
+            image = None
+        if image is None or (self.image_tile_threshold is not None and
+                             image.width * image.height > self.image_tile_threshold):
+            source = RawBandSource.open(file_path)
+            if source is not None:
+                if image is not None:
+                    image.close()
+                return source
+            if image is None:
+                raise ValueError("Image is too large to decode and is not stored uncompressed")
+        return image
+    
+    def _dxf_streamed(self, file_path: str) -> bool:
+        return (self.dxf_streaming_threshold is not None and
+                os.path.getsize(file_path) > self.dxf_streaming_threshold and
+                not is_binary_dxf_file(file_path))
+    
+    def process_dxf(self, file_path: str, output_dir: str = None,
+                    streaming: Optional[bool] = None) -> Dict[str, Any]:
+        """Process DXF files and extract geometric data
+        
+        Files larger than ``dxf_streaming_threshold`` bytes (or any file when
+        ``streaming=True``) are read entity by entity with ezdxf's iterdxf
+        add-on instead of loading the whole document; see
+        ``_process_dxf_streaming``.
+        """
         if not DXF_AVAILABLE:
             raise ImportError("ezdxf package required for DXF processing")
         
+        if streaming is None:
+            streaming = (self.dxf_streaming_threshold is not None and
+                         os.path.getsize(file_path) > self.dxf_streaming_threshold)
+        
         try:
+            if streaming and not is_binary_dxf_file(file_path):
+                return self._process_dxf_streaming(file_path)
+            
             doc = ezdxf.readfile(file_path)
             msp = doc.modelspace()
             
@@ -150,92 +389,10 @@ class FileProcessor:
                 })
             
             # Extract entities and analyze geometry
-            walls = []
-            lines = []
-            polylines = []
-            circles = []
-            texts = []
-            
-            min_x = min_y = float('inf')
-            max_x = max_y = float('-inf')
-            
+            accumulator = _DxfEntityAccumulator(self, keep_entities=True)
             for entity in msp:
-                entity_data = {
-                    'type': entity.dxftype(),
-                    'layer': entity.dxf.layer,
-                    'color': entity.dxf.color if hasattr(entity.dxf, 'color') else None
-                }
-                
-                # Extract coordinates based on entity type
-                if entity.dxftype() == 'LINE':
-                    start = entity.dxf.start
-                    end = entity.dxf.end
-                    entity_data['start'] = [start.x, start.y]
-                    entity_data['end'] = [end.x, end.y]
-                    lines.append(entity_data)
-                    
-                    # Update bounds
-                    min_x = min(min_x, start.x, end.x)
-                    max_x = max(max_x, start.x, end.x)
-                    min_y = min(min_y, start.y, end.y)
-                    max_y = max(max_y, start.y, end.y)
-                    
-                elif entity.dxftype() == 'LWPOLYLINE':
-                    points = []
-                    for point in entity.get_points():
-                        points.append([point[0], point[1]])
-                        min_x = min(min_x, point[0])
-                        max_x = max(max_x, point[0])
-                        min_y = min(min_y, point[1])
-                        max_y = max(max_y, point[1])
-                    entity_data['points'] = points
-                    entity_data['closed'] = entity.closed
-                    polylines.append(entity_data)
-                    
-                elif entity.dxftype() == 'CIRCLE':
-                    center = entity.dxf.center
-                    radius = entity.dxf.radius
-                    entity_data['center'] = [center.x, center.y]
-                    entity_data['radius'] = radius
-                    circles.append(entity_data)
-                    
-                    # Update bounds
-                    min_x = min(min_x, center.x - radius)
-                    max_x = max(max_x, center.x + radius)
-                    min_y = min(min_y, center.y - radius)
-                    max_y = max(max_y, center.y + radius)
-                    
-                elif entity.dxftype() == 'TEXT':
-                    text_data = {
-                        'text': entity.dxf.text,
-                        'position': [entity.dxf.insert.x, entity.dxf.insert.y],
-                        'height': entity.dxf.height,
-                        'rotation': entity.dxf.rotation
-                    }
-                    entity_data.update(text_data)
-                    texts.append(entity_data)
-                
-                data['entities'].append(entity_data)
-            
-            # Set bounds
-            if min_x != float('inf'):
-                data['bounds'] = {
-                    'min_x': min_x, 'max_x': max_x,
-                    'min_y': min_y, 'max_y': max_y,
-                    'width': max_x - min_x,
-                    'height': max_y - min_y
-                }
-            
-            # Analysis data
-            data['analysis'] = {
-                'total_entities': len(data['entities']),
-                'lines': len(lines),
-                'polylines': len(polylines),
-                'circles': len(circles),
-                'texts': len(texts),
-                'potential_walls': self._identify_walls(lines + polylines),
-                'potential_rooms': self._identify_rooms(polylines)
-            }
+                accumulator.add(entity)
+            accumulator.update_data(data)
             
             # Generate preview image if output directory provided
             if output_dir:
@@ -247,6 +404,92 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"DXF processing error: {e}")
     
+    def _process_dxf_streaming(self, file_path: str) -> Dict[str, Any]:
+        """Single-pass, bounded-memory DXF analysis built on ezdxf.addons.iterdxf
+        
+        Header variables and layers are read from a tag scan of the sections
+        before ENTITIES; modelspace entities are then loaded one at a time and
+        folded into the same accumulator the in-memory reader uses. Block
+        definitions are never loaded, so block references are listed by type
+        only instead of being expanded; otherwise the analysis is identical.
+        The per-entity list is only kept when ``keep_dxf_entities`` is set,
+        and no preview is rendered because that needs the whole document.
+        """
+        info = dxf_file_info(file_path)
+        units, layers = self._read_dxf_tables(file_path, info.encoding)
+        
+        data = {
+            'format': 'DXF',
+            'version': info.version,
+            'units': units,
+            'layers': layers,
+            'entities': [],
+            'bounds': None,
+            'analysis': {},
+            'streamed': True
+        }
+        
+        accumulator = _DxfEntityAccumulator(self, keep_entities=self.keep_dxf_entities)
+        for entity in iterdxf.modelspace(file_path):
+            accumulator.add(entity)
+        accumulator.update_data(data)
+        
+        if not self.keep_dxf_entities:
+            del data['entities']
+        
+        return data
+    
+    def _read_dxf_tables(self, file_path: str, encoding: str) -> Tuple[Any, List[Dict]]:
+        """Read $INSUNITS and the LAYER table without loading the document"""
+        units = 1
+        layers = []
+        section = None
+        table = None
+        layer = None
+        pending_var = None
+        
+        with open(file_path, 'rt', encoding=encoding, errors='surrogateescape') as stream:
+            previous = None
+            for code, value in ascii_tags_loader(stream):
+                if code == 0 and layer is not None:
+                    layers.append(layer)
+                    layer = None
+                
+                if code == 2 and previous == (0, 'SECTION'):
+                    section = value
+                    if section in ('BLOCKS', 'ENTITIES'):
+                        break
+                elif section == 'HEADER':
+                    if code == 9:
+                        pending_var = value
+                    elif pending_var == '$INSUNITS':
+                        units = int(value)
+                        pending_var = None
+                elif section == 'TABLES':
+                    if code == 2 and previous == (0, 'TABLE'):
+                        table = value
+                    elif code == 0 and value == 'LAYER' and table == 'LAYER':
+                        layer = {'name': '', 'color': 7, 'linetype': 'Continuous',
+                                 'flags': 0}
+                    elif layer is not None:
+                        if code == 2:
+                            layer['name'] = value
+                        elif code == 62:
+                            layer['color'] = int(value)
+                        elif code == 6:
+                            layer['linetype'] = value
+                        elif code == 70:
+                            layer['flags'] = int(value)
+                previous = (code, value)
+        
+        return units, [{
+            'name': layer['name'],
+            'color': layer['color'],
+            'linetype': layer['linetype'],
+            'frozen': bool(layer['flags'] & 1),
+            'locked': bool(layer['flags'] & 4)
+        } for layer in layers]
+    
     def process_dwg(self, file_path: str, output_dir: str = None) -> Dict[str, Any]:
         """Process DWG files - requires conversion to DXF first"""
         # DWG files require special handling since they're binary format
@@ -260,72 +503,124 @@ class FileProcessor:
         }
     
     def process_pdf(self, file_path: str, output_dir: str = None) -> Dict[str, Any]:
-        """Process PDF files and extract floor plan images"""
+        """Process PDF files and extract floor plan images
+        
+        Pages are split into contiguous ranges that are rendered and analyzed
+        by up to ``pdf_workers`` processes; each worker opens the document
+        itself and analyzes the rendered pixmap in memory.
+        """
         if not PDF_AVAILABLE:
             raise ImportError("PyMuPDF package required for PDF processing")
         
         try:
-            doc = fitz.open(file_path)
+            with fitz.open(file_path) as doc:
+                page_count = len(doc)
+            
+            pages = page_count
+            if self.pdf_max_pages is not None:
+                pages = min(pages, self.pdf_max_pages)
             
             data = {
                 'format': 'PDF',
-                'page_count': len(doc),
+                'page_count': page_count,
                 'pages': [],
                 'extracted_images': [],
                 'text_content': []
             }
+            if pages < page_count:
+                data['pages_truncated'] = True
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Extract page information
-                page_data = {
-                    'page_number': page_num + 1,
-                    'width': page.rect.width,
-                    'height': page.rect.height,
-                    'rotation': page.rotation
-                }
-                
-                # Extract text
-                text = page.get_text()
-                if text.strip():
-                    data['text_content'].append({
-                        'page': page_num + 1,
-                        'text': text
-                    })
-                
-                # Convert page to image
-                if output_dir:
-                    os.makedirs(output_dir, exist_ok=True)
-                    
-                    # Render page as image
-                    mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-                    pix = page.get_pixmap(matrix=mat)
-                    
-                    image_filename = f"page_{page_num + 1}.png"
-                    image_path = os.path.join(output_dir, image_filename)
-                    pix.save(image_path)
-                    
-                    # Process the extracted image
-                    image_data = self.process_image(image_path)
-                    page_data['extracted_image'] = image_path
-                    page_data['image_analysis'] = image_data
-                    
-                    data['extracted_images'].append(image_path)
-                
-                data['pages'].append(page_data)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            
+            options = self._pdf_page_options()
+            ranges = _split_page_ranges(pages, self._pdf_worker_count(pages))
+            if len(ranges) > 1:
+                # Forked workers would inherit the ingestion threads' locks and DB connections
+                with ProcessPoolExecutor(max_workers=len(ranges),
+                                         mp_context=multiprocessing.get_context('forkserver')) as executor:
+                    chunks = list(executor.map(
+                        _process_pdf_pages,
+                        [file_path] * len(ranges), ranges,
+                        [output_dir] * len(ranges), [options] * len(ranges)
+                    ))
+            else:
+                chunks = [_process_pdf_pages(file_path, page_range, output_dir, options)
+                          for page_range in ranges]
+            
+            for chunk in chunks:
+                for page_data, text in chunk:
+                    if text is not None:
+                        data['text_content'].append({
+                            'page': page_data['page_number'],
+                            'text': text
+                        })
+                    if 'extracted_image' in page_data:
+                        data['extracted_images'].append(page_data['extracted_image'])
+                    data['pages'].append(page_data)
             
-            doc.close()
             return data
             
         except Exception as e:
             raise Exception(f"PDF processing error: {e}")
     
+    def _pdf_worker_count(self, pages: int) -> int:
+        workers = self.pdf_workers or os.cpu_count() or 1
+        return max(1, min(workers, pages))
+    
+    def _pdf_page_options(self) -> Dict[str, Any]:
+        """Constructor arguments a PDF worker needs to rebuild this processor"""
+        return {'pdf_dpi': self.pdf_dpi}
+    
+    def _process_pdf_page(self, page, output_dir: Optional[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Render and analyze one page; returns the page data and its text, if any"""
+        page_data = {
+            'page_number': page.number + 1,
+            'width': page.rect.width,
+            'height': page.rect.height,
+            'rotation': page.rotation
+        }
+        
+        text = page.get_text()
+        
+        if output_dir:
+            zoom = self.pdf_dpi / 72.0
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            
+            image_path = os.path.join(output_dir, f"page_{page.number + 1}.png")
+            pix.save(image_path)
+            
+            # Analyze the rendered samples directly rather than re-reading the PNG
+            image = Image.frombuffer('RGB', (pix.width, pix.height), pix.samples,
+                                     'raw', 'RGB', pix.stride, 1)
+            page_data['extracted_image'] = image_path
+            page_data['image_analysis'] = {
+                'format': 'Image',
+                'mode': image.mode,
+                'size': image.size,
+                'width': image.width,
+                'height': image.height,
+                'has_transparency': False,
+                'analysis': self._analyze_image(image)
+            }
+        
+        return page_data, text if text.strip() else None
+    
     def process_image(self, file_path: str, output_dir: str = None) -> Dict[str, Any]:
         """Process image files and extract floor plan features"""
         try:
             # Open and analyze image
-            image = Image.open(file_path)
+            try:
+                image = Image.open(file_path)
+            except Image.DecompressionBombError:
+                # Still analyzable in tiles if the pixels can be read without decoding it whole
+                if self.image_tile_threshold is None:
+                    raise
+                return self._process_image_tiled(file_path, None, output_dir)
+            
+            if (self.image_tile_threshold is not None and
+                    image.width * image.height > self.image_tile_threshold):
+                return self._process_image_tiled(file_path, image, output_dir)
             
             data = {
                 'format': 'Image',
@@ -337,21 +632,8 @@ class FileProcessor:
                 'analysis': {}
             }
             
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                rgb_image = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                rgb_image.paste(image, mask=image.split()[-1] if 'A' in image.mode else None)
-                image = rgb_image
-            
-            # Basic image analysis
-            data['analysis'] = self._analyze_floor_plan_image(image)
-            
-            # Advanced processing if OpenCV is available
-            if CV2_AVAILABLE:
-                cv_data = self._advanced_image_analysis(file_path)
-                data['analysis'].update(cv_data)
+            image = self._flatten_image(image)
+            data['analysis'] = self._analyze_image(image)
             
             # Generate processed outputs
             if output_dir:
@@ -366,37 +648,107 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Image processing error: {e}")
     
-    def _analyze_floor_plan_image(self, image: Image.Image) -> Dict[str, Any]:
-        """Basic floor plan analysis using PIL"""
-        # Convert to grayscale for analysis
-        gray = image.convert('L')
+    def _flatten_image(self, image: Image.Image) -> Image.Image:
+        """Composite transparent and palette images onto white"""
+        # Convert to RGB if necessary
+        if image.mode in ('RGBA', 'LA', 'P'):
+            rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+            if image.mode == 'P':
+                image = image.convert('RGBA')
+            rgb_image.paste(image, mask=image.split()[-1] if 'A' in image.mode else None)
+            image = rgb_image
+        return image
+    
+    def _process_image_tiled(self, file_path: str, image: Optional[Image.Image],
+                             output_dir: str = None) -> Dict[str, Any]:
+        """Analyze a very large image in overlapping tiles within image_memory_limit
+        
+        Uncompressed rasters are read band by band straight from disk; other
+        formats are decoded once to 8-bit grayscale, and rejected when that
+        decode would exceed ``image_memory_limit`` or ``image`` is None
+        because PIL refused to open them as decompression bombs. Only a
+        grayscale thumbnail is written, since full-size derived images would
+        not fit the memory budget.
+        """
+        header = image if image is not None else open_image_header(file_path)
+        data = {
+            'format': 'Image',
+            'mode': header.mode,
+            'size': header.size,
+            'width': header.width,
+            'height': header.height,
+            'has_transparency': 'transparency' in header.info or 'A' in header.mode,
+            'tiled': True,
+            'analysis': {}
+        }
+        
+        try:
+            source = RawBandSource.open(file_path)
+            if source is None:
+                if image is None:
+                    raise ValueError(
+                        f"Image of {data['width']}x{data['height']} pixels is too large "
+                        "to decode and is not stored uncompressed"
+                    )
+                # 4 bytes per pixel for PIL's RGB(A) buffer plus the grayscale copy
+                if image.width * image.height * 5 > self.image_memory_limit:
+                    raise ValueError(
+                        f"Image of {data['width']}x{data['height']} pixels is not stored "
+                        "uncompressed and decoding it would exceed the "
+                        f"{self.image_memory_limit >> 20} MB image memory limit"
+                    )
+                source = ArrayBandSource(np.asarray(self._flatten_image(image).convert('L')))
+        finally:
+            header.close()
+        
+        data['analysis'] = TiledImageAnalyzer(self.image_memory_limit).analyze(source)
+        
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            thumb_path = os.path.join(output_dir, 'thumbnail.png')
+            make_thumbnail(source).save(thumb_path)
+            data['thumbnail'] = thumb_path
+        
+        return data
+    
+    def _analyze_image(self, image: Image.Image) -> Dict[str, Any]:
+        """Run the basic and (if available) OpenCV analyses on one grayscale array
+        
+        The image is converted to 8-bit grayscale once; PIL's buffer is copied
+        into a NumPy array that both analyses read, so the file is decoded a
+        single time and no per-pixel Python objects are created.
+        """
+        gray = np.asarray(image.convert('L'))
+        
+        analysis = self._analyze_floor_plan_image(gray)
         
-        # Get pixel data
-        pixels = list(gray.getdata())
+        # Advanced processing if OpenCV is available
+        if CV2_AVAILABLE:
+            analysis.update(self._advanced_image_analysis(gray))
         
-        # Basic statistics
-        total_pixels = len(pixels)
-        dark_pixels = sum(1 for p in pixels if p < 128)
+        return analysis
+    
+    def _analyze_floor_plan_image(self, gray: np.ndarray) -> Dict[str, Any]:
+        """Basic floor plan analysis of an 8-bit grayscale array"""
+        total_pixels = int(gray.size)
+        dark_pixels = int(np.count_nonzero(gray < 128))
         light_pixels = total_pixels - dark_pixels
         
         return {
             'total_pixels': total_pixels,
             'dark_pixel_ratio': dark_pixels / total_pixels,
             'light_pixel_ratio': light_pixels / total_pixels,
-            'average_brightness': sum(pixels) / total_pixels,
+            # Exact integer sum, as with the per-pixel Python sum it replaces
+            'average_brightness': int(gray.sum(dtype=np.uint64)) / total_pixels,
             'estimated_wall_coverage': dark_pixels / total_pixels
         }
     
-    def _advanced_image_analysis(self, file_path: str) -> Dict[str, Any]:
-        """Advanced analysis using OpenCV"""
+    def _advanced_image_analysis(self, gray: np.ndarray) -> Dict[str, Any]:
+        """Advanced analysis of an 8-bit grayscale array using OpenCV"""
         if not CV2_AVAILABLE:
             return {}
         
         try:
-            # Read image
-            img = cv2.imread(file_path)
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
             # Edge detection
             edges = cv2.Canny(gray, 50, 150, apertureSize=3)
             
@@ -433,47 +785,38 @@ class FileProcessor:
             return {}
     
     def _identify_walls(self, entities: List[Dict]) -> List[Dict]:
-        """Identify potential walls from line entities"""
-        walls = []
-        for entity in entities:
-            if entity['type'] in ['LINE', 'LWPOLYLINE']:
-                # Simple heuristic: long straight lines might be walls
-                if entity['type'] == 'LINE':
-                    start = entity['start']
-                    end = entity['end']
-                    length = ((end[0] - start[0])**2 + (end[1] - start[1])**2)**0.5
-                    if length > 10:  # Arbitrary threshold
-                        walls.append({
-                            'type': 'wall',
-                            'start': start,
-                            'end': end,
-                            'length': length,
-                            'layer': entity.get('layer', 'unknown')
-                        })
-        return walls
-    
+        """Identify potential walls from line entity dicts"""
+        lines = [entity for entity in entities if entity['type'] == 'LINE']
+        if not lines:
+            return []
+        coordinates = np.array([(entity['start'][0], entity['start'][1], entity['end'][0], entity['end'][1])
+                                for entity in lines], dtype=np.float64)
+        lengths = _segment_lengths(coordinates).tolist()
+        return [{
+            'type': 'wall',
+            'start': lines[i]['start'],
+            'end': lines[i]['end'],
+            'length': lengths[i],
+            'layer': lines[i].get('layer', 'unknown')
+        } for i in range(len(lines)) if lengths[i] > self.WALL_MIN_LENGTH]
+
     def _identify_rooms(self, polylines: List[Dict]) -> List[Dict]:
-        """Identify potential rooms from closed polylines"""
-        rooms = []
-        for entity in polylines:
-            if entity.get('closed', False) and len(entity.get('points', [])) > 3:
-                # Calculate area (simple polygon area calculation)
-                points = entity['points']
-                area = 0
-                for i in range(len(points)):
-                    j = (i + 1) % len(points)
-                    area += points[i][0] * points[j][1]
-                    area -= points[j][0] * points[i][1]
-                area = abs(area) / 2
-                
-                if area > 100:  # Minimum room area threshold
-                    rooms.append({
-                        'type': 'room',
-                        'points': points,
-                        'area': area,
-                        'layer': entity.get('layer', 'unknown')
-                    })
-        return rooms
+        """Identify potential rooms from closed polyline dicts"""
+        counts = np.array([len(entity.get('points', [])) for entity in polylines], dtype=np.int64)
+        closed = np.array([bool(entity.get('closed', False)) for entity in polylines], dtype=bool)
+        candidates = np.flatnonzero(_room_mask(counts, closed))
+        if not candidates.size:
+            return []
+        vertices = np.array([point[:2] for i in candidates.tolist() for point in polylines[i]['points']],
+                            dtype=np.float64)
+        offsets = np.concatenate(([0], np.cumsum(counts[candidates])))
+        areas = _polygon_areas(vertices, offsets).tolist()
+        return [{
+            'type': 'room',
+            'points': polylines[i]['points'],
+            'area': area,
+            'layer': polylines[i].get('layer', 'unknown')
+        } for i, area in zip(candidates.tolist(), areas) if area > self.ROOM_MIN_AREA]
     
     def _generate_dxf_preview(self, doc, output_dir: str) -> str:
         """Generate preview image from DXF document"""
@@ -481,55 +824,78 @@ class FileProcessor:
             return None
         
         try:
-            import matplotlib.pyplot as plt
-            
-            # Create matplotlib backend
-            fig = plt.figure(figsize=(12, 8))
-            ax = fig.add_axes([0, 0, 1, 1])
-            ctx = RenderContext(doc)
-            out = MatplotlibBackend(ax)
-            Frontend(ctx, out).draw_layout(doc.modelspace(), finalize=True)
-            
             # Save preview
+            os.makedirs(output_dir, exist_ok=True)
             preview_path = os.path.join(output_dir, 'dxf_preview.png')
-            fig.savefig(preview_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-            
+            self._render_dxf(doc, dpi=150).save(preview_path)
             return preview_path
             
         except Exception as e:
             self.logger.warning(f"Could not generate DXF preview: {e}")
             return None
     
+    def _render_dxf(self, doc, longest_side: Optional[int] = None, dpi: float = 150) -> Image.Image:
+        """Draw the modelspace with matplotlib, optionally sized by its longer side in pixels"""
+        import io
+        import matplotlib.pyplot as plt
+        
+        # Create matplotlib backend
+        figsize = (12, 8)
+        fig = plt.figure(figsize=figsize)
+        try:
+            ax = fig.add_axes([0, 0, 1, 1])
+            ctx = RenderContext(doc)
+            out = MatplotlibBackend(ax)
+            Frontend(ctx, out).draw_layout(doc.modelspace(), finalize=True)
+            
+            if longest_side is not None:
+                dpi = longest_side / max(figsize)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+        finally:
+            plt.close(fig)
+        buffer.seek(0)
+        image = Image.open(buffer)
+        image.load()
+        return image
+    
     def _generate_image_outputs(self, image: Image.Image, output_dir: str) -> Dict[str, str]:
         """Generate various processed versions of the image"""
         outputs = {}
         
         try:
-            # Thumbnail
-            thumbnail = image.copy()
-            thumbnail.thumbnail((400, 400), Image.Resampling.LANCZOS)
-            thumb_path = os.path.join(output_dir, 'thumbnail.png')
-            thumbnail.save(thumb_path)
-            outputs['thumbnail'] = thumb_path
-            
-            # Grayscale version
-            gray = image.convert('L')
-            gray_path = os.path.join(output_dir, 'grayscale.png')
-            gray.save(gray_path)
-            outputs['grayscale'] = gray_path
-            
-            # High contrast version for better wall detection
-            contrast = ImageOps.autocontrast(gray, cutoff=2)
-            contrast_path = os.path.join(output_dir, 'high_contrast.png')
-            contrast.save(contrast_path)
-            outputs['high_contrast'] = contrast_path
-            
+            outputs['thumbnail'] = self._save_thumbnail(image, output_dir)
+            outputs.update(self._generate_derived_images(image, output_dir))
         except Exception as e:
             self.logger.warning(f"Could not generate image outputs: {e}")
         
         return outputs
     
+    def _save_thumbnail(self, image: Image.Image, output_dir: str) -> str:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((400, 400), Image.Resampling.LANCZOS)
+        thumb_path = os.path.join(output_dir, 'thumbnail.png')
+        thumbnail.save(thumb_path)
+        return thumb_path
+    
+    def _generate_derived_images(self, image: Image.Image, output_dir: str) -> Dict[str, str]:
+        """Grayscale and high-contrast copies of the image"""
+        outputs = {}
+        
+        # Grayscale version
+        gray = image.convert('L')
+        gray_path = os.path.join(output_dir, 'grayscale.png')
+        gray.save(gray_path)
+        outputs['grayscale'] = gray_path
+        
+        # High contrast version for better wall detection
+        contrast = ImageOps.autocontrast(gray, cutoff=2)
+        contrast_path = os.path.join(output_dir, 'high_contrast.png')
+        contrast.save(contrast_path)
+        outputs['high_contrast'] = contrast_path
+        
+        return outputs
+    
     def get_supported_formats(self) -> Dict[str, str]:
         """Get list of supported file formats"""
         return self.SUPPORTED_FORMATS.copy()
@@ -538,3 +904,587 @@ class FileProcessor:
         """Check if file format is supported"""
         extension = os.path.splitext(file_path)[1].lower().lstrip('.')
         return extension in self.SUPPORTED_FORMATS
+
+
+def _split_page_ranges(pages: int, workers: int) -> List[Tuple[int, int]]:
+    """Split ``range(pages)`` into ``workers`` contiguous, near-equal ranges"""
+    if pages <= 0:
+        return []
+    size, extra = divmod(pages, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        stop = start + size + (1 if worker < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _process_pdf_pages(file_path: str, page_range: Tuple[int, int], output_dir: Optional[str],
+                       options: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """PDF worker entry point: open the document and process a range of pages"""
+    processor = FileProcessor(**options)
+    with fitz.open(file_path) as doc:
+        return [processor._process_pdf_page(doc[page_num], output_dir)
+                for page_num in range(*page_range)]
+
+
+def _segment_lengths(lines: np.ndarray) -> np.ndarray:
+    """Lengths of segments given as rows of ``x0, y0, x1, y1``"""
+    dx = lines[:, 2] - lines[:, 0]
+    dy = lines[:, 3] - lines[:, 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _polygon_areas(vertices: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Shoelace areas of polygons sharing one ``(M, 2)`` vertex buffer
+
+    Polygon ``i`` is ``vertices[offsets[i]:offsets[i + 1]]``, implicitly
+    closed; every polygon must have at least one vertex.
+    """
+    if len(offsets) < 2:
+        return np.zeros(0)
+    x, y = vertices[:, 0], vertices[:, 1]
+    # The vertex after the last one of each polygon is its first
+    following = np.arange(1, len(vertices) + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    cross = x * y[following] - x[following] * y
+    return np.abs(np.add.reduceat(cross, offsets[:-1])) / 2
+
+
+def _room_mask(counts: np.ndarray, closed: np.ndarray) -> np.ndarray:
+    """Polylines that may enclose a room: closed, with more than three vertices"""
+    return closed & (counts > 3)
+
+
+def _arc_extents(arcs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Bounding boxes (min x, min y, max x, max y) of arcs given as rows of ``cx, cy, radius, start, end``
+
+    Angles are in degrees, counterclockwise from ``start`` to ``end``. A box
+    is spanned by the two end points plus every axis direction the arc
+    passes through.
+    """
+    cx, cy, radius, start, end = arcs.T
+    sweep = (end - start) % 360
+    points_x = [cx + radius * np.cos(np.radians(start)), cx + radius * np.cos(np.radians(end))]
+    points_y = [cy + radius * np.sin(np.radians(start)), cy + radius * np.sin(np.radians(end))]
+    for angle, dx, dy in ((0, 1, 0), (90, 0, 1), (180, -1, 0), (270, 0, -1)):
+        passes = (angle - start) % 360 <= sweep
+        points_x.append(np.where(passes, cx + dx * radius, points_x[0]))
+        points_y.append(np.where(passes, cy + dy * radius, points_y[0]))
+    return (np.minimum.reduce(points_x), np.minimum.reduce(points_y),
+            np.maximum.reduce(points_x), np.maximum.reduce(points_y))
+
+
+# Type codes of the DXF types with extracted geometry; other types, and geometry types
+# excluded from extraction, are numbered after them as they appear
+_LINE, _LWPOLYLINE, _POLYLINE, _HATCH, _CIRCLE, _ARC, _TEXT = range(7)
+_GEOMETRY_TYPES = ('LINE', 'LWPOLYLINE', 'POLYLINE', 'HATCH', 'CIRCLE', 'ARC', 'TEXT')
+# Types whose records each own one vertex ring of the shared polyline buffer
+_RING_TYPES = (_LWPOLYLINE, _POLYLINE, _HATCH)
+
+# Stored for entities without a color, and the color of entities drawn in their block reference's color
+_NO_COLOR = -1
+_BYBLOCK = 0
+
+
+class _DxfColumns:
+    """DXF entity records as columns
+
+    ``kinds``, ``layers`` and ``colors`` have one row per record, in drawing
+    order, with kinds and layers as codes into the accumulator's type and
+    layer names. Each geometry column holds only the records of its types,
+    in the same order: ``lines`` rows are ``x0, y0, x1, y1``; polyline,
+    old-style polyline and hatch boundary records each own
+    ``vertex_counts[i]`` rows of ``vertices`` and a ``closed`` flag;
+    ``circles`` rows are ``cx, cy, radius``, ``arcs`` rows ``cx, cy, radius,
+    start, end`` and ``text_params`` rows ``x, y, height, rotation`` for the
+    strings in ``texts``.
+    """
+    __slots__ = ('kinds', 'layers', 'colors', 'lines', 'vertices', 'vertex_counts', 'closed',
+                 'circles', 'arcs', 'texts', 'text_params')
+
+    def __init__(self, kinds, layers, colors, lines, vertices, vertex_counts, closed, circles, arcs,
+                 texts, text_params):
+        self.kinds = kinds
+        self.layers = layers
+        self.colors = colors
+        self.lines = lines
+        self.vertices = vertices
+        self.vertex_counts = vertex_counts
+        self.closed = closed
+        self.circles = circles
+        self.arcs = arcs
+        self.texts = texts
+        self.text_params = text_params
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def concatenate(cls, parts: List['_DxfColumns']) -> '_DxfColumns':
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(part, name) for part in parts]) if name != 'texts'
+                     else [text for part in parts for text in part.texts]
+                     for name in cls.__slots__))
+
+    def transformed(self, matrix: np.ndarray, layer: int, color: int, block_layer: Optional[int]) -> '_DxfColumns':
+        """These records placed by a block reference
+
+        ``matrix`` is the reference's 4x4 ezdxf transformation (row vectors,
+        translation in the last row). Records on the block's layer ``0``
+        (code ``block_layer``) move to the reference's ``layer``, and
+        BYBLOCK colors take its ``color``. Circles and arcs are scaled by
+        the square root of the area scale, which is exact unless the
+        reference scales x and y differently.
+        """
+        linear, offset = matrix[:2, :2], matrix[3, :2]
+        (xx, xy), (yx, yy) = linear.tolist()
+        determinant = xx * yy - xy * yx
+        scale = math.sqrt(abs(determinant))
+        rotation = math.degrees(math.atan2(xy, xx))
+
+        def place(points: np.ndarray) -> np.ndarray:
+            return points @ linear + offset if len(points) else points
+
+        circles, arcs, text_params = self.circles, self.arcs, self.text_params
+        if len(circles):
+            circles = np.column_stack((place(circles[:, :2]), circles[:, 2] * scale))
+        if len(arcs):
+            if determinant < 0:
+                # Mirroring reverses the direction of travel, swapping start and end
+                angles = (rotation - arcs[:, 4:2:-1]) % 360
+            else:
+                angles = (arcs[:, 3:] + rotation) % 360
+            arcs = np.column_stack((place(arcs[:, :2]), arcs[:, 2] * scale, angles))
+        if len(text_params):
+            # A mirroring transform reflects the text direction, as it does arc angles
+            if determinant < 0:
+                text_angles = (rotation - text_params[:, 3]) % 360
+            else:
+                text_angles = (text_params[:, 3] + rotation) % 360
+            text_params = np.column_stack((place(text_params[:, :2]), text_params[:, 2] * scale, text_angles))
+
+        return _DxfColumns(
+            kinds=self.kinds,
+            layers=self.layers if block_layer is None else np.where(self.layers == block_layer, layer, self.layers),
+            colors=np.where(self.colors == _BYBLOCK, color, self.colors),
+            lines=place(self.lines.reshape(-1, 2)).reshape(-1, 4),
+            vertices=place(self.vertices),
+            vertex_counts=self.vertex_counts,
+            closed=self.closed,
+            circles=circles,
+            arcs=arcs,
+            texts=self.texts,
+            text_params=text_params
+        )
+
+
+class _DxfColumnBuilder:
+    """Collects DXF entities into _DxfColumns
+
+    Each entity's numbers are appended to flat per-type buffers; expanded
+    block references arrive as whole _DxfColumns and are kept as parts in
+    between, so drawing order is preserved.
+    """
+
+    def __init__(self, accumulator: '_DxfEntityAccumulator'):
+        self.accumulator = accumulator
+        self.parts: List[_DxfColumns] = []
+        # Records buffered or in parts
+        self.count = 0
+        # Type code and extraction method of each extracted type
+        self._extractors = {dxftype: (code, extract) for code, (dxftype, extract) in enumerate((
+            ('LINE', self._add_line), ('LWPOLYLINE', self._add_lwpolyline),
+            ('POLYLINE', self._add_polyline), ('HATCH', self._add_hatch), ('CIRCLE', self._add_circle),
+            ('ARC', self._add_arc), ('TEXT', self._add_text)
+        )) if dxftype in accumulator.entity_types}
+        self._reset_buffers()
+
+    def _reset_buffers(self) -> None:
+        self._kinds: List[int] = []
+        self._layers: List[int] = []
+        self._colors: List[int] = []
+        self._lines: List[float] = []
+        self._vertices: List[np.ndarray] = []
+        self._vertex_counts: List[int] = []
+        self._closed: List[bool] = []
+        self._circles: List[float] = []
+        self._arcs: List[float] = []
+        self._texts: List[str] = []
+        self._text_params: List[float] = []
+
+    def add(self, entity) -> None:
+        dxftype = entity.dxftype()
+        accumulator = self.accumulator
+        if dxftype == 'INSERT' and accumulator.expand_blocks and accumulator.expand(entity, self):
+            return
+        dxf = entity.dxf
+        layer_codes = accumulator.layer_codes
+        layer = layer_codes.setdefault(dxf.layer, len(layer_codes))
+        color = dxf.color if hasattr(dxf, 'color') else _NO_COLOR
+
+        extractor = self._extractors.get(dxftype)
+        if extractor is None:
+            code, records = accumulator.other_type_code(dxftype), 1
+        else:
+            code, extract = extractor
+            records = extract(entity, dxf)
+        if records == 1:
+            self._kinds.append(code)
+            self._layers.append(layer)
+            self._colors.append(color)
+        else:
+            self._kinds.extend([code] * records)
+            self._layers.extend([layer] * records)
+            self._colors.extend([color] * records)
+        self.count += records
+
+    def add_columns(self, columns: _DxfColumns) -> None:
+        self._seal()
+        self.parts.append(columns)
+        self.count += len(columns)
+
+    def _add_line(self, entity, dxf) -> int:
+        start = dxf.start
+        end = dxf.end
+        self._lines.extend((start.x, start.y, end.x, end.y))
+        return 1
+
+    def _add_ring(self, points: np.ndarray, closed: bool) -> None:
+        self._vertices.append(points)
+        self._vertex_counts.append(len(points))
+        self._closed.append(closed)
+
+    def _add_lwpolyline(self, entity, dxf) -> int:
+        # Rows of x, y, start width, end width, bulge
+        self._add_ring(np.reshape(entity.lwpoints.values, (-1, 5))[:, :2], entity.closed)
+        return 1
+
+    def _add_polyline(self, entity, dxf) -> int:
+        # Vertices are separate entities; polyface and mesh vertices are kept as an open ring
+        points = np.array([(point.x, point.y) for point in entity.points()], dtype=np.float64).reshape(-1, 2)
+        self._add_ring(points, entity.is_closed and (entity.is_2d_polyline or entity.is_3d_polyline))
+        return 1
+
+    def _add_hatch(self, entity, dxf) -> int:
+        # One closed record per boundary path, with curved edges flattened
+        tolerance = self.accumulator.curve_tolerance
+        rings = 0
+        for path in hatch_paths(entity):
+            points = np.array([(vertex.x, vertex.y) for vertex in path.flattening(tolerance)],
+                              dtype=np.float64).reshape(-1, 2)
+            if len(points) > 1 and np.array_equal(points[0], points[-1]):
+                points = points[:-1]
+            if len(points):
+                self._add_ring(points, True)
+                rings += 1
+        return rings
+
+    def _add_circle(self, entity, dxf) -> int:
+        center = dxf.center
+        self._circles.extend((center.x, center.y, dxf.radius))
+        return 1
+
+    def _add_arc(self, entity, dxf) -> int:
+        center = dxf.center
+        self._arcs.extend((center.x, center.y, dxf.radius, dxf.start_angle, dxf.end_angle))
+        return 1
+
+    def _add_text(self, entity, dxf) -> int:
+        insert = dxf.insert
+        self._texts.append(dxf.text)
+        self._text_params.extend((insert.x, insert.y, dxf.height, dxf.rotation))
+        return 1
+
+    def _seal(self) -> None:
+        """Move the buffered entities into a part"""
+        if not self._kinds:
+            return
+        self.parts.append(_DxfColumns(
+            kinds=np.array(self._kinds, dtype=np.int32),
+            layers=np.array(self._layers, dtype=np.int32),
+            colors=np.array(self._colors, dtype=np.int32),
+            lines=np.array(self._lines, dtype=np.float64).reshape(-1, 4),
+            vertices=np.concatenate(self._vertices) if self._vertices else np.zeros((0, 2)),
+            vertex_counts=np.array(self._vertex_counts, dtype=np.int64),
+            closed=np.array(self._closed, dtype=bool),
+            circles=np.array(self._circles, dtype=np.float64).reshape(-1, 3),
+            arcs=np.array(self._arcs, dtype=np.float64).reshape(-1, 5),
+            texts=self._texts,
+            text_params=np.array(self._text_params, dtype=np.float64).reshape(-1, 4)
+        ))
+        self._reset_buffers()
+
+    def take(self) -> Optional[_DxfColumns]:
+        """All records collected since the last take, or None if there are none"""
+        self._seal()
+        if not self.parts:
+            return None
+        columns = _DxfColumns.concatenate(self.parts)
+        self.parts = []
+        self.count = 0
+        return columns
+
+
+class _DxfEntityAccumulator:
+    """Single-pass, columnar DXF entity analysis shared by the in-memory and streaming readers
+
+    Entities are collected as columns by a _DxfColumnBuilder. Every
+    ``chunk_size`` records the columns are analyzed at once: bounds, type
+    counts, wall lengths and room areas are vectorized; only the wall and
+    room candidates are kept, plus the chunk itself when the entity list is
+    wanted. Result dicts are built only by ``update_data``.
+
+    Block references are expanded when ``INSERT`` is among the processor's
+    entity types and the entity belongs to a loaded document: each block
+    definition is extracted once into cached columns (nested references
+    included), and every reference only transforms that cached geometry
+    with its matrix. Python-level work thus grows with the number of unique
+    blocks, not with the number of references. Expanded records keep their
+    own types, so the INSERT itself is not listed.
+    """
+
+    # Records buffered before they are analyzed
+    CHUNK_SIZE = 65536
+
+    # Nesting depth beyond which block references are left unexpanded
+    MAX_BLOCK_DEPTH = 16
+
+    def __init__(self, processor: FileProcessor, keep_entities: bool = True,
+                 chunk_size: Optional[int] = None):
+        self.processor = processor
+        self.keep_entities = keep_entities
+        self.chunk_size = max(1, chunk_size or self.CHUNK_SIZE)
+        self.entity_types = frozenset(processor.dxf_entity_types)
+        self.expand_blocks = 'INSERT' in self.entity_types
+        self.curve_tolerance = processor.dxf_curve_tolerance
+        # Codes of the types listed without geometry, numbered after _GEOMETRY_TYPES
+        self.other_types: Dict[str, int] = {}
+        self.layer_codes: Dict[str, int] = {}
+        # Block name -> its entities as columns in block coordinates (None if it cannot be expanded)
+        self.blocks: Dict[str, Optional[_DxfColumns]] = {}
+        self._expanding: List[str] = []
+        self.block_references = 0
+        self.chunks: List[_DxfColumns] = []
+        self.total_entities = 0
+        self.type_counts = np.zeros(len(_GEOMETRY_TYPES), dtype=np.int64)
+        # Wall (lines, lengths, layers) and room (vertices, counts, areas, layers) arrays per chunk
+        self.walls: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.rooms: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        self.min_x = self.min_y = float('inf')
+        self.max_x = self.max_y = float('-inf')
+        self.builder = _DxfColumnBuilder(self)
+
+    def other_type_code(self, dxftype: str) -> int:
+        code = self.other_types.get(dxftype)
+        if code is None:
+            code = self.other_types[dxftype] = len(_GEOMETRY_TYPES) + len(self.other_types)
+        return code
+
+    def add(self, entity) -> None:
+        self.builder.add(entity)
+        if self.builder.count >= self.chunk_size:
+            self._flush()
+
+    def expand(self, insert, builder: _DxfColumnBuilder) -> bool:
+        """Add a block reference's geometry to ``builder``; False if it cannot be expanded"""
+        block = self._block_columns(insert)
+        if block is None:
+            return False
+        layer_codes = self.layer_codes
+        layer = layer_codes.setdefault(insert.dxf.layer, len(layer_codes))
+        color = insert.dxf.color
+        block_layer = layer_codes.get('0')
+        # Rows and columns of a MINSERT are separate references
+        references = insert.multi_insert() if insert.mcount > 1 else (insert,)
+        for reference in references:
+            if len(block):
+                matrix = np.array(list(reference.matrix44()), dtype=np.float64).reshape(4, 4)
+                builder.add_columns(block.transformed(matrix, layer, color, block_layer))
+            if builder is self.builder:
+                # Only references placed in the drawing itself, not those inside blocks
+                self.block_references += 1
+        return True
+
+    def _block_columns(self, insert) -> Optional[_DxfColumns]:
+        name = insert.dxf.name
+        if name in self.blocks:
+            return self.blocks[name]
+        doc = insert.doc
+        block = doc.blocks.get(name) if doc is not None else None
+        if block is None:
+            # Not resolvable here (missing, or a streamed drawing), so never retried
+            self.blocks[name] = None
+            return None
+        if name in self._expanding or len(self._expanding) >= self.MAX_BLOCK_DEPTH:
+            # A block referencing itself: leave this reference unexpanded
+            return None
+        self._expanding.append(name)
+        try:
+            builder = _DxfColumnBuilder(self)
+            for entity in block:
+                builder.add(entity)
+            columns = builder.take() or self._empty_columns()
+        finally:
+            self._expanding.pop()
+        self.blocks[name] = columns
+        return columns
+
+    @staticmethod
+    def _empty_columns() -> _DxfColumns:
+        empty = np.zeros(0, dtype=np.int32)
+        return _DxfColumns(empty, empty, empty, np.zeros((0, 4)), np.zeros((0, 2)),
+                           np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool), np.zeros((0, 3)),
+                           np.zeros((0, 5)), [], np.zeros((0, 4)))
+
+    def _flush(self) -> None:
+        """Analyze the collected records"""
+        chunk = self.builder.take()
+        if chunk is None:
+            return
+        kinds, layers = chunk.kinds, chunk.layers
+        rings = np.isin(kinds, _RING_TYPES)
+
+        self.total_entities += len(kinds)
+        self.type_counts += np.bincount(kinds, minlength=len(_GEOMETRY_TYPES))[:len(_GEOMETRY_TYPES)]
+        self._update_bounds(chunk)
+        self._collect_walls(chunk, layers[kinds == _LINE])
+        self._collect_rooms(chunk, layers[rings], kinds[rings])
+        if self.keep_entities:
+            self.chunks.append(chunk)
+
+    def _update_bounds(self, chunk: _DxfColumns) -> None:
+        lines, vertices, circles = chunk.lines, chunk.vertices, chunk.circles
+        radii = circles[:, 2]
+        arc_min_x, arc_min_y, arc_max_x, arc_max_y = _arc_extents(chunk.arcs)
+        xs = (lines[:, 0], lines[:, 2], vertices[:, 0], circles[:, 0] - radii, circles[:, 0] + radii,
+              arc_min_x, arc_max_x)
+        ys = (lines[:, 1], lines[:, 3], vertices[:, 1], circles[:, 1] - radii, circles[:, 1] + radii,
+              arc_min_y, arc_max_y)
+        for x, y in zip(xs, ys):
+            if x.size:
+                self.min_x = min(self.min_x, float(x.min()))
+                self.max_x = max(self.max_x, float(x.max()))
+                self.min_y = min(self.min_y, float(y.min()))
+                self.max_y = max(self.max_y, float(y.max()))
+
+    def _collect_walls(self, chunk: _DxfColumns, line_layers: np.ndarray) -> None:
+        lengths = _segment_lengths(chunk.lines)
+        mask = lengths > self.processor.WALL_MIN_LENGTH
+        if mask.any():
+            self.walls.append((chunk.lines[mask], lengths[mask], line_layers[mask]))
+
+    def _collect_rooms(self, chunk: _DxfColumns, ring_layers: np.ndarray, ring_kinds: np.ndarray) -> None:
+        # Hatch boundaries outline fills such as wall poché, not rooms
+        counts = chunk.vertex_counts
+        candidates = _room_mask(counts, chunk.closed) & (ring_kinds != _HATCH)
+        if not candidates.any():
+            return
+        vertices = chunk.vertices[np.repeat(candidates, counts)]
+        counts = counts[candidates]
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        areas = _polygon_areas(vertices, offsets)
+        mask = areas > self.processor.ROOM_MIN_AREA
+        if mask.any():
+            self.rooms.append((vertices[np.repeat(mask, counts)], counts[mask], areas[mask],
+                               ring_layers[candidates][mask]))
+
+    def _entity_dicts(self) -> List[Dict[str, Any]]:
+        type_names = list(_GEOMETRY_TYPES) + list(self.other_types)
+        layer_names = list(self.layer_codes)
+        entities = []
+        for chunk in self.chunks:
+            # Points come out of tolist() as the final [x, y] lists, without row lists to unpack
+            ends = iter(chunk.lines.reshape(-1, 2).tolist())
+            circles = iter(zip(chunk.circles[:, :2].tolist(), chunk.circles[:, 2].tolist()))
+            arcs = iter(zip(chunk.arcs[:, :2].tolist(), *chunk.arcs[:, 2:].T.tolist()))
+            texts = iter(zip(chunk.texts, chunk.text_params[:, :2].tolist(), *chunk.text_params[:, 2:].T.tolist()))
+            closed = iter(chunk.closed.tolist())
+            counts = iter(chunk.vertex_counts.tolist())
+            vertices = chunk.vertices.tolist()
+            position = 0
+            for kind, layer, color in zip(chunk.kinds.tolist(), chunk.layers.tolist(), chunk.colors.tolist()):
+                entity_data = {'type': type_names[kind], 'layer': layer_names[layer],
+                               'color': None if color == _NO_COLOR else color}
+                if kind == _LINE:
+                    entity_data['start'] = next(ends)
+                    entity_data['end'] = next(ends)
+                elif kind in _RING_TYPES:
+                    count = next(counts)
+                    entity_data['points'] = vertices[position:position + count]
+                    entity_data['closed'] = next(closed)
+                    position += count
+                elif kind == _CIRCLE:
+                    entity_data['center'], entity_data['radius'] = next(circles)
+                elif kind == _ARC:
+                    center, radius, start_angle, end_angle = next(arcs)
+                    entity_data.update({
+                        'center': center,
+                        'radius': radius,
+                        'start_angle': start_angle,
+                        'end_angle': end_angle
+                    })
+                elif kind == _TEXT:
+                    text, insert, height, rotation = next(texts)
+                    entity_data.update({
+                        'text': text,
+                        'position': insert,
+                        'height': height,
+                        'rotation': rotation
+                    })
+                entities.append(entity_data)
+        return entities
+
+    def _wall_dicts(self) -> List[Dict[str, Any]]:
+        layer_names = list(self.layer_codes)
+        walls = []
+        for lines, lengths, layers in self.walls:
+            ends = iter(lines.reshape(-1, 2).tolist())
+            walls.extend({'type': 'wall', 'start': start, 'end': end, 'length': length,
+                          'layer': layer_names[layer]}
+                         for start, end, length, layer in zip(ends, ends, lengths.tolist(), layers.tolist()))
+        return walls
+
+    def _room_dicts(self) -> List[Dict[str, Any]]:
+        layer_names = list(self.layer_codes)
+        rooms = []
+        for vertices, counts, areas, layers in self.rooms:
+            points = vertices.tolist()
+            position = 0
+            for count, area, layer in zip(counts.tolist(), areas.tolist(), layers.tolist()):
+                rooms.append({'type': 'room', 'points': points[position:position + count],
+                              'area': area, 'layer': layer_names[layer]})
+                position += count
+        return rooms
+
+    def update_data(self, data: Dict[str, Any]) -> None:
+        """Fill the entities, bounds and analysis keys of a DXF result dict"""
+        self._flush()
+        if self.keep_entities:
+            data['entities'] = self._entity_dicts()
+        walls, rooms = self._wall_dicts(), self._room_dicts()
+
+        if self.min_x != float('inf'):
+            data['bounds'] = {
+                'min_x': self.min_x, 'max_x': self.max_x,
+                'min_y': self.min_y, 'max_y': self.max_y,
+                'width': self.max_x - self.min_x,
+                'height': self.max_y - self.min_y
+            }
+
+        counts = dict(zip(_GEOMETRY_TYPES, self.type_counts.tolist()))
+        data['analysis'] = {
+            'total_entities': self.total_entities,
+            'lines': counts['LINE'],
+            'polylines': counts['LWPOLYLINE'] + counts['POLYLINE'],
+            'circles': counts['CIRCLE'],
+            'arcs': counts['ARC'],
+            'texts': counts['TEXT'],
+            'hatch_boundaries': counts['HATCH'],
+            'block_references': self.block_references,
+            'blocks': sum(1 for columns in self.blocks.values() if columns is not None),
+            'potential_walls': walls,
+            'potential_rooms': rooms
+        }
@@ -0,0 +1,270 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from geometry import IlotBatch
+from spatial_index import ArrayIndex
+
+# Must match the constants used by LayoutGenerator's scalar fitness
+ALIGNMENT_TOLERANCE = 2.0
+CORRIDOR_BUFFER = 2.0
+# LayoutGenerator places at most this many corridors in each direction
+MAX_CORRIDORS = 3
+
+
+def corridor_gap_positions(edges: Sequence[float], corridor_width: float,
+                           limit: int = MAX_CORRIDORS) -> List[float]:
+    """Corridor offsets centred in the first gaps between sorted ilot edges wide enough for one"""
+    edges = np.asarray(edges, dtype=np.float64)
+    gaps = np.diff(edges)
+    starts = np.flatnonzero(gaps >= corridor_width * 1.5)[:limit]
+    return (edges[starts] + gaps[starts] / 2 - corridor_width / 2).tolist()
+
+
+class _Box:
+    """Bare rectangle for index queries and Rectangle.intersects"""
+    __slots__ = ('x', 'y', 'width', 'height')
+
+    def __init__(self, x: float, y: float, width: float, height: float):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+
+class IncrementalFitnessEvaluator:
+    """Settings shared by the LayoutFitness caches of one generator.
+
+    Scores are computed with the same operations, in the same order, as
+    ``LayoutGenerator._evaluate_fitness``, so they match it exactly.
+    """
+
+    def __init__(self, available_area: float, size_distribution: Optional[List[Dict[str, Any]]],
+                 floor_width: float, floor_height: float, corridor_width: float):
+        self.available_area = available_area
+        self.size_distribution = size_distribution or []
+        self.floor_width = floor_width
+        self.floor_height = floor_height
+        self.corridor_width = corridor_width
+        self._ranges = [(r['min_size'], r['max_size'], f"{r['min_size']}-{r['max_size']}")
+                        for r in self.size_distribution]
+
+    def new_layout(self, ilots: Optional[IlotBatch] = None) -> 'LayoutFitness':
+        return LayoutFitness(self, ilots)
+
+    def size_key(self, area: float) -> str:
+        """Same bucket as LayoutGenerator._get_size_range"""
+        for min_size, max_size, key in self._ranges:
+            if min_size <= area <= max_size:
+                return key
+        return "other"
+
+    def corridor_box(self, orientation: str, position: float) -> _Box:
+        """A corridor's rectangle grown by CORRIDOR_BUFFER, the ilot adjacency test area"""
+        buffer = CORRIDOR_BUFFER
+        if orientation == 'h':
+            x, y, width, height = 0, position, self.floor_width, self.corridor_width
+        else:
+            x, y, width, height = position, 0, self.corridor_width, self.floor_height
+        return _Box(x - buffer, y - buffer, width + 2 * buffer, height + 2 * buffer)
+
+
+class LayoutFitness:
+    """Fitness aggregates of one layout, kept current as its ilots are replaced.
+
+    Holds the total ilot area, ilot counts per size range, the number of
+    aligned ilot pairs, the ilot bounds as an ArrayIndex, and the ilots
+    adjacent to each corridor. They are computed in bulk (vectorized) the
+    first time the layout is scored. Moving one ilot then updates them
+    with a few vectorized scans over the bounds; corridor positions are
+    re-derived from the sorted edges and only corridors that moved are
+    re-queried.
+    """
+
+    def __init__(self, evaluator: IncrementalFitnessEvaluator, ilots: Optional[IlotBatch] = None):
+        self.evaluator = evaluator
+        self.ilots = ilots if ilots is not None else IlotBatch.from_records([])
+        self._index: Optional[ArrayIndex] = None
+        self.total_area = 0
+        self.size_counts: Dict[str, int] = defaultdict(int)
+        self.aligned_pairs = 0
+        # (orientation, position, indices of adjacent ilots), horizontal first
+        self.corridors: List[Tuple[str, float, Set[int]]] = []
+        # Adjacent (ilot, corridor) pairs per ilot id; accessibility counts ids with any
+        self._id_links: Dict[str, int] = defaultdict(int)
+        self._linked_ids = 0
+        self._corridors_stale = True
+        self._score: Optional[float] = None
+
+    def copy(self) -> 'LayoutFitness':
+        self._build()
+        clone = LayoutFitness(self.evaluator, self.ilots.copy())
+        clone._index = self._index.copy()
+        clone.total_area = self.total_area
+        clone.size_counts = defaultdict(int, self.size_counts)
+        clone.aligned_pairs = self.aligned_pairs
+        clone.corridors = [(o, p, set(connected)) for o, p, connected in self.corridors]
+        clone._id_links = defaultdict(int, self._id_links)
+        clone._linked_ids = self._linked_ids
+        clone._corridors_stale = self._corridors_stale
+        clone._score = self._score
+        return clone
+
+    @property
+    def index(self) -> ArrayIndex:
+        """Bounds of the ilots, keyed by position in ``ilots``"""
+        self._build()
+        return self._index
+
+    def _build(self) -> None:
+        """Compute every aggregate from scratch"""
+        if self._index is not None:
+            return
+        ilots = self.ilots
+        evaluator = self.evaluator
+        self._index = index = ArrayIndex.from_arrays(ilots.x, ilots.y, ilots.width, ilots.height)
+        # Summed in order, as the scalar fitness does
+        areas = ilots.area.tolist()
+        self.total_area = sum(areas)
+        for area in areas:
+            self.size_counts[evaluator.size_key(area)] += 1
+        # Pairs aligned on both axes count once; sort + diff avoids np.unique's numpy.ma import
+        pairs = np.sort(np.concatenate((_aligned_pairs(index.min_x), _aligned_pairs(index.min_y))))
+        self.aligned_pairs = int(pairs.size and 1 + np.count_nonzero(np.diff(pairs)))
+        self.refresh_corridors()
+
+    def move(self, index: int, x: float, y: float) -> None:
+        """Move the ilot at ``index`` (in ``ilots`` too) to a new top-left corner"""
+        self._build()
+        self.aligned_pairs -= self._aligned_with(index)
+        self._link_corridors(index, -1)
+
+        self.ilots.move(index, x, y)
+        rect = self.ilots.rect(index)
+        self.index.insert(index, rect)
+        self.aligned_pairs += self._aligned_with(index)
+        for orientation, position, connected in self.corridors:
+            if rect.intersects(self.evaluator.corridor_box(orientation, position)):
+                connected.add(index)
+            else:
+                connected.discard(index)
+        self._link_corridors(index, 1)
+        self._corridors_stale = True
+        self._score = None
+
+    def _aligned_with(self, index: int) -> int:
+        """Other ilots within ALIGNMENT_TOLERANCE of this one on x or y"""
+        x, y = self.index.min_x, self.index.min_y
+        close = (np.abs(x - x[index]) < ALIGNMENT_TOLERANCE) | (np.abs(y - y[index]) < ALIGNMENT_TOLERANCE)
+        return int(np.count_nonzero(close)) - 1
+
+    def _link_corridors(self, index: int, sign: int) -> None:
+        """Count (or uncount) the ilot's corridor adjacencies under its id"""
+        links = sum(1 for _, _, connected in self.corridors if index in connected)
+        if links:
+            self._link(self.ilots.ids[index], sign * links)
+
+    def _link(self, ilot_id: str, delta: int) -> None:
+        before = self._id_links[ilot_id]
+        after = before + delta
+        self._id_links[ilot_id] = after
+        self._linked_ids += (after > 0) - (before > 0)
+
+    def refresh_corridors(self) -> None:
+        """Re-derive corridor positions, re-querying adjacency only for corridors that moved"""
+        self._build()
+        if not self._corridors_stale:
+            return
+        evaluator = self.evaluator
+        index = self.index
+        ids = self.ilots.ids
+        y_edges = np.sort(np.concatenate((index.min_y, index.max_y)))
+        x_edges = np.sort(np.concatenate((index.min_x, index.max_x)))
+        specs = [('h', y) for y in corridor_gap_positions(y_edges, evaluator.corridor_width)]
+        specs += [('v', x) for x in corridor_gap_positions(x_edges, evaluator.corridor_width)]
+
+        current = {(o, p): connected for o, p, connected in self.corridors}
+        corridors = []
+        for orientation, position in specs:
+            connected = current.pop((orientation, position), None)
+            if connected is None:
+                connected = set(index.query(evaluator.corridor_box(orientation, position)))
+                for i in connected:
+                    self._link(ids[i], 1)
+            corridors.append((orientation, position, connected))
+        for connected in current.values():
+            for i in connected:
+                self._link(ids[i], -1)
+
+        self.corridors = corridors
+        self._corridors_stale = False
+        self._score = None
+
+    def score(self) -> float:
+        """Fitness of the layout, cached until the next change"""
+        if self._score is None:
+            self.refresh_corridors()
+            self._score = self._compute_score()
+        return self._score
+
+    def _compute_score(self) -> float:
+        evaluator = self.evaluator
+        count = len(self.ilots)
+        if not count:
+            return 0
+
+        score = 0
+        available_area = evaluator.available_area
+
+        # Space utilization (30%)
+        utilization = self.total_area / available_area if available_area > 0 else 0
+        score += utilization * 0.3
+
+        # Corridor efficiency (20%)
+        total_corridor_area = sum(
+            evaluator.floor_width * evaluator.corridor_width if orientation == 'h'
+            else evaluator.corridor_width * evaluator.floor_height
+            for orientation, _, _ in self.corridors
+        )
+        corridor_ratio = total_corridor_area / available_area if available_area > 0 else 0
+        score += max(0, 1 - corridor_ratio * 2) * 0.2
+
+        # Accessibility (25%)
+        score += self._linked_ids / count * 0.25
+
+        # Size distribution adherence (15%)
+        size_score = 1.0
+        if evaluator.size_distribution:
+            size_score = 0
+            for target_range in evaluator.size_distribution:
+                actual = self.size_counts.get(f"{target_range['min_size']}-{target_range['max_size']}", 0)
+                deviation = abs(actual / count - target_range['percentage'] / 100)
+                size_score += max(0, 1 - deviation * 2)
+            size_score /= len(evaluator.size_distribution)
+        score += size_score * 0.15
+
+        # Regularity/aesthetics (10%)
+        regularity = 1.0
+        if count >= 2:
+            max_pairs = count * (count - 1) // 2
+            regularity = min(1.0, self.aligned_pairs / max_pairs)
+        score += regularity * 0.1
+
+        return min(1.0, score)
+
+
+def _aligned_pairs(values: np.ndarray) -> np.ndarray:
+    """Keys (i * n + j, i < j) of the pairs closer than ALIGNMENT_TOLERANCE on one axis"""
+    count = values.size
+    order = np.argsort(values, kind='stable')
+    ordered = values[order]
+    # A generous candidate window, then the scalar fitness's exact comparison
+    upper = np.searchsorted(ordered, ordered + 2 * ALIGNMENT_TOLERANCE, side='right')
+    partners = upper - np.arange(count) - 1
+    starts = np.cumsum(partners) - partners
+    first = np.repeat(np.arange(count), partners)
+    second = first + 1 + (np.arange(int(partners.sum())) - np.repeat(starts, partners))
+    close = np.abs(ordered[first] - ordered[second]) < ALIGNMENT_TOLERANCE
+    a, b = order[first[close]], order[second[close]]
+    return np.minimum(a, b) * count + np.maximum(a, b)
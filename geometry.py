@@ -0,0 +1,287 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class Point:
+    x: float
+    y: float
+
+
+@dataclass(slots=True)
+class Rectangle:
+    x: float
+    y: float
+    width: float
+    height: float
+
+    @property
+    def area(self) -> float:
+        return self.width * self.height
+
+    @property
+    def center(self) -> Point:
+        return Point(self.x + self.width/2, self.y + self.height/2)
+
+    def contains_point(self, point: Point) -> bool:
+        return (self.x <= point.x <= self.x + self.width and
+                self.y <= point.y <= self.y + self.height)
+
+    def intersects(self, other: 'Rectangle') -> bool:
+        return not (self.x + self.width < other.x or
+                    other.x + other.width < self.x or
+                    self.y + self.height < other.y or
+                    other.y + other.height < self.y)
+
+
+@dataclass(slots=True)
+class Ilot:
+    id: str
+    rect: Rectangle
+    room_type: str
+    area: float
+    min_size: float
+    max_size: float
+
+
+@dataclass(slots=True)
+class Corridor:
+    id: str
+    rect: Rectangle
+    width: float
+    connected_ilots: List[str]
+
+
+class PreparedPolygon:
+    """A zone polygon prepared for repeated intersection tests.
+
+    Exposes its bounding box as ``x``, ``y``, ``width`` and ``height``, so
+    spatial indexes, the packer and the occupancy grid can prefilter on it,
+    and ``intersects(rect)`` with the same closed-boundary semantics as
+    :meth:`Rectangle.intersects`. Edges are kept both as tuples, for the
+    scalar test, and as NumPy columns for ``contains_points`` and
+    ``intersects_rects`` over many points or rectangles at once. Fewer than
+    three points give a segment or a point.
+    """
+
+    __slots__ = ('x', 'y', 'width', 'height', 'max_x', 'max_y', 'area', '_edges',
+                 '_ax', '_ay', '_bx', '_by')
+
+    def __init__(self, points: Sequence[Tuple[float, float]]):
+        points = [(float(x), float(y)) for x, y in points]
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        self.x, self.y = min(xs), min(ys)
+        self.max_x, self.max_y = max(xs), max(ys)
+        self.width = self.max_x - self.x
+        self.height = self.max_y - self.y
+        following = points[1:] + points[:1]
+        self.area = abs(sum(ax * by - bx * ay for (ax, ay), (bx, by) in zip(points, following))) / 2
+        self._edges = [(ax, ay, bx, by) for (ax, ay), (bx, by) in zip(points, following)]
+        self._ax, self._ay, self._bx, self._by = np.array(self._edges, dtype=np.float64).reshape(-1, 4).T
+
+    def intersects(self, rect: 'Rectangle') -> bool:
+        x0, y0 = rect.x, rect.y
+        x1, y1 = x0 + rect.width, y0 + rect.height
+        if x1 < self.x or self.max_x < x0 or y1 < self.y or self.max_y < y0:
+            return False
+        # The rectangle covers the whole polygon
+        if x0 <= self.x and y0 <= self.y and self.max_x <= x1 and self.max_y <= y1:
+            return True
+        # Edge bounding boxes and endpoints settle most edges without clipping
+        for ax, ay, bx, by in self._edges:
+            if ax < bx:
+                if bx < x0 or ax > x1:
+                    continue
+            elif ax < x0 or bx > x1:
+                continue
+            if ay < by:
+                if by < y0 or ay > y1:
+                    continue
+            elif ay < y0 or by > y1:
+                continue
+            # Overlapping bounding boxes suffice for axis-aligned edges, and endpoints in the box
+            if (ax == bx or ay == by or (x0 <= ax <= x1 and y0 <= ay <= y1) or
+                    (x0 <= bx <= x1 and y0 <= by <= y1)):
+                return True
+            if _segment_hits_box(ax, ay, bx, by, x0, y0, x1, y1):
+                return True
+        # No edge crosses the rectangle: it is either wholly inside or wholly outside
+        return self.contains_point(Point(x0, y0))
+
+    def contains_point(self, point: Point) -> bool:
+        """Even-odd ray casting; points on the boundary may go either way"""
+        px, py = point.x, point.y
+        inside = False
+        for ax, ay, bx, by in self._edges:
+            if (ay > py) != (by > py) and px < ax + (py - ay) * (bx - ax) / (by - ay):
+                inside = not inside
+        return inside
+
+    def contains_points(self, x, y) -> np.ndarray:
+        """Vectorized ``contains_point`` over arrays of coordinates"""
+        px = np.asarray(x, dtype=np.float64)[:, np.newaxis]
+        py = np.asarray(y, dtype=np.float64)[:, np.newaxis]
+        ax, ay, bx, by = self._ax, self._ay, self._bx, self._by
+        straddles = (ay > py) != (by > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = ax + (py - ay) * (bx - ax) / (by - ay)
+        return np.count_nonzero(straddles & (px < crossing), axis=1) % 2 == 1
+
+    def intersects_rects(self, x, y, width, height) -> np.ndarray:
+        """Vectorized ``intersects`` over arrays of rectangles"""
+        x0 = np.asarray(x, dtype=np.float64)
+        y0 = np.asarray(y, dtype=np.float64)
+        x0, y0, x1, y1 = np.broadcast_arrays(x0, y0, x0 + width, y0 + height)
+        result = ~((x1 < self.x) | (self.max_x < x0) | (y1 < self.y) | (self.max_y < y0))
+        candidates = np.flatnonzero(result)
+        if not candidates.size:
+            return result
+
+        # Liang-Barsky clipping of every edge against every candidate box
+        t0 = np.zeros((candidates.size, self._ax.size))
+        t1 = np.ones_like(t0)
+        for start, delta, low, high in ((self._ax, self._bx - self._ax, x0, x1),
+                                        (self._ay, self._by - self._ay, y0, y1)):
+            low = low[candidates, np.newaxis]
+            high = high[candidates, np.newaxis]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                first, second = (low - start) / delta, (high - start) / delta
+            parallel = delta == 0
+            within = (low <= start) & (start <= high)
+            t0 = np.maximum(t0, np.where(parallel, np.where(within, 0.0, np.inf),
+                                         np.minimum(first, second)))
+            t1 = np.minimum(t1, np.where(parallel, np.where(within, 1.0, -np.inf),
+                                         np.maximum(first, second)))
+        hits = (t0 <= t1).any(axis=1)
+        result[candidates] = hits | self.contains_points(x0[candidates], y0[candidates])
+        return result
+
+
+def _segment_hits_box(ax: float, ay: float, bx: float, by: float,
+                      x0: float, y0: float, x1: float, y1: float) -> bool:
+    """Whether segment AB touches the closed box (Liang-Barsky clipping)"""
+    if max(ax, bx) < x0 or min(ax, bx) > x1 or max(ay, by) < y0 or min(ay, by) > y1:
+        return False
+    t0, t1 = 0.0, 1.0
+    for start, delta, low, high in ((ax, bx - ax, x0, x1), (ay, by - ay, y0, y1)):
+        # A parallel segment is within the slab, by the bounding box check above
+        if delta:
+            first, second = (low - start) / delta, (high - start) / delta
+            if first > second:
+                first, second = second, first
+            t0, t1 = max(t0, first), min(t1, second)
+            if t0 > t1:
+                return False
+    return True
+
+
+def zone_shape(points: Sequence[Tuple[float, float]]):
+    """A Rectangle when the polygon is its own bounding box, else a PreparedPolygon"""
+    polygon = PreparedPolygon(points)
+    box_area = polygon.width * polygon.height
+    if abs(polygon.area - box_area) <= 1e-9 * max(1.0, box_area):
+        return Rectangle(polygon.x, polygon.y, polygon.width, polygon.height)
+    return polygon
+
+
+# One ilot as stored by IlotBatch.from_records
+IlotRecord = Tuple[str, float, float, float, float, str, float, float, float]
+
+
+class IlotBatch:
+    """The ilots of one layout, column-wise in NumPy arrays.
+
+    Geometry and sizes are float64 arrays and ids and room types object
+    arrays, so a layout is nine arrays instead of two objects per ilot, and
+    selecting, concatenating or copying ilots is vectorized. ``to_ilots``
+    materializes :class:`Ilot` objects for results.
+    """
+
+    __slots__ = ('x', 'y', 'width', 'height', 'area', 'min_size', 'max_size', 'ids', 'room_types')
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, width: np.ndarray, height: np.ndarray,
+                 area: np.ndarray, min_size: np.ndarray, max_size: np.ndarray,
+                 ids: np.ndarray, room_types: np.ndarray):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.area = area
+        self.min_size = min_size
+        self.max_size = max_size
+        self.ids = ids
+        self.room_types = room_types
+
+    @classmethod
+    def from_records(cls, records: Sequence[IlotRecord]) -> 'IlotBatch':
+        """Build from ``(id, x, y, width, height, room_type, area, min_size, max_size)`` tuples"""
+        if not records:
+            floats = [np.empty(0) for _ in range(7)]
+            return cls(*floats, np.empty(0, dtype=object), np.empty(0, dtype=object))
+        ids, x, y, width, height, room_types, area, min_size, max_size = zip(*records)
+        return cls(
+            *(np.array(column, dtype=np.float64)
+              for column in (x, y, width, height, area, min_size, max_size)),
+            _object_array(ids), _object_array(room_types)
+        )
+
+    @classmethod
+    def from_ilots(cls, ilots: Iterable[Ilot]) -> 'IlotBatch':
+        return cls.from_records([
+            (ilot.id, ilot.rect.x, ilot.rect.y, ilot.rect.width, ilot.rect.height,
+             ilot.room_type, ilot.area, ilot.min_size, ilot.max_size)
+            for ilot in ilots
+        ])
+
+    @classmethod
+    def concatenate(cls, batches: Sequence['IlotBatch']) -> 'IlotBatch':
+        return cls(*(np.concatenate([getattr(batch, name) for batch in batches])
+                     for name in cls.__slots__))
+
+    def take(self, indices: np.ndarray) -> 'IlotBatch':
+        """The ilots at ``indices`` (or a boolean mask), in that order"""
+        return IlotBatch(*(getattr(self, name)[indices] for name in self.__slots__))
+
+    def copy(self) -> 'IlotBatch':
+        return IlotBatch(*(getattr(self, name).copy() for name in self.__slots__))
+
+    def move(self, index: int, x: float, y: float) -> None:
+        self.x[index] = x
+        self.y[index] = y
+
+    def rect(self, index: int) -> Rectangle:
+        return Rectangle(float(self.x[index]), float(self.y[index]),
+                         float(self.width[index]), float(self.height[index]))
+
+    def to_ilots(self) -> List[Ilot]:
+        return [
+            Ilot(id=ilot_id, rect=Rectangle(x, y, width, height), room_type=room_type,
+                 area=area, min_size=min_size, max_size=max_size)
+            for ilot_id, x, y, width, height, room_type, area, min_size, max_size in zip(
+                self.ids.tolist(), self.x.tolist(), self.y.tolist(), self.width.tolist(),
+                self.height.tolist(), self.room_types.tolist(), self.area.tolist(),
+                self.min_size.tolist(), self.max_size.tolist()
+            )
+        ]
+
+    def __len__(self) -> int:
+        return self.x.size
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+def _object_array(values: Sequence) -> np.ndarray:
+    # np.array would turn equal-length strings into a fixed-width string array
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
@@ -0,0 +1,285 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app import db
+from models import FloorPlan
+from record_store import split_analysis
+from segment_store import SegmentStore
+
+# Processing states reported for an uploaded floor plan
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+# Stages in the order they run; extraction and rendering hold a heavy-job slot
+STAGES = ('detect', 'extract', 'preview', 'thumbnail', 'tiles')
+HEAVY_STAGES = ('extract', 'preview', 'tiles')
+# A plan is usable once extracted; a failed later stage only loses artifacts
+REQUIRED_STAGES = ('detect', 'extract')
+
+# Record and wall segment stores inside each upload's processed output directory
+RECORDS_DIR = 'records'
+SEGMENTS_DIR = 'segments'
+
+# Images extraction writes into the output directory, which the preview stage reuses
+PREVIEW_KEYS = ('preview_image', 'grayscale', 'high_contrast')
+
+# Dimensions stored until extraction finds the real ones
+DEFAULT_PLAN_SIZE = 100.0
+
+# Finished uploads kept in memory so their errors can still be reported
+MAX_FINISHED_JOBS = 256
+
+
+class QueueFull(Exception):
+    """Raised when the ingestion queue has reached its pending-upload limit"""
+
+
+class UnsupportedFile(Exception):
+    """Raised by a stage that retrying cannot fix"""
+
+
+def plan_dimensions(file_type: str, data: Optional[Dict[str, Any]]) -> Tuple[float, float]:
+    """Width and height of a floor plan from its analysis data"""
+    if data:
+        if data.get('bounds'):
+            return data['bounds']['width'], data['bounds']['height']
+        if file_type == 'pdf' and data.get('pages'):
+            # Use first page dimensions
+            return data['pages'][0]['width'], data['pages'][0]['height']
+        if 'width' in data:
+            return data['width'], data['height']
+    return DEFAULT_PLAN_SIZE, DEFAULT_PLAN_SIZE
+
+
+def extracted_previews(data: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Preview images that extraction already wrote, by artifact name
+
+    The first rendered PDF page doubles as the preview of a PDF.
+    """
+    data = data or {}
+    previews = {key: data[key] for key in PREVIEW_KEYS if data.get(key)}
+    if 'preview_image' not in previews and data.get('extracted_images'):
+        previews['preview_image'] = data['extracted_images'][0]
+    return previews
+
+
+def processing_status(floor_plan: FloorPlan) -> str:
+    """Processing state recorded in the database
+
+    ``processed_at`` is set when processing finishes, whether or not it
+    succeeded, so a plan that is neither processed nor finished is pending.
+    """
+    if floor_plan.processed:
+        return COMPLETED
+    return FAILED if floor_plan.processed_at is not None else PENDING
+
+
+class _IngestionState:
+    __slots__ = ('status', 'stage', 'attempts', 'error', 'failed_stages')
+
+    def __init__(self):
+        self.status = PENDING
+        self.stage: Optional[str] = None
+        # Attempts made at the current stage
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.failed_stages: Dict[str, str] = {}
+
+
+class IngestionQueue:
+    """Bounded local worker pool processing uploaded floor plans in the background.
+
+    Uploads are stored with ``processed=False`` and run through ``STAGES``:
+    type detection, extraction into the upload's output directory (served
+    from the processing cache for identical files), then whatever preview
+    and thumbnail extraction did not already write, and the zoom tile
+    pyramid. Each stage is
+    retried on its own, up to ``max_attempts`` times with a growing delay,
+    and at most ``INGESTION_HEAVY_JOBS`` extraction or rendering stages run
+    at once across all workers. The floor plan row is updated as stages finish;
+    stage and error details are kept in memory by the process that runs them.
+    """
+
+    def __init__(self, app=None):
+        self.logger = logging.getLogger(__name__)
+        self.app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[int, _IngestionState] = {}
+        self._lock = threading.Lock()
+        self._heavy = threading.BoundedSemaphore(1)
+        self.max_pending = 32
+        self.max_attempts = 3
+        self.retry_delay = 1.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.max_pending = app.config.get('INGESTION_MAX_PENDING', 32)
+        self.max_attempts = max(1, app.config.get('INGESTION_MAX_ATTEMPTS', 3))
+        self.retry_delay = app.config.get('INGESTION_RETRY_DELAY', 1.0)
+        self._heavy = threading.BoundedSemaphore(max(1, app.config.get('INGESTION_HEAVY_JOBS', 1)))
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('INGESTION_WORKERS', 4),
+            thread_name_prefix='ingestion'
+        )
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+
+    def is_full(self) -> bool:
+        return self.active_count() >= self.max_pending
+
+    def submit(self, floor_plan_id: int) -> None:
+        """Schedule processing for a floor plan that was inserted unprocessed"""
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+            if active >= self.max_pending:
+                raise QueueFull(f"{active} uploads already being processed")
+            self._prune()
+            self._jobs[floor_plan_id] = _IngestionState()
+        self._executor.submit(self._run, floor_plan_id)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get_state(self, floor_plan_id: int) -> Optional[Dict[str, Any]]:
+        """In-memory progress of an upload processed by this process, if any"""
+        job = self._jobs.get(floor_plan_id)
+        if job is None:
+            return None
+        return {'status': job.status, 'stage': job.stage, 'attempts': job.attempts,
+                'error': job.error, 'failed_stages': dict(job.failed_stages)}
+
+    def _run(self, floor_plan_id: int) -> None:
+        job = self._jobs[floor_plan_id]
+        with self.app.app_context():
+            try:
+                self._execute(floor_plan_id, job)
+            except Exception as e:
+                self.logger.error(f"Ingestion of floor plan {floor_plan_id} crashed: {traceback.format_exc()}")
+                db.session.rollback()
+                job.status, job.error = FAILED, str(e)
+                floor_plan = db.session.get(FloorPlan, floor_plan_id)
+                if floor_plan is not None:
+                    floor_plan.processed_at = datetime.utcnow()
+                    db.session.commit()
+            finally:
+                db.session.remove()
+
+    def _execute(self, floor_plan_id: int, job: _IngestionState) -> None:
+        floor_plan = db.session.get(FloorPlan, floor_plan_id)
+        if floor_plan is None:
+            job.status = FAILED
+            job.error = 'Floor plan was deleted'
+            return
+
+        from file_processor import FileProcessor
+        from processing_cache import processing_cache
+        processor = FileProcessor.from_config(self.app.config, cache=processing_cache)
+        file_id = os.path.splitext(os.path.basename(floor_plan.file_path))[0]
+        output_dir = os.path.join(self.app.config['UPLOAD_FOLDER'], 'processed', file_id)
+        artifacts: Dict[str, str] = {}
+
+        stages: Dict[str, Callable[[], None]] = {
+            'detect': lambda: self._detect(processor, floor_plan),
+            'extract': lambda: self._extract(processor, floor_plan, output_dir),
+            'preview': lambda: self._preview(processor, floor_plan, output_dir, artifacts),
+            'thumbnail': lambda: self._thumbnail(processor, floor_plan, output_dir, artifacts),
+            'tiles': lambda: artifacts.update(processor.render_tiles(
+                floor_plan.file_path, floor_plan.file_type, output_dir)),
+        }
+
+        job.status = RUNNING
+        for stage in STAGES:
+            job.stage = stage
+            error = self._run_stage(stage, stages[stage], job)
+            if error is None:
+                continue
+            job.failed_stages[stage] = error
+            if stage in REQUIRED_STAGES:
+                job.status, job.error = FAILED, error
+                floor_plan.processed_at = datetime.utcnow()
+                db.session.commit()
+                return
+
+        if artifacts:
+            # Reassigned, since in-place changes to a JSON column are not tracked
+            floor_plan.analysis_data = {**(floor_plan.analysis_data or {}), **artifacts}
+        floor_plan.processed = True
+        floor_plan.processed_at = datetime.utcnow()
+        db.session.commit()
+        job.status = COMPLETED
+        job.stage = None
+
+    def _run_stage(self, stage: str, run: Callable[[], None], job: _IngestionState) -> Optional[str]:
+        """Run one stage with retries; returns the last error, or None on success"""
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            job.attempts = attempt
+            try:
+                if stage in HEAVY_STAGES:
+                    with self._heavy:
+                        run()
+                else:
+                    run()
+                return None
+            except UnsupportedFile as e:
+                db.session.rollback()
+                return str(e)
+            except Exception as e:
+                db.session.rollback()
+                error = str(e)
+                self.logger.warning(f"Ingestion stage {stage} failed (attempt {attempt}/{self.max_attempts}): {e}")
+            if attempt < self.max_attempts:
+                time.sleep(self.retry_delay * attempt)
+        return error
+
+    def _detect(self, processor, floor_plan: FloorPlan) -> None:
+        floor_plan.file_type = processor.detect_file_type(floor_plan.file_path)
+        db.session.commit()
+
+    def _extract(self, processor, floor_plan: FloorPlan, output_dir: str) -> None:
+        if floor_plan.file_type == 'unknown':
+            raise UnsupportedFile('Unsupported file type')
+        result = processor.process_file(floor_plan.file_path, output_dir)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        floor_plan.width, floor_plan.height = plan_dimensions(result['file_type'], result['data'])
+        # Entities, wall/room candidates and page text go to a sidecar store
+        summary = split_analysis(result['data'], os.path.join(output_dir, RECORDS_DIR))
+        # Wall candidates are also indexed for viewport and collision queries
+        walls = (result['data'].get('analysis') or {}).get('potential_walls')
+        if isinstance(walls, list) and walls:
+            segments_path = os.path.join(output_dir, SEGMENTS_DIR)
+            SegmentStore.from_walls(segments_path, walls)
+            summary['segments'] = {'path': segments_path, 'count': len(walls)}
+        floor_plan.analysis_data = summary
+        db.session.commit()
+
+    def _preview(self, processor, floor_plan: FloorPlan, output_dir: str, artifacts: Dict[str, str]) -> None:
+        previews = extracted_previews(floor_plan.analysis_data)
+        if not previews:
+            previews = processor.render_preview(floor_plan.file_path, floor_plan.file_type, output_dir)
+        artifacts.update(previews)
+
+    def _thumbnail(self, processor, floor_plan: FloorPlan, output_dir: str, artifacts: Dict[str, str]) -> None:
+        if (floor_plan.analysis_data or {}).get('thumbnail'):
+            return
+        artifacts.update(processor.render_thumbnail(
+            floor_plan.file_path, floor_plan.file_type, output_dir, artifacts.get('preview_image')))
+
+
+ingestion_queue = IngestionQueue()
@@ -0,0 +1,128 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MissingInputs(Exception):
+    """Raised when batch items refer to floor plans or profiles that don't exist"""
+
+    def __init__(self, floor_plan_ids: Sequence[int], profile_ids: Sequence[int]):
+        self.floor_plan_ids = sorted(floor_plan_ids)
+        self.profile_ids = sorted(profile_ids)
+        super().__init__(f"Unknown floor plans {self.floor_plan_ids} or profiles {self.profile_ids}")
+
+
+def load_batch_inputs(items: Sequence[Dict[str, Any]]):
+    """Floor plans and profiles by id, and zones by floor plan id, in three queries
+
+    Zones are ordered by id within each plan, as single generation orders
+    them. Raises MissingInputs if any referenced plan or profile is missing.
+    """
+    # Imported here: models import the app, which pool workers unpickling _generate must not set up
+    from models import FloorPlan, IlotProfile, ZoneAnnotation
+
+    plan_ids = {item['floor_plan_id'] for item in items}
+    profile_ids = {item['profile_id'] for item in items}
+    floor_plans = {plan.id: plan for plan in FloorPlan.query.filter(FloorPlan.id.in_(plan_ids))}
+    profiles = {profile.id: profile for profile in IlotProfile.query.filter(IlotProfile.id.in_(profile_ids))}
+    if len(floor_plans) < len(plan_ids) or len(profiles) < len(profile_ids):
+        raise MissingInputs(plan_ids - floor_plans.keys(), profile_ids - profiles.keys())
+
+    zones = defaultdict(list)
+    query = ZoneAnnotation.query.filter(ZoneAnnotation.floor_plan_id.in_(plan_ids))
+    for zone in query.order_by(ZoneAnnotation.floor_plan_id, ZoneAnnotation.id):
+        zones[zone.floor_plan_id].append(zone)
+    return floor_plans, profiles, zones
+
+
+def generate_batch(items: Sequence[Dict[str, Any]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Generate a layout for every ``(floor_plan_id, profile_id, algorithm)`` item
+
+    Items may also carry generation ``options`` (see
+    ``LayoutGenerator.generate_layout``). Inputs are loaded in bulk;
+    cached results are reused, identical cacheable items are generated
+    once, and the rest are spread over a pool of ``workers`` processes
+    (CPU count by default). Returns, per item and in order, a dict with
+    ``result``, ``generation_time`` and ``cached``, or with ``error`` if
+    that item's generation failed.
+    """
+    from layout_cache import layout_cache, layout_cache_key
+    from layout_generator import LayoutGenerator
+
+    floor_plans, profiles, zones = load_batch_inputs(items)
+
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    # Work still to run: (generator, algorithm, options, cache key, item indexes)
+    pending: List[Tuple[Any, str, Dict[str, Any], Optional[str], List[int]]] = []
+    by_key: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        floor_plan = floor_plans[item['floor_plan_id']]
+        profile = profiles[item['profile_id']]
+        plan_zones = zones[item['floor_plan_id']]
+        algorithm = item.get('algorithm', 'genetic')
+        options = item.get('options', {})
+        cache_key = layout_cache_key(floor_plan, profile, plan_zones, algorithm, options)
+
+        result = layout_cache.get(cache_key) if cache_key else None
+        if result is not None:
+            outcomes[index] = {'result': result, 'generation_time': 0.0, 'cached': True}
+        elif cache_key in by_key:
+            by_key[cache_key].append(index)
+        else:
+            indexes = [index]
+            if cache_key:
+                by_key[cache_key] = indexes
+            pending.append((LayoutGenerator(floor_plan, profile, plan_zones), algorithm, options,
+                            cache_key, indexes))
+
+    if pending:
+        workers = min(len(pending), workers or os.cpu_count() or 1)
+        if workers > 1:
+            # Island pools started by batch workers share the CPUs instead of multiplying processes
+            island_workers = max(1, (os.cpu_count() or 1) // workers)
+            # Forked workers would inherit the parent's threads, locks and DB connections
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('forkserver')) as executor:
+                futures = [executor.submit(_generate, generator, algorithm,
+                                           _cap_island_workers(options, island_workers))
+                           for generator, algorithm, options, _, _ in pending]
+                runs = [_outcome(future.result) for future in futures]
+        else:
+            runs = [_outcome(_generate, generator, algorithm, options)
+                    for generator, algorithm, options, _, _ in pending]
+
+        for (_, _, _, cache_key, indexes), outcome in zip(pending, runs):
+            if cache_key and 'result' in outcome:
+                layout_cache.put(cache_key, outcome['result'])
+            for index in indexes:
+                outcomes[index] = outcome
+    return outcomes
+
+
+def _generate(generator: Any, algorithm: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one generation inside a pool worker"""
+    start = time.perf_counter()
+    result = generator.generate_layout(algorithm=algorithm, **options)
+    return {'result': result, 'generation_time': time.perf_counter() - start, 'cached': False}
+
+
+def _cap_island_workers(options: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """``options`` with at most ``limit`` island workers; islands don't depend on the worker count"""
+    if options.get('islands', 1) <= 1:
+        return options
+    return {**options, 'workers': min(options.get('workers') or limit, limit)}
+
+
+def _outcome(function, *args) -> Dict[str, Any]:
+    # One failed item must not discard the rest of the batch
+    try:
+        return function(*args)
+    except Exception as exc:
+        logger.exception("Batch layout generation failed")
+        return {'error': str(exc)}
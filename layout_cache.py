@@ -0,0 +1,200 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from layout_generator import DEFAULT_GENERATIONS, GENERATOR_VERSION, LayoutGenerator
+
+# Options that change how a layout is computed but not which layout comes out
+RESULT_NEUTRAL_OPTIONS = ('workers',)
+# generate_layout's defaults, so options spelled out at their default hash like omitted ones
+DEFAULT_OPTIONS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(LayoutGenerator.generate_layout).parameters.items()
+    if parameter.default is not inspect.Parameter.empty
+    and name not in ('algorithm', 'progress_callback') + RESULT_NEUTRAL_OPTIONS
+}
+
+
+def layout_cache_key(floor_plan: Any, profile: Any, zones: Iterable[Any], algorithm: str,
+                     options: Dict[str, Any]) -> Optional[str]:
+    """SHA-256 of the canonical JSON of every input that determines a layout
+
+    Covers the floor plan dimensions, the profile's ``size_distribution`` and
+    ``corridor_width``, each zone's type and coordinates (in the given order),
+    the algorithm, the seed and the other generation options, with omitted
+    options at their default. Returns None when the result isn't
+    reproducible: no seed, or a wall-clock time budget.
+    """
+    if options.get('seed') is None or options.get('time_budget_ms') is not None:
+        return None
+    options = {**DEFAULT_OPTIONS, **{key: value for key, value in options.items()
+                                     if key not in RESULT_NEUTRAL_OPTIONS}}
+    # Without a time budget, no generation cap means the default one
+    if options['generations'] is None:
+        options['generations'] = DEFAULT_GENERATIONS
+    # Whole floats as ints, so 1 and 1.0 hash alike
+    options = {key: int(value) if isinstance(value, float) and value.is_integer() else value
+               for key, value in options.items()}
+    inputs = {
+        'version': GENERATOR_VERSION,
+        'floor_plan': [floor_plan.width, floor_plan.height],
+        'profile': {
+            'size_distribution': profile.size_distribution,
+            'corridor_width': profile.corridor_width
+        },
+        'zones': [[zone.type, zone.coordinates] for zone in zones],
+        'algorithm': algorithm,
+        'options': options
+    }
+    canonical = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LayoutCache:
+    """LRU cache of LayoutGenerator results, with an optional on-disk tier.
+
+    Results are held as serialized JSON, so every hit returns a fresh copy
+    and sizes are known. The in-process tier keeps ``max_entries`` results;
+    when ``root`` is set, results are also written there (one file per key)
+    and shared with other processes, bounded by ``max_bytes`` with least
+    recently used files evicted first.
+    """
+
+    def __init__(self, max_entries: int = 128, root: Optional[str] = None,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def init_app(self, app) -> None:
+        self.max_entries = app.config.get('LAYOUT_CACHE_SIZE', self.max_entries)
+        self.root = app.config.get('LAYOUT_CACHE_DIR', self.root)
+        self.max_bytes = app.config.get('LAYOUT_CACHE_MAX_BYTES', self.max_bytes)
+        if self.root:
+            os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def disk_enabled(self) -> bool:
+        return bool(self.root) and self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is None and self.disk_enabled:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                # Mark as recently used for LRU eviction
+                os.utime(path)
+            except OSError:
+                return None
+            self._remember(key, data)
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            self.logger.warning(f"Discarding unreadable cached layout {key}")
+            self.discard(key)
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a generation result"""
+        try:
+            data = json.dumps(result).encode()
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"Could not cache layout {key}: {e}")
+            return
+        self._remember(key, data)
+        if not self.disk_enabled:
+            return
+
+        path = self._path(key)
+        staging = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, staging = tempfile.mkstemp(prefix='.staging-', dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # Atomic publish; losing a race with another writer is fine
+            os.replace(staging, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write cached layout {key}: {e}")
+            if staging is not None and os.path.exists(staging):
+                os.remove(staging)
+            return
+        self._evict()
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.disk_enabled:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Drop the in-process tier (the disk tier is left to eviction)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Remove least recently used files until the disk tier fits in max_bytes"""
+        entries = []
+        total = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+layout_cache = LayoutCache()
@@ -1,66 +1,125 @@
 
 import random
 import math
+import multiprocessing
+import os
+import time
 import numpy as np
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Callable, Optional, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from models import FloorPlan, IlotProfile, ZoneAnnotation
+from functools import partial
+from types import SimpleNamespace
+from geometry import Corridor, Ilot, IlotBatch, IlotRecord, Point, Rectangle, zone_shape
+from fitness import IncrementalFitnessEvaluator, LayoutFitness, corridor_gap_positions
+from spatial_index import GridIndex, SpatialIndex, build_index
+from packing import MaxRectsPacker
+from occupancy import OccupancyGrid
 import logging
 
-@dataclass
-class Point:
-    x: float
-    y: float
+if TYPE_CHECKING:
+    # Only needed for annotations; keeps the generator importable without the app/DB
+    from models import FloorPlan, IlotProfile, ZoneAnnotation
+    from segment_store import SegmentStore
 
-@dataclass
-class Rectangle:
-    x: float
-    y: float
-    width: float
-    height: float
-    
-    @property
-    def area(self) -> float:
-        return self.width * self.height
-    
-    @property
-    def center(self) -> Point:
-        return Point(self.x + self.width/2, self.y + self.height/2)
-    
-    def contains_point(self, point: Point) -> bool:
-        return (self.x <= point.x <= self.x + self.width and 
-                self.y <= point.y <= self.y + self.height)
-    
-    def intersects(self, other: 'Rectangle') -> bool:
-        return not (self.x + self.width < other.x or 
-                   other.x + other.width < self.x or
-                   self.y + self.height < other.y or 
-                   other.y + other.height < self.y)
+# Bump when a change alters the layout produced for the same inputs and seed
+GENERATOR_VERSION = '2'
 
-@dataclass
-class Ilot:
-    id: str
-    rect: Rectangle
-    room_type: str
-    area: float
-    min_size: float
-    max_size: float
+# Genetic algorithm defaults
+DEFAULT_POPULATION_SIZE = 50
+DEFAULT_GENERATIONS = 100
+DEFAULT_MUTATION_RATE = 0.1
+
+# Ilot sizes used when the profile has no size distribution
+DEFAULT_SIZE_DISTRIBUTION = [
+    {'min_size': 15, 'max_size': 25, 'percentage': 40},
+    {'min_size': 25, 'max_size': 35, 'percentage': 35},
+    {'min_size': 35, 'max_size': 50, 'percentage': 25}
+]
+# Clearance MaxRects packing keeps between ilots, and around obstacles
+PACKING_GAP = 1.0
+# Width/height ratios tried for each packed ilot (both orientations)
+PACKING_ASPECT_RATIOS = (1.0, 1.5)
 
 @dataclass
-class Corridor:
-    id: str
-    rect: Rectangle
-    width: float
-    connected_ilots: List[str]
+class SearchLimits:
+    """When a genetic search stops: whichever limit is reached first
+    
+    ``generations`` caps the rounds of evolution (``None`` for no cap).
+    ``time_budget_ms`` bounds the wall-clock time of the whole search,
+    initial population included, counted from ``start()``. ``target_score``
+    stops once a layout scores at least that much, and ``patience`` after
+    that many generations without improvement.
+    """
+    generations: Optional[int] = DEFAULT_GENERATIONS
+    time_budget_ms: Optional[float] = None
+    target_score: Optional[float] = None
+    patience: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.generations is None and self.time_budget_ms is None:
+            raise ValueError("A search needs a generation cap or a time budget")
+        for name in ('generations', 'patience'):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        if self.time_budget_ms is not None and self.time_budget_ms < 0:
+            raise ValueError("time_budget_ms must not be negative")
+        self.deadline: Optional[float] = None
+    
+    def start(self) -> None:
+        if self.time_budget_ms is not None:
+            self.deadline = time.monotonic() + self.time_budget_ms / 1000
+    
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def remaining_ms(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, (self.deadline - time.monotonic()) * 1000)
+    
+    def stop_reason(self, generation: int, best_score: float, stagnant: int) -> Optional[str]:
+        """Why the search should stop after ``generation`` generations, or None"""
+        if self.target_score is not None and best_score >= self.target_score:
+            return 'target_score'
+        if self.generations is not None and generation >= self.generations:
+            return 'generations'
+        if self.patience is not None and stagnant >= self.patience:
+            return 'stagnation'
+        if self.expired():
+            return 'time_budget'
+        return None
+    
+    def progress(self, generation: int) -> float:
+        """Fraction of the generation cap or the time budget used, whichever is larger"""
+        fractions = []
+        if self.generations is not None:
+            fractions.append(generation / self.generations)
+        if self.deadline is not None:
+            if self.time_budget_ms > 0:
+                fractions.append(1 - self.remaining_ms() / self.time_budget_ms)
+            else:
+                fractions.append(1.0)
+        return min(1.0, max(fractions, default=1.0))
 
 class LayoutGenerator:
     """AI-powered layout generation using genetic algorithms and constraint satisfaction"""
     
-    def __init__(self, floor_plan: FloorPlan, profile: IlotProfile, zones: List[ZoneAnnotation]):
+    def __init__(self, floor_plan: 'FloorPlan', profile: 'IlotProfile', zones: List['ZoneAnnotation'],
+                 spatial_index: str = 'rtree', seed: Optional[int] = None,
+                 occupancy_resolution: Optional[float] = None,
+                 wall_segments: Optional['SegmentStore'] = None):
         self.floor_plan = floor_plan
         self.profile = profile
         self.zones = zones
         self.logger = logging.getLogger(__name__)
+        # Default seed for generate_layout: every call with the same inputs gives the same layout
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+        # Layouts scored since construction (benchmarks report evaluations per second)
+        self.fitness_evaluations = 0
         
         # Extract zone data
         self.walls = []
@@ -70,44 +129,290 @@ class LayoutGenerator:
         for zone in zones:
             coords = zone.coordinates or []
             if zone.type == 'wall':
-                self.walls.extend(self._coords_to_rectangles(coords))
+                self.walls.extend(self._coords_to_shapes(coords))
             elif zone.type == 'restricted':
-                self.restricted_areas.extend(self._coords_to_rectangles(coords))
+                self.restricted_areas.extend(self._coords_to_shapes(coords))
             elif zone.type in ['entrance', 'exit']:
-                self.entrance_areas.extend(self._coords_to_rectangles(coords))
-    
-    def generate_layout(self, algorithm: str = 'genetic') -> Dict[str, Any]:
-        """Generate optimal layout using specified algorithm"""
-        if algorithm == 'genetic':
-            return self._genetic_algorithm()
-        elif algorithm == 'greedy':
-            return self._greedy_placement()
-        elif algorithm == 'random':
-            return self._random_placement()
-        else:
-            return self._genetic_algorithm()
+                self.entrance_areas.extend(self._coords_to_shapes(coords))
+        
+        # Static obstacles are indexed once; ilots get a grid index per layout
+        self.cell_size = self._default_cell_size()
+        obstacles = self.restricted_areas + self.entrance_areas
+        self.obstacle_index = build_index(
+            spatial_index, dict(enumerate(obstacles)), self.cell_size
+        )
+        # With a resolution, obstacle checks are O(1) lookups in a rasterized grid instead
+        self.occupancy: Optional[OccupancyGrid] = None
+        if occupancy_resolution is not None:
+            self.occupancy = OccupancyGrid.from_rectangles(
+                self.floor_plan.width, self.floor_plan.height, occupancy_resolution, obstacles
+            )
+        
+        # Wall segments extracted from the drawing, if given, also block placement
+        self.wall_segments = wall_segments
+        
+        # Obstacles never change, so the available area is computed once
+        self.available_area = self._calculate_available_area()
+        # Per-layout cached aggregates, so GA children are scored without a full re-evaluation
+        self.incremental_fitness = IncrementalFitnessEvaluator(
+            self.available_area, self.profile.size_distribution, self.floor_plan.width,
+            self.floor_plan.height, self.profile.corridor_width
+        )
     
-    def _genetic_algorithm(self) -> Dict[str, Any]:
+    def __getstate__(self) -> Dict[str, Any]:
+        """Pickle support for process pools: snapshot DB models as plain objects"""
+        state = self.__dict__.copy()
+        state['floor_plan'] = SimpleNamespace(
+            id=getattr(self.floor_plan, 'id', None),
+            width=self.floor_plan.width,
+            height=self.floor_plan.height
+        )
+        state['profile'] = SimpleNamespace(
+            id=getattr(self.profile, 'id', None),
+            size_distribution=self.profile.size_distribution,
+            corridor_width=self.profile.corridor_width
+        )
+        state['zones'] = [
+            SimpleNamespace(type=zone.type, coordinates=zone.coordinates) for zone in self.zones
+        ]
+        # Callbacks usually close over request/job state and stay in the parent
+        state['progress_callback'] = None
+        return state
+    
+    def generate_layout(self, algorithm: str = 'genetic', seed: Optional[int] = None,
+                        islands: int = 1, migration_interval: int = 10,
+                        workers: Optional[int] = None,
+                        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        population_size: int = DEFAULT_POPULATION_SIZE,
+                        generations: Optional[int] = None,
+                        mutation_rate: float = DEFAULT_MUTATION_RATE,
+                        time_budget_ms: Optional[float] = None,
+                        target_score: Optional[float] = None,
+                        patience: Optional[int] = None,
+                        maxrects_seeds: int = 0) -> Dict[str, Any]:
+        """Generate optimal layout using specified algorithm
+        
+        ``seed`` (default: the constructor's) makes runs reproducible. ``islands`` > 1 switches the genetic
+        algorithm to the parallel island model (see ``_island_genetic_algorithm``).
+        ``progress_callback`` is called with a progress dict after every
+        generation (see ``_report_progress``). Exceptions it raises abort the
+        run (used for cancellation); returning True stops the genetic search
+        early with the best layout found so far (stop reason ``stopped``).
+        
+        The genetic search runs ``generations`` generations (100 by default)
+        unless it is stopped earlier by ``time_budget_ms``, ``target_score``
+        or ``patience`` (see ``SearchLimits``); with a time budget and no
+        ``generations`` it runs until the deadline. Its result also carries
+        ``generations_completed``, ``convergence`` (best score after each
+        generation) and ``stop_reason``.
+        
+        ``algorithm='maxrects'`` packs ilots deterministically with
+        ``_maxrects_placement``. ``maxrects_seeds`` packed layouts replace
+        random ones in the genetic algorithm's initial population (in every
+        island's).
+        """
+        if generations is None and time_budget_ms is None:
+            generations = DEFAULT_GENERATIONS
+        limits = SearchLimits(generations, time_budget_ms, target_score, patience)
+        if population_size < 2:
+            raise ValueError("population_size must be at least 2")
+        if seed is None:
+            seed = self.seed
+        if seed is not None:
+            self.rng.seed(seed)
+        self.progress_callback = progress_callback
+        
+        try:
+            if algorithm == 'greedy':
+                result = self._greedy_placement()
+            elif algorithm == 'random':
+                result = self._random_placement()
+            elif algorithm == 'maxrects':
+                result = self._maxrects_placement()
+            elif islands > 1:
+                result = self._island_genetic_algorithm(islands, migration_interval, workers, seed,
+                                                        population_size, mutation_rate, limits,
+                                                        maxrects_seeds)
+            else:
+                result = self._genetic_algorithm(population_size, mutation_rate, limits,
+                                                 maxrects_seeds)
+        finally:
+            self.progress_callback = None
+        
+        return result
+    
+    def _report_progress(self, completed: int, limits: SearchLimits, best_score: float,
+                         best_layout: Optional[Dict[str, Any]] = None,
+                         scores: Optional[List[float]] = None) -> bool:
+        """Forward generation progress to the registered callback, if any
+        
+        Besides the counters and best score, the progress dict carries the
+        generation's ``mean_score`` and ``diversity`` (standard deviation of
+        its scores), when known, and ``snapshot``: a callable returning the
+        best layout in result format, so it is only converted when used.
+        Returns True if the callback asks to stop the search.
+        """
+        if self.progress_callback is None:
+            return False
+        snapshot = None
+        if best_layout is not None:
+            snapshot = partial(self._layout_to_result, best_layout, best_score)
+        return bool(self.progress_callback({
+            'generation': completed,
+            'generations': limits.generations,
+            'progress': limits.progress(completed),
+            'best_score': best_score,
+            'mean_score': float(np.mean(scores)) if scores else None,
+            'diversity': float(np.std(scores)) if scores else None,
+            'snapshot': snapshot
+        }))
+    
+    def _genetic_algorithm(self, population_size: int = DEFAULT_POPULATION_SIZE,
+                           mutation_rate: float = DEFAULT_MUTATION_RATE,
+                           limits: Optional[SearchLimits] = None,
+                           maxrects_seeds: int = 0) -> Dict[str, Any]:
         """Genetic algorithm for optimal ilot placement"""
-        population_size = 50
-        generations = 100
-        mutation_rate = 0.1
+        limits = limits or SearchLimits()
+        limits.start()
         
         # Generate initial population
-        population = []
-        for _ in range(population_size):
-            individual = self._create_random_layout()
-            population.append(individual)
+        population = self._initial_population(population_size, limits, maxrects_seeds)
+        
+        _, _, best_layout, best_score, search = self._evolve(
+            population, limits, mutation_rate, population_size
+        )
         
+        result = self._layout_to_result(best_layout, best_score)
+        result.update(search)
+        return result
+    
+    def _initial_population(self, size: int, limits: SearchLimits,
+                            maxrects_seeds: int = 0) -> List[Dict[str, Any]]:
+        """Random layouts; fewer (at least two) if the time budget runs out first
+        
+        The first ``maxrects_seeds`` are packed: the deterministic
+        ``_packed_layout`` and then packings of randomly sized ilots.
+        """
+        population = []
+        while len(population) < size:
+            if len(population) < maxrects_seeds:
+                population.append(self._packed_layout(self.rng if population else None))
+            else:
+                population.append(self._create_random_layout())
+            if len(population) >= 2 and limits.expired():
+                break
+        return population
+    
+    def _island_genetic_algorithm(self, islands: int, migration_interval: int,
+                                  workers: Optional[int] = None,
+                                  seed: Optional[int] = None,
+                                  population_size: int = DEFAULT_POPULATION_SIZE,
+                                  mutation_rate: float = DEFAULT_MUTATION_RATE,
+                                  limits: Optional[SearchLimits] = None,
+                                  maxrects_seeds: int = 0) -> Dict[str, Any]:
+        """Island-model genetic algorithm spread over a process pool
+        
+        The population budget of the single-process algorithm is split across
+        ``islands`` sub-populations. Every ``migration_interval`` generations
+        each island's elites replace the weakest members of the next island
+        (ring topology). Island RNGs are derived from ``seed``, the island
+        number and the epoch, so results don't depend on worker scheduling.
+        Search limits are checked between epochs; workers also get the
+        remaining time budget and the target score.
+        """
+        limits = limits or SearchLimits()
+        limits.start()
+        
+        island_size = max(2, population_size // islands)
+        migration_interval = max(1, migration_interval)
+        migrants = max(1, island_size // 5)
+        base_seed = seed if seed is not None else self.rng.randrange(2 ** 32)
+        workers = workers or min(islands, os.cpu_count() or 1)
+        
+        populations: List[Optional[List[Dict[str, Any]]]] = [None] * islands
         best_layout = None
         best_score = 0
-        
-        for generation in range(generations):
-            # Evaluate fitness
-            scored_population = []
-            for individual in population:
-                score = self._evaluate_fitness(individual)
-                scored_population.append((individual, score))
+        completed = 0
+        convergence = []
+        stagnant = 0
+        stop_reason = None
+        epoch = 0
+        
+        # Forked workers would inherit the parent's threads, locks and DB connections
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_island_worker, initargs=(self,),
+                                 mp_context=multiprocessing.get_context('forkserver')) as executor:
+            while stop_reason is None:
+                epoch_generations = migration_interval
+                if limits.generations is not None:
+                    epoch_generations = min(migration_interval, limits.generations - completed)
+                epoch_limits = SearchLimits(epoch_generations, limits.remaining_ms(),
+                                            limits.target_score)
+                futures = [
+                    executor.submit(_evolve_island, populations[island], island_size,
+                                    epoch_limits, mutation_rate,
+                                    f"{base_seed}:{island}:{epoch}", maxrects_seeds)
+                    for island in range(islands)
+                ]
+                results = [future.result() for future in futures]
+                
+                elites = []
+                traces = []
+                for island, (population, island_elites, layout, score, search) in enumerate(results):
+                    populations[island] = population
+                    elites.append(island_elites[:migrants])
+                    traces.append(search['convergence'])
+                    if layout is not None and score > best_score:
+                        best_layout, best_score = layout, score
+                
+                # Best score over all islands after each generation of the epoch
+                for generation in range(max(len(trace) for trace in traces)):
+                    score = max(trace[min(generation, len(trace) - 1)] for trace in traces)
+                    if convergence and score <= convergence[-1]:
+                        stagnant += 1
+                    else:
+                        stagnant = 0
+                    convergence.append(max(score, convergence[-1]) if convergence else score)
+                completed = len(convergence)
+                
+                # Migration: elites of island i replace the tail of island i + 1
+                for island in range(islands):
+                    incoming = elites[island - 1]
+                    populations[island][-len(incoming):] = incoming
+                
+                if self._report_progress(completed, limits, best_score, best_layout):
+                    stop_reason = 'stopped'
+                else:
+                    stop_reason = limits.stop_reason(completed, best_score, stagnant)
+                epoch += 1
+        
+        result = self._layout_to_result(best_layout, best_score)
+        result.update(generations_completed=completed, convergence=convergence,
+                      stop_reason=stop_reason)
+        return result
+    
+    def _evolve(self, population: List[Dict[str, Any]], limits: SearchLimits,
+                mutation_rate: float, population_size: Optional[int] = None):
+        """Run rounds of selection and reproduction until ``limits`` stop the search
+        
+        The population grows to ``population_size`` (default: its current
+        size). Returns the final population, the elites of the last scored
+        generation (best first), the best layout and score seen, and a dict
+        with ``generations_completed``, ``convergence`` and ``stop_reason``.
+        """
+        population_size = population_size or len(population)
+        elite_count = max(1, population_size // 5)
+        best_layout = None
+        best_score = 0
+        elites = []
+        convergence = []
+        stagnant = 0
+        stop_reason = None
+        generation = 0
+        
+        while stop_reason is None:
+            # Layouts carry cached fitness aggregates; elites are not re-scored
+            scores = [self._score_layout(layout) for layout in population]
+            scored_population = list(zip(population, scores))
             
             # Sort by fitness
             scored_population.sort(key=lambda x: x[1], reverse=True)
@@ -116,104 +421,104 @@ class LayoutGenerator:
             if scored_population[0][1] > best_score:
                 best_score = scored_population[0][1]
                 best_layout = scored_population[0][0]
+                stagnant = 0
+            else:
+                stagnant += 1
+            generation += 1
+            convergence.append(best_score)
             
             # Selection and reproduction
             new_population = []
             
             # Keep top 20%
-            elite_count = population_size // 5
-            for i in range(elite_count):
-                new_population.append(scored_population[i][0])
+            elites = [individual for individual, _ in scored_population[:elite_count]]
+            new_population.extend(elites)
             
-            # Generate offspring
-            while len(new_population) < population_size:
+            # Generate offspring, unless the deadline passes first
+            while len(new_population) < population_size and not limits.expired():
                 parent1 = self._tournament_selection(scored_population)
                 parent2 = self._tournament_selection(scored_population)
                 child = self._crossover(parent1, parent2)
                 
-                if random.random() < mutation_rate:
-                    child = self._mutate(child)
+                if self.rng.random() < mutation_rate:
+                    # The child is not shared yet, so its aggregates are updated in place
+                    child = self._mutate(child, in_place=True)
                 
                 new_population.append(child)
             
             population = new_population
-        
-        return self._layout_to_result(best_layout, best_score)
+            if self._report_progress(generation, limits, best_score, best_layout, scores):
+                stop_reason = 'stopped'
+            else:
+                stop_reason = limits.stop_reason(generation, best_score, stagnant)
+        
+        search = {
+            'generations_completed': generation,
+            'convergence': convergence,
+            'stop_reason': stop_reason
+        }
+        return population, elites, best_layout, best_score, search
     
     def _create_random_layout(self) -> Dict[str, Any]:
         """Create a random valid layout"""
-        ilots = []
-        corridors = []
         
         # Calculate available space
-        available_area = self._calculate_available_area()
+        available_area = self.available_area
         
         # Generate ilots based on size distribution
-        size_distribution = self.profile.size_distribution or [
-            {'min_size': 15, 'max_size': 25, 'percentage': 40},
-            {'min_size': 25, 'max_size': 35, 'percentage': 35},
-            {'min_size': 35, 'max_size': 50, 'percentage': 25}
-        ]
+        size_distribution = self.profile.size_distribution or DEFAULT_SIZE_DISTRIBUTION
         
         total_ilots = min(100, int(available_area / 20))  # Estimate
         
+        records = []
+        ilot_index = self._new_ilot_index()
         ilot_id = 1
         for size_config in size_distribution:
             count = int(total_ilots * size_config['percentage'] / 100)
             
             for _ in range(count):
-                ilot = self._place_random_ilot(
+                record = self._place_random_ilot(
                     str(ilot_id),
                     size_config['min_size'],
                     size_config['max_size'],
-                    ilots
+                    ilot_index
                 )
-                if ilot:
-                    ilots.append(ilot)
+                if record:
+                    ilot_index.insert(len(records), Rectangle(*record[1:5]))
+                    records.append(record)
                     ilot_id += 1
         
-        # Generate corridors
-        corridors = self._generate_corridors(ilots)
-        
-        return {
-            'ilots': ilots,
-            'corridors': corridors
-        }
+        # Corridors are derived when the layout is scored
+        return self._fitness_layout(self.incremental_fitness.new_layout(IlotBatch.from_records(records)))
     
     def _place_random_ilot(self, ilot_id: str, min_size: float, max_size: float, 
-                          existing_ilots: List[Ilot]) -> Ilot:
+                          ilot_index: SpatialIndex) -> Optional[IlotRecord]:
         """Attempt to place a single ilot randomly"""
         max_attempts = 100
         
         for _ in range(max_attempts):
             # Random size within range
-            area = random.uniform(min_size, max_size)
+            area = self.rng.uniform(min_size, max_size)
             
             # Random aspect ratio (width/height)
-            aspect_ratio = random.uniform(0.7, 1.8)
+            aspect_ratio = self.rng.uniform(0.7, 1.8)
             width = math.sqrt(area * aspect_ratio)
             height = area / width
             
             # Random position
-            x = random.uniform(0, self.floor_plan.width - width)
-            y = random.uniform(0, self.floor_plan.height - height)
+            x = self.rng.uniform(0, self.floor_plan.width - width)
+            y = self.rng.uniform(0, self.floor_plan.height - height)
             
             rect = Rectangle(x, y, width, height)
             
             # Check constraints
-            if self._is_valid_placement(rect, existing_ilots):
-                return Ilot(
-                    id=ilot_id,
-                    rect=rect,
-                    room_type='standard',
-                    area=area,
-                    min_size=min_size,
-                    max_size=max_size
-                )
+            if self._is_valid_placement(rect, ilot_index):
+                return (ilot_id, x, y, width, height, 'standard', area, min_size, max_size)
         
         return None
     
-    def _is_valid_placement(self, rect: Rectangle, existing_ilots: List[Ilot]) -> bool:
+    def _is_valid_placement(self, rect: Rectangle, ilot_index: SpatialIndex,
+                            ignore_key: Any = None) -> bool:
         """Check if placement is valid according to constraints"""
         
         # Check boundaries
@@ -222,23 +527,36 @@ class LayoutGenerator:
             rect.y + rect.height > self.floor_plan.height):
             return False
         
-        # Check overlap with existing ilots
-        for ilot in existing_ilots:
-            if rect.intersects(ilot.rect):
-                return False
+        # Check overlap with existing ilots (ignore_key skips the ilot being moved)
+        if ilot_index.intersects_any(rect, ignore=ignore_key):
+            return False
         
-        # Check restricted areas
-        for restricted in self.restricted_areas:
-            if rect.intersects(restricted):
+        # Check restricted and entrance areas (no placement allowed)
+        if self.occupancy is not None:
+            if not self.occupancy.is_free(rect):
                 return False
+        elif self.obstacle_index.intersects_any(rect):
+            return False
         
-        # Check entrance areas (no placement allowed)
-        for entrance in self.entrance_areas:
-            if rect.intersects(entrance):
-                return False
+        # Ilots may not straddle a drawn wall
+        if self.wall_segments is not None and self.wall_segments.intersects_any(rect):
+            return False
         
         return True
     
+    def _default_cell_size(self) -> float:
+        """Grid cell size roughly twice the side of the largest configured ilot"""
+        size_distribution = self.profile.size_distribution or []
+        max_size = max((s['max_size'] for s in size_distribution), default=50)
+        return max(1.0, math.sqrt(max_size) * 2)
+    
+    def _new_ilot_index(self, ilots: List[Ilot] = ()) -> GridIndex:
+        """Build a grid index over ilot rectangles keyed by list position"""
+        ilot_index = GridIndex(self.cell_size)
+        for i, ilot in enumerate(ilots):
+            ilot_index.insert(i, ilot.rect)
+        return ilot_index
+    
     def _generate_corridors(self, ilots: List[Ilot]) -> List[Corridor]:
         """Generate corridors between ilot groups"""
         corridors = []
@@ -246,6 +564,7 @@ class LayoutGenerator:
         
         # Simple corridor generation - horizontal and vertical strips
         corridor_id = 1
+        ilot_index = self._new_ilot_index(ilots)
         
         # Horizontal corridors
         y_positions = self._find_corridor_positions(ilots, 'horizontal')
@@ -255,7 +574,7 @@ class LayoutGenerator:
                 rect=Rectangle(0, y, self.floor_plan.width, corridor_width),
                 width=corridor_width,
                 connected_ilots=self._find_connected_ilots(
-                    Rectangle(0, y, self.floor_plan.width, corridor_width), ilots
+                    Rectangle(0, y, self.floor_plan.width, corridor_width), ilots, ilot_index
                 )
             )
             corridors.append(corridor)
@@ -269,7 +588,7 @@ class LayoutGenerator:
                 rect=Rectangle(x, 0, corridor_width, self.floor_plan.height),
                 width=corridor_width,
                 connected_ilots=self._find_connected_ilots(
-                    Rectangle(x, 0, corridor_width, self.floor_plan.height), ilots
+                    Rectangle(x, 0, corridor_width, self.floor_plan.height), ilots, ilot_index
                 )
             )
             corridors.append(corridor)
@@ -279,56 +598,76 @@ class LayoutGenerator:
     
     def _find_corridor_positions(self, ilots: List[Ilot], direction: str) -> List[float]:
         """Find optimal positions for corridors"""
-        positions = []
-        
         if direction == 'horizontal':
             # Find gaps between ilot rows
-            y_positions = sorted([ilot.rect.y for ilot in ilots] + 
-                               [ilot.rect.y + ilot.rect.height for ilot in ilots])
-            
-            for i in range(len(y_positions) - 1):
-                gap_start = y_positions[i]
-                gap_end = y_positions[i + 1]
-                gap_size = gap_end - gap_start
-                
-                if gap_size >= self.profile.corridor_width * 1.5:
-                    positions.append(gap_start + gap_size / 2 - self.profile.corridor_width / 2)
-        
+            edges = sorted([ilot.rect.y for ilot in ilots] + 
+                           [ilot.rect.y + ilot.rect.height for ilot in ilots])
         else:  # vertical
-            x_positions = sorted([ilot.rect.x for ilot in ilots] + 
-                               [ilot.rect.x + ilot.rect.width for ilot in ilots])
-            
-            for i in range(len(x_positions) - 1):
-                gap_start = x_positions[i]
-                gap_end = x_positions[i + 1]
-                gap_size = gap_end - gap_start
-                
-                if gap_size >= self.profile.corridor_width * 1.5:
-                    positions.append(gap_start + gap_size / 2 - self.profile.corridor_width / 2)
+            edges = sorted([ilot.rect.x for ilot in ilots] + 
+                           [ilot.rect.x + ilot.rect.width for ilot in ilots])
         
-        return positions[:3]  # Limit number of corridors
+        # At most three corridors per direction
+        return corridor_gap_positions(edges, self.profile.corridor_width)
+    
+    def _fitness_layout(self, fitness: LayoutFitness) -> Dict[str, Any]:
+        """Internal GA layout: the ilot batch and its cached aggregates"""
+        return {
+            'ilots': fitness.ilots,
+            'fitness': fitness
+        }
+    
+    def _layout_corridors(self, layout: Dict[str, Any]) -> List[Corridor]:
+        """A layout's corridors; for GA layouts, the same ones _generate_corridors builds"""
+        if 'corridors' in layout:
+            return layout['corridors']
+        fitness = self._layout_fitness(layout)
+        fitness.refresh_corridors()
+        ids = fitness.ilots.ids
+        corridor_width = self.profile.corridor_width
+        corridors = []
+        for corridor_id, (orientation, position, connected) in enumerate(fitness.corridors, 1):
+            if orientation == 'h':
+                rect = Rectangle(0, position, self.floor_plan.width, corridor_width)
+            else:
+                rect = Rectangle(position, 0, corridor_width, self.floor_plan.height)
+            corridors.append(Corridor(
+                id=f"{orientation}_corridor_{corridor_id}",
+                rect=rect,
+                width=corridor_width,
+                connected_ilots=[ids[i] for i in sorted(connected)]
+            ))
+        return corridors
+    
+    def _layout_fitness(self, layout: Dict[str, Any]) -> LayoutFitness:
+        """Cached aggregates of a layout, built on first use"""
+        fitness = layout.get('fitness')
+        if fitness is None:
+            fitness = layout['fitness'] = self.incremental_fitness.new_layout(layout['ilots'])
+        return fitness
+    
+    def _score_layout(self, layout: Dict[str, Any]) -> float:
+        """Fitness from the layout's cached aggregates; equal to _evaluate_fitness"""
+        self.fitness_evaluations += 1
+        return self._layout_fitness(layout).score()
     
-    def _find_connected_ilots(self, corridor_rect: Rectangle, ilots: List[Ilot]) -> List[str]:
+    def _find_connected_ilots(self, corridor_rect: Rectangle, ilots: List[Ilot],
+                              ilot_index: SpatialIndex) -> List[str]:
         """Find ilots that are adjacent to a corridor"""
-        connected = []
         buffer = 2.0  # Small buffer for adjacency
         
-        for ilot in ilots:
-            # Check if ilot is adjacent to corridor
-            expanded_corridor = Rectangle(
-                corridor_rect.x - buffer,
-                corridor_rect.y - buffer,
-                corridor_rect.width + 2 * buffer,
-                corridor_rect.height + 2 * buffer
-            )
-            
-            if expanded_corridor.intersects(ilot.rect):
-                connected.append(ilot.id)
+        # Ilots touching the corridor expanded by the buffer are adjacent
+        expanded_corridor = Rectangle(
+            corridor_rect.x - buffer,
+            corridor_rect.y - buffer,
+            corridor_rect.width + 2 * buffer,
+            corridor_rect.height + 2 * buffer
+        )
         
-        return connected
+        return [ilots[i].id for i in sorted(ilot_index.query(expanded_corridor))]
     
     def _evaluate_fitness(self, layout: Dict[str, Any]) -> float:
         """Evaluate fitness of a layout"""
+        self.fitness_evaluations += 1
         ilots = layout['ilots']
         corridors = layout['corridors']
         
@@ -339,7 +678,7 @@ class LayoutGenerator:
         
         # Space utilization (30%)
         total_ilot_area = sum(ilot.area for ilot in ilots)
-        available_area = self._calculate_available_area()
+        available_area = self.available_area
         utilization = total_ilot_area / available_area if available_area > 0 else 0
         score += utilization * 0.3
         
@@ -426,70 +765,66 @@ class LayoutGenerator:
     def _tournament_selection(self, scored_population: List[Tuple]) -> Dict[str, Any]:
         """Tournament selection for genetic algorithm"""
         tournament_size = 5
-        tournament = random.sample(scored_population, min(tournament_size, len(scored_population)))
+        tournament = self.rng.sample(scored_population, min(tournament_size, len(scored_population)))
         return max(tournament, key=lambda x: x[1])[0]
     
     def _crossover(self, parent1: Dict[str, Any], parent2: Dict[str, Any]) -> Dict[str, Any]:
-        """Crossover operation for genetic algorithm"""
-        # Simple crossover: take ilots from both parents
-        all_ilots = parent1['ilots'] + parent2['ilots']
-        
-        # Remove overlapping ilots
-        final_ilots = []
-        for ilot in all_ilots:
-            if not any(ilot.rect.intersects(existing.rect) for existing in final_ilots):
-                final_ilots.append(ilot)
-        
-        # Regenerate corridors
-        corridors = self._generate_corridors(final_ilots)
-        
-        return {
-            'ilots': final_ilots,
-            'corridors': corridors
-        }
+        """Crossover operation for genetic algorithm
+        
+        Takes all of parent1's ilots and those of parent2 that touch none of
+        them. GA layouts never contain touching ilots, so this equals adding
+        the ilots one by one and skipping any that touches one already kept.
+        """
+        first, second = parent1['ilots'], parent2['ilots']
+        
+        # Closed-interval overlap of every (parent2, parent1) pair, as Rectangle.intersects
+        x, y = first.x[np.newaxis, :], first.y[np.newaxis, :]
+        x1, y1 = x + first.width[np.newaxis, :], y + first.height[np.newaxis, :]
+        ox, oy = second.x[:, np.newaxis], second.y[:, np.newaxis]
+        ox1, oy1 = ox + second.width[:, np.newaxis], oy + second.height[:, np.newaxis]
+        separate = ((x1 < ox) | (ox1 < x) | (y1 < oy) | (oy1 < y)).all(axis=1)
+        
+        child = IlotBatch.concatenate([first, second.take(np.flatnonzero(separate))])
+        return self._fitness_layout(self.incremental_fitness.new_layout(child))
     
-    def _mutate(self, individual: Dict[str, Any]) -> Dict[str, Any]:
-        """Mutation operation for genetic algorithm"""
-        ilots = individual['ilots'].copy()
-        
-        if ilots:
+    def _mutate(self, individual: Dict[str, Any], in_place: bool = False) -> Dict[str, Any]:
+        """Mutation operation for genetic algorithm
+        
+        Only the moved ilot's aggregates and the corridors it affects are
+        updated. ``in_place`` reuses the individual's cache instead of copying
+        it, for children nothing else references.
+        """
+        fitness = self._layout_fitness(individual)
+        if not in_place:
+            fitness = fitness.copy()
+        ilots = fitness.ilots
+        
+        if len(ilots):
             # Randomly modify one ilot
-            mutate_idx = random.randint(0, len(ilots) - 1)
-            ilot = ilots[mutate_idx]
+            mutate_idx = self.rng.randint(0, len(ilots) - 1)
+            rect = ilots.rect(mutate_idx)
             
             # Small random adjustment
-            dx = random.uniform(-5, 5)
-            dy = random.uniform(-5, 5)
+            dx = self.rng.uniform(-5, 5)
+            dy = self.rng.uniform(-5, 5)
             
             new_rect = Rectangle(
-                ilot.rect.x + dx,
-                ilot.rect.y + dy,
-                ilot.rect.width,
-                ilot.rect.height
+                rect.x + dx,
+                rect.y + dy,
+                rect.width,
+                rect.height
             )
             
             # Check if mutation is valid
-            other_ilots = ilots[:mutate_idx] + ilots[mutate_idx+1:]
-            if self._is_valid_placement(new_rect, other_ilots):
-                ilots[mutate_idx] = Ilot(
-                    id=ilot.id,
-                    rect=new_rect,
-                    room_type=ilot.room_type,
-                    area=ilot.area,
-                    min_size=ilot.min_size,
-                    max_size=ilot.max_size
-                )
-        
-        corridors = self._generate_corridors(ilots)
+            if self._is_valid_placement(new_rect, fitness.index, ignore_key=mutate_idx):
+                fitness.move(mutate_idx, new_rect.x, new_rect.y)
         
-        return {
-            'ilots': ilots,
-            'corridors': corridors
-        }
+        return self._fitness_layout(fitness)
     
     def _greedy_placement(self) -> Dict[str, Any]:
         """Simple greedy placement algorithm"""
         ilots = []
+        ilot_index = self._new_ilot_index()
         
         # Grid-based placement
         grid_size = 30  # Base grid size
@@ -500,12 +835,12 @@ class LayoutGenerator:
                     break
                 
                 # Try to place an ilot here
-                width = random.uniform(15, 25)
-                height = random.uniform(15, 25)
+                width = self.rng.uniform(15, 25)
+                height = self.rng.uniform(15, 25)
                 
                 rect = Rectangle(x, y, width, height)
                 
-                if self._is_valid_placement(rect, ilots):
+                if self._is_valid_placement(rect, ilot_index):
                     ilot = Ilot(
                         id=str(len(ilots) + 1),
                         rect=rect,
@@ -514,6 +849,7 @@ class LayoutGenerator:
                         min_size=15,
                         max_size=25
                     )
+                    ilot_index.insert(len(ilots), ilot.rect)
                     ilots.append(ilot)
         
         corridors = self._generate_corridors(ilots)
@@ -521,16 +857,84 @@ class LayoutGenerator:
         
         return self._layout_to_result({'ilots': ilots, 'corridors': corridors}, score)
     
+    def _maxrects_placement(self) -> Dict[str, Any]:
+        """Deterministic MaxRects packing (see ``_packed_layout``)"""
+        layout = self._packed_layout()
+        score = self._score_layout(layout)
+        return self._layout_to_result(layout, score)
+    
+    def _packed_layout(self, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        """Pack ilots from the size distribution until none fits
+        
+        Obstacles are subtracted from the floor's free rectangles up front.
+        Each ilot comes from the size range furthest below its target share
+        and is placed best-short-side-fit among ``PACKING_ASPECT_RATIOS``
+        shapes in both orientations; a range is dropped once its ilot no
+        longer fits. Without ``rng`` ilots get their range's mean area, so
+        the layout is deterministic; with it, area and aspect ratio are
+        drawn as in ``_place_random_ilot``.
+        """
+        size_distribution = self.profile.size_distribution or DEFAULT_SIZE_DISTRIBUTION
+        # No ilot side is shorter than the smallest area at the widest aspect ratio
+        smallest = min(s['min_size'] for s in size_distribution)
+        min_side = math.sqrt(smallest / max(1.8, *PACKING_ASPECT_RATIOS))
+        packer = MaxRectsPacker(self.floor_plan.width, self.floor_plan.height,
+                                PACKING_GAP, min_side + PACKING_GAP)
+        for obstacle in self.restricted_areas + self.entrance_areas:
+            packer.occupy(obstacle.x, obstacle.y, obstacle.width, obstacle.height)
+        
+        records = []
+        ilot_index = self._new_ilot_index()
+        counts = [0] * len(size_distribution)
+        open_ranges = set(range(len(size_distribution)))
+        while open_ranges:
+            # Largest shortfall against the target share once this ilot is added
+            total = len(records) + 1
+            choice = max(open_ranges, key=lambda i: (
+                size_distribution[i]['percentage'] / 100 * total - counts[i], -i
+            ))
+            size_config = size_distribution[choice]
+            min_size, max_size = size_config['min_size'], size_config['max_size']
+            if rng is None:
+                area = (min_size + max_size) / 2
+                ratios = PACKING_ASPECT_RATIOS
+            else:
+                area = rng.uniform(min_size, max_size)
+                ratios = (rng.uniform(0.7, 1.8),)
+            sizes = []
+            for ratio in ratios:
+                width = math.sqrt(area * ratio)
+                sizes.extend([(width, area / width), (area / width, width)])
+            
+            position = packer.find(sizes)
+            if position is None:
+                open_ranges.discard(choice)
+                continue
+            packer.occupy(*position)
+            rect = Rectangle(*position)
+            # Guards the floor edges against rounding in the packer's coordinates
+            if self._is_valid_placement(rect, ilot_index):
+                ilot_index.insert(len(records), rect)
+                records.append((str(len(records) + 1), rect.x, rect.y, rect.width, rect.height,
+                                'standard', area, min_size, max_size))
+                counts[choice] += 1
+        
+        return self._fitness_layout(self.incremental_fitness.new_layout(IlotBatch.from_records(records)))
+    
     def _random_placement(self) -> Dict[str, Any]:
         """Simple random placement"""
         layout = self._create_random_layout()
-        score = self._evaluate_fitness(layout)
+        score = self._score_layout(layout)
         return self._layout_to_result(layout, score)
     
     def _layout_to_result(self, layout: Dict[str, Any], score: float) -> Dict[str, Any]:
         """Convert internal layout to API result format"""
+        ilots = layout['ilots']
+        if isinstance(ilots, IlotBatch):
+            ilots = ilots.to_ilots()
+        
         ilots_data = []
-        for ilot in layout['ilots']:
+        for ilot in ilots:
             ilots_data.append({
                 'id': ilot.id,
                 'x': ilot.rect.x,
@@ -542,7 +946,7 @@ class LayoutGenerator:
             })
         
         corridors_data = []
-        for corridor in layout['corridors']:
+        for corridor in self._layout_corridors(layout):
             corridors_data.append({
                 'id': corridor.id,
                 'x': corridor.rect.x,
@@ -553,8 +957,8 @@ class LayoutGenerator:
                 'connectedIlots': corridor.connected_ilots
             })
         
-        total_ilot_area = sum(ilot.area for ilot in layout['ilots'])
-        available_area = self._calculate_available_area()
+        total_ilot_area = sum(ilot.area for ilot in ilots)
+        available_area = self.available_area
         utilization = (total_ilot_area / available_area * 100) if available_area > 0 else 0
         
         return {
@@ -565,7 +969,13 @@ class LayoutGenerator:
         }
     
     def _calculate_available_area(self) -> float:
-        """Calculate available area for placement"""
+        """Calculate available area for placement
+        
+        With an occupancy grid this is its free area, where overlapping
+        obstacles count once; otherwise each obstacle's area is subtracted.
+        """
+        if self.occupancy is not None:
+            return self.occupancy.free_area()
         total_area = self.floor_plan.width * self.floor_plan.height
         
         # Subtract restricted areas
@@ -574,35 +984,45 @@ class LayoutGenerator:
         
         return max(0, total_area - restricted_area - entrance_area)
     
-    def _coords_to_rectangles(self, coordinates: List) -> List[Rectangle]:
-        """Convert coordinate lists to Rectangle objects"""
-        rectangles = []
+    def _coords_to_shapes(self, coordinates: List) -> List[Any]:
+        """Convert a zone's coordinate list to an obstacle shape
         
+        Zones that are axis-aligned rectangles become Rectangle objects;
+        any other polygon (or a segment or point, for fewer than three
+        points) becomes a PreparedPolygon with exact intersection tests.
+        """
         if not coordinates:
-            return rectangles
+            return []
         
         # Handle different coordinate formats
         if isinstance(coordinates[0], dict) and 'x' in coordinates[0]:
             # List of points
-            if len(coordinates) >= 4:
-                # Assume rectangular from 4 points
-                xs = [p['x'] for p in coordinates]
-                ys = [p['y'] for p in coordinates]
-                
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
-                
-                rectangles.append(Rectangle(min_x, min_y, max_x - min_x, max_y - min_y))
-        
+            points = [(p['x'], p['y']) for p in coordinates]
         elif isinstance(coordinates[0], list) and len(coordinates[0]) == 2:
             # List of [x, y] pairs
-            if len(coordinates) >= 4:
-                xs = [p[0] for p in coordinates]
-                ys = [p[1] for p in coordinates]
-                
-                min_x, max_x = min(xs), max(xs)
-                min_y, max_y = min(ys), max(ys)
-                
-                rectangles.append(Rectangle(min_x, min_y, max_x - min_x, max_y - min_y))
+            points = [(p[0], p[1]) for p in coordinates]
+        else:
+            return []
         
-        return rectangles
+        return [zone_shape(points)]
+
+
+# Island-model worker state: each pool process receives the generator once
+_island_generator: Optional[LayoutGenerator] = None
+
+
+def _init_island_worker(generator: LayoutGenerator) -> None:
+    global _island_generator
+    _island_generator = generator
+
+
+def _evolve_island(population: Optional[List[Dict[str, Any]]], island_size: int,
+                   limits: SearchLimits, mutation_rate: float, seed: str,
+                   maxrects_seeds: int = 0):
+    """Evolve one island for an epoch inside a pool worker"""
+    generator = _island_generator
+    generator.rng = random.Random(seed)
+    limits.start()
+    if population is None:
+        population = generator._initial_population(island_size, limits, maxrects_seeds)
+    return generator._evolve(population, limits, mutation_rate, island_size)
@@ -0,0 +1,336 @@
+import json
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import update
+
+from app import db
+from models import FloorPlan, IlotProfile, IlotPlacement, ZoneAnnotation
+
+# IlotPlacement.status values used by the job subsystem
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+# Running, asked to finish early with the best layout found so far
+STOPPING = 'stopping'
+CANCELLED = 'cancelled'
+COMPLETED = 'completed'
+# Finished early on request, with the best layout found until then
+STOPPED = 'stopped'
+FAILED = 'failed'
+FINISHED_STATUSES = (CANCELLED, COMPLETED, STOPPED, FAILED)
+# Finished statuses whose placement holds a layout
+RESULT_STATUSES = (COMPLETED, STOPPED)
+
+# Finished jobs kept in memory so their errors can still be reported
+MAX_FINISHED_JOBS = 256
+
+# Progress fields sent in job events; the best layout is added when it improves
+EVENT_PROGRESS_KEYS = ('generation', 'generations', 'progress', 'best_score', 'mean_score', 'diversity')
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has reached its pending-job limit"""
+
+
+class JobCancelled(Exception):
+    """Raised from the progress callback to abort a cancelled generation"""
+
+
+def layout_result_values(result: Dict[str, Any], generation_time: float) -> Dict[str, Any]:
+    """Placement column values for a LayoutGenerator result"""
+    return {
+        'total_ilots': len(result['ilots']),
+        'total_area': sum(ilot['area'] for ilot in result['ilots']),
+        'utilization_percentage': result['utilization_percentage'],
+        'ilot_data': result['ilots'],
+        'corridor_data': result['corridors'],
+        'optimization_score': result.get('optimization_score', 0.75),
+        'generation_time': generation_time
+    }
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events message"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class _JobState:
+    __slots__ = ('status', 'progress', 'error', 'cancel_event', 'stop_event', 'latest')
+
+    def __init__(self):
+        self.status = QUEUED
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.stop_event = threading.Event()
+        # Last progress dict reported by the generator
+        self.latest: Optional[Dict[str, Any]] = None
+
+
+class LayoutJobQueue:
+    """Bounded local worker pool running layout generation in the background.
+
+    Job ids are ``IlotPlacement`` ids: the placement row is created with
+    ``status='queued'`` and moves through ``running`` to ``completed``,
+    ``failed`` or ``cancelled``, or through ``stopping`` to ``stopped``. Progress and error details are kept in memory
+    by the process that runs the job; the status column is the source of truth
+    for every other process, including cancellation requests.
+    """
+
+    def __init__(self, app=None):
+        self.logger = logging.getLogger(__name__)
+        self.app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[int, _JobState] = {}
+        self._lock = threading.Lock()
+        self.max_pending = 16
+        self.cancel_poll_interval = 1.0
+        self.events_min_interval = 0.5
+        self.events_heartbeat = 15.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.max_pending = app.config.get('LAYOUT_JOB_MAX_PENDING', 16)
+        self.cancel_poll_interval = app.config.get('LAYOUT_JOB_CANCEL_POLL_INTERVAL', 1.0)
+        self.events_min_interval = app.config.get('LAYOUT_EVENTS_MIN_INTERVAL', 0.5)
+        self.events_heartbeat = app.config.get('LAYOUT_EVENTS_HEARTBEAT', 15.0)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('LAYOUT_JOB_WORKERS', 2),
+            thread_name_prefix='layout-job'
+        )
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+
+    def is_full(self) -> bool:
+        return self.active_count() >= self.max_pending
+
+    def submit(self, placement_id: int, algorithm: str, options: Dict[str, Any]) -> None:
+        """Schedule generation for a placement that was inserted as queued"""
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+            if active >= self.max_pending:
+                raise QueueFull(f"{active} layout jobs already pending")
+            self._prune()
+            self._jobs[placement_id] = _JobState()
+        self._executor.submit(self._run, placement_id, algorithm, options)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def cancel(self, placement_id: int) -> bool:
+        """Request cancellation; returns False if the job already finished"""
+        # Conditional updates, so a job finishing meanwhile keeps its final status.
+        # Queued jobs never start; running ones notice the flag or the status
+        queued = db.session.execute(
+            update(IlotPlacement)
+            .where(IlotPlacement.id == placement_id, IlotPlacement.status == QUEUED)
+            .values(status=CANCELLED)
+        ).rowcount
+        requested = queued or db.session.execute(
+            update(IlotPlacement)
+            .where(IlotPlacement.id == placement_id,
+                   IlotPlacement.status.in_((RUNNING, STOPPING, CANCELLING)))
+            .values(status=CANCELLING)
+        ).rowcount
+        db.session.commit()
+        if not requested:
+            return False
+
+        job = self._jobs.get(placement_id)
+        if job is not None:
+            job.cancel_event.set()
+            if queued:
+                job.status = CANCELLED
+        return True
+
+    def stop(self, placement_id: int) -> bool:
+        """Ask a running job to finish now with its best layout; False if it isn't running"""
+        requested = db.session.execute(
+            update(IlotPlacement)
+            .where(IlotPlacement.id == placement_id,
+                   IlotPlacement.status.in_((RUNNING, STOPPING)))
+            .values(status=STOPPING)
+        ).rowcount
+        db.session.commit()
+        if not requested:
+            return False
+
+        job = self._jobs.get(placement_id)
+        if job is not None:
+            job.stop_event.set()
+            job.status = STOPPING
+        return True
+
+    def get_state(self, placement_id: int) -> Optional[Dict[str, Any]]:
+        """In-memory progress of a job run by this process, if any"""
+        job = self._jobs.get(placement_id)
+        if job is None:
+            return None
+        return {'status': job.status, 'progress': job.progress, 'error': job.error}
+
+    def events(self, placement_id: int, interval: Optional[float] = None) -> Iterator[str]:
+        """Server-Sent Events following a job until it finishes
+
+        Emits a ``progress`` event for each new generation seen, at most one
+        every ``interval`` seconds (never less than ``events_min_interval``),
+        carrying the best layout whenever the best score improved, and a
+        final ``done`` event. Jobs run by another process only report their
+        status. Comment lines keep idle connections open.
+        """
+        interval = max(self.events_min_interval, interval or 0)
+        last_generation = None
+        last_best = None
+        last_sent = time.monotonic()
+        while True:
+            job = self._jobs.get(placement_id)
+            if job is not None:
+                status, error = job.status, job.error
+            else:
+                db.session.expire_all()
+                placement = db.session.get(IlotPlacement, placement_id)
+                status, error = (placement.status if placement else FAILED), None
+
+            latest = job.latest if job is not None else None
+            if latest is not None and latest['generation'] != last_generation:
+                last_generation = latest['generation']
+                data = {key: latest[key] for key in EVENT_PROGRESS_KEYS}
+                data['status'] = status
+                if latest['best_score'] != last_best and latest['snapshot'] is not None:
+                    last_best = latest['best_score']
+                    data['layout'] = latest['snapshot']()
+                yield format_event('progress', data, last_generation)
+                last_sent = time.monotonic()
+
+            if status in FINISHED_STATUSES:
+                db.session.expire_all()
+                placement = db.session.get(IlotPlacement, placement_id)
+                yield format_event('done', {
+                    'status': status,
+                    'error': error,
+                    'optimization_score': placement.optimization_score if placement else None,
+                    'status_url': f'/api/jobs/{placement_id}'
+                })
+                return
+
+            if time.monotonic() - last_sent >= self.events_heartbeat:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(interval)
+
+    def _run(self, placement_id: int, algorithm: str, options: Dict[str, Any]) -> None:
+        job = self._jobs[placement_id]
+        with self.app.app_context():
+            try:
+                self._execute(placement_id, job, algorithm, options)
+            except Exception as e:
+                self.logger.error(f"Layout job {placement_id} crashed: {traceback.format_exc()}")
+                db.session.rollback()
+                job.status, job.error = FAILED, str(e)
+                placement = db.session.get(IlotPlacement, placement_id)
+                if placement is not None:
+                    placement.status = FAILED
+                    db.session.commit()
+            finally:
+                db.session.remove()
+
+    def _execute(self, placement_id: int, job: _JobState, algorithm: str,
+                 options: Dict[str, Any]) -> None:
+        started = not job.cancel_event.is_set() and db.session.execute(
+            update(IlotPlacement)
+            .where(IlotPlacement.id == placement_id, IlotPlacement.status == QUEUED)
+            .values(status=RUNNING)
+        ).rowcount
+        db.session.commit()
+        if not started:
+            job.status = CANCELLED
+            return
+        job.status = RUNNING
+        placement = db.session.get(IlotPlacement, placement_id)
+
+        floor_plan = db.session.get(FloorPlan, placement.floor_plan_id)
+        profile = db.session.get(IlotProfile, placement.configuration_id)
+        zones = ZoneAnnotation.query.filter_by(
+            floor_plan_id=placement.floor_plan_id
+        ).order_by(ZoneAnnotation.id).all()
+
+        from layout_cache import layout_cache, layout_cache_key
+        from layout_generator import LayoutGenerator
+        generator = LayoutGenerator(floor_plan, profile, zones)
+        cache_key = layout_cache_key(floor_plan, profile, zones, algorithm, options)
+
+        last_poll = time.monotonic()
+
+        def on_progress(progress: Dict[str, Any]) -> bool:
+            nonlocal last_poll
+            job.progress = progress['progress']
+            job.latest = progress
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            # Cancellation or a stop may have been requested through another process
+            if time.monotonic() - last_poll >= self.cancel_poll_interval:
+                last_poll = time.monotonic()
+                db.session.refresh(placement, ['status'])
+                if placement.status == CANCELLING:
+                    raise JobCancelled()
+                if placement.status == STOPPING:
+                    job.stop_event.set()
+            return job.stop_event.is_set()
+
+        start_time = datetime.utcnow()
+        # An identical job may have finished while this one was queued
+        result = layout_cache.get(cache_key) if cache_key else None
+        if result is None:
+            try:
+                result = generator.generate_layout(
+                    algorithm=algorithm, progress_callback=on_progress, **options
+                )
+            except JobCancelled:
+                placement.status = job.status = CANCELLED
+                db.session.commit()
+                return
+            # A run stopped on request is not what the same inputs would produce
+            if cache_key and result.get('stop_reason') != 'stopped':
+                layout_cache.put(cache_key, result)
+
+        values = layout_result_values(result, (datetime.utcnow() - start_time).total_seconds())
+        # Stop and cancel requests can land until the very end; statuses only move forward
+        # (running -> stopping -> cancelling), so each final status is set conditionally
+        for current, final in ((RUNNING, COMPLETED), (STOPPING, STOPPED)):
+            finished = db.session.execute(
+                update(IlotPlacement)
+                .where(IlotPlacement.id == placement_id, IlotPlacement.status == current)
+                .values(status=final, **values)
+            ).rowcount
+            db.session.commit()
+            if finished:
+                # Event streams read the result from the database once the job reports it
+                job.status = final
+                job.progress = 1.0
+                return
+
+        db.session.execute(
+            update(IlotPlacement)
+            .where(IlotPlacement.id == placement_id, IlotPlacement.status == CANCELLING)
+            .values(status=CANCELLED)
+        )
+        db.session.commit()
+        job.status = CANCELLED
+
+
+job_queue = LayoutJobQueue()
@@ -0,0 +1,105 @@
+import math
+from typing import Any, Iterable
+
+import numpy as np
+
+
+class OccupancyGrid:
+    """Obstacles rasterized into a boolean bitmap, with a summed-area table.
+
+    The floor is split into square cells of side ``resolution``; a cell is
+    occupied when any added rectangle or polygon touches it. Whether a rectangle
+    touches an occupied cell is then four table lookups, whatever the
+    number of obstacles, and ``free_mask`` answers it for whole arrays of
+    candidates at once.
+
+    Checks are conservative: a rectangle that touches an obstacle always
+    touches one of its cells, but a rectangle closer than one cell to an
+    obstacle may be reported as blocked too.
+    """
+
+    def __init__(self, width: float, height: float, resolution: float):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.width = width
+        self.height = height
+        self.resolution = resolution
+        self.columns = max(1, math.ceil(width / resolution))
+        self.rows = max(1, math.ceil(height / resolution))
+        self.cells = np.zeros((self.rows, self.columns), dtype=bool)
+        self._table = None
+
+    @classmethod
+    def from_rectangles(cls, width: float, height: float, resolution: float,
+                        rectangles: Iterable[Any]) -> 'OccupancyGrid':
+        grid = cls(width, height, resolution)
+        for rect in rectangles:
+            grid.add(rect)
+        return grid
+
+    def _cell_range(self, start, end, count):
+        # Cells touched by the closed interval [start, end], clipped to the grid
+        first = np.clip(np.floor(np.asarray(start) / self.resolution), 0, count - 1).astype(np.intp)
+        last = np.clip(np.floor(np.asarray(end) / self.resolution), 0, count - 1).astype(np.intp)
+        return first, last
+
+    def add(self, rect: Any) -> None:
+        """Mark the cells a rectangle (or PreparedPolygon) touches as occupied"""
+        if (rect.x + rect.width < 0 or rect.x > self.width or
+                rect.y + rect.height < 0 or rect.y > self.height):
+            return
+        i0, i1 = self._cell_range(rect.x, rect.x + rect.width, self.columns)
+        j0, j1 = self._cell_range(rect.y, rect.y + rect.height, self.rows)
+        self._table = None
+        if not hasattr(rect, 'intersects_rects'):
+            self.cells[j0:j1 + 1, i0:i1 + 1] = True
+            return
+        # Polygons only mark the cells of their bounding box they touch, a row at a time
+        resolution = self.resolution
+        xs = np.arange(i0, i1 + 1) * resolution
+        for j in range(j0, j1 + 1):
+            self.cells[j, i0:i1 + 1] |= rect.intersects_rects(xs, j * resolution, resolution, resolution)
+
+    @property
+    def table(self) -> np.ndarray:
+        """Summed-area table: ``table[j, i]`` counts occupied cells in rows < j, columns < i"""
+        if self._table is None:
+            table = np.zeros((self.rows + 1, self.columns + 1), dtype=np.int64)
+            # In place, so no grid-sized temporaries are allocated
+            np.cumsum(self.cells, axis=0, out=table[1:, 1:])
+            np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+            self._table = table
+        return self._table
+
+    def occupied_count(self, x, y, width, height):
+        """Occupied cells touched by each rectangle (scalars or equal-length arrays)"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        i0, i1 = self._cell_range(x, x + width, self.columns)
+        j0, j1 = self._cell_range(y, y + height, self.rows)
+        table = self.table
+        return (table[j1 + 1, i1 + 1] - table[j0, i1 + 1] -
+                table[j1 + 1, i0] + table[j0, i0])
+
+    def is_free(self, rect: Any) -> bool:
+        """True when the rectangle touches no occupied cell"""
+        # Scalar path of occupied_count; int() equals floor here since negatives clip to 0
+        resolution = self.resolution
+        last_column, last_row = self.columns - 1, self.rows - 1
+        i0 = min(max(int(rect.x / resolution), 0), last_column)
+        i1 = min(max(int((rect.x + rect.width) / resolution), 0), last_column) + 1
+        j0 = min(max(int(rect.y / resolution), 0), last_row)
+        j1 = min(max(int((rect.y + rect.height) / resolution), 0), last_row) + 1
+        table = self._table if self._table is not None else self.table
+        return table[j1, i1] - table[j0, i1] - table[j1, i0] + table[j0, i0] == 0
+
+    def free_mask(self, x, y, width, height) -> np.ndarray:
+        """Vectorized ``is_free`` over arrays of candidate rectangles"""
+        return self.occupied_count(x, y, width, height) == 0
+
+    def free_area(self) -> float:
+        """Area of the free cells, clipped to the floor (each overlap counted once)"""
+        resolution = self.resolution
+        cell_widths = np.minimum(resolution, self.width - np.arange(self.columns) * resolution)
+        cell_heights = np.minimum(resolution, self.height - np.arange(self.rows) * resolution)
+        return float(cell_heights @ (~self.cells) @ cell_widths)
@@ -0,0 +1,100 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class MaxRectsPacker:
+    """MaxRects free-rectangle packer over one rectangular bin.
+
+    Free space is kept as a list of maximal, possibly overlapping free
+    rectangles in NumPy columns (``x0, y0, x1, y1``). Each placed item is
+    subtracted from every free rectangle it overlaps, so placement costs a
+    few vectorized scans over the list instead of rejection sampling.
+
+    Every item (and every region passed to ``occupy``) reserves ``gap``
+    extra units right of and above it, so packed items never touch each
+    other or an occupied region, as ``Rectangle.intersects`` requires.
+    Free rectangles whose shorter side is below ``min_side`` can never
+    hold an item and are dropped.
+    """
+
+    def __init__(self, width: float, height: float, gap: float = 0.0, min_side: float = 0.0):
+        self.gap = gap
+        self.min_side = min_side
+        # The bin grows by one gap so items may end exactly on its far edges
+        self._free = np.array([[0.0, 0.0, width + gap, height + gap]])
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def find(self, sizes: Sequence[Tuple[float, float]]) -> Optional[Tuple[float, float, float, float]]:
+        """Best-short-side-fit position for any of the ``(width, height)`` candidates
+
+        Returns ``(x, y, width, height)`` of the candidate and free rectangle
+        leaving the smallest leftover on their shorter side (then longer
+        side, then lowest, then leftmost), or None when nothing fits.
+        """
+        free = self._free
+        if not len(free):
+            return None
+        free_w = free[:, 2] - free[:, 0]
+        free_h = free[:, 3] - free[:, 1]
+        best = None
+        for width, height in sizes:
+            left_w = free_w - (width + self.gap)
+            left_h = free_h - (height + self.gap)
+            fits = np.flatnonzero((left_w >= 0) & (left_h >= 0))
+            if not fits.size:
+                continue
+            short = np.minimum(left_w[fits], left_h[fits])
+            long = np.maximum(left_w[fits], left_h[fits])
+            i = fits[np.lexsort((free[fits, 0], free[fits, 1], long, short))[0]]
+            key = (min(left_w[i], left_h[i]), max(left_w[i], left_h[i]), free[i, 1], free[i, 0])
+            if best is None or key < best[0]:
+                best = (key, (float(free[i, 0]), float(free[i, 1]), width, height))
+        return best[1] if best else None
+
+    def occupy(self, x: float, y: float, width: float, height: float) -> None:
+        """Remove a rectangle (plus the gap right of and above it) from the free space"""
+        x1, y1 = x + width + self.gap, y + height + self.gap
+        free = self._free
+        hit = (free[:, 0] < x1) & (x < free[:, 2]) & (free[:, 1] < y1) & (y < free[:, 3])
+        if not hit.any():
+            return
+        split = free[hit]
+        kept = free[~hit]
+
+        # The up to four maximal pieces of each split rectangle around the occupied one
+        fx0, fy0, fx1, fy1 = split.T
+        pieces = np.concatenate([
+            np.column_stack((fx0, fy0, np.minimum(fx1, x), fy1))[fx0 < x],
+            np.column_stack((np.maximum(fx0, x1), fy0, fx1, fy1))[x1 < fx1],
+            np.column_stack((fx0, fy0, fx1, np.minimum(fy1, y)))[fy0 < y],
+            np.column_stack((fx0, np.maximum(fy0, y1), fx1, fy1))[y1 < fy1],
+        ])
+        sides = np.minimum(pieces[:, 2] - pieces[:, 0], pieces[:, 3] - pieces[:, 1])
+        pieces = pieces[sides >= max(self.min_side, 1e-12)]
+
+        # Kept rectangles are not nested, and pieces are parts of split ones,
+        # so only pieces can be contained in another rectangle
+        self._free = np.concatenate((kept, pieces[_maximal(pieces, kept)]))
+
+
+def _maximal(pieces: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Mask of pieces contained neither in ``others`` nor in another piece (equal ones keep the first)"""
+    if not len(pieces):
+        return np.zeros(0, dtype=bool)
+    px0, py0, px1, py1 = (pieces[:, i, np.newaxis] for i in range(4))
+
+    def inside(boxes: np.ndarray) -> np.ndarray:
+        return ((boxes[np.newaxis, :, 0] <= px0) & (boxes[np.newaxis, :, 1] <= py0) &
+                (px1 <= boxes[np.newaxis, :, 2]) & (py1 <= boxes[np.newaxis, :, 3]))
+
+    contained = inside(others).any(axis=1) if len(others) else np.zeros(len(pieces), dtype=bool)
+    within = inside(pieces)
+    # A piece inside another one it isn't equal to, or inside an earlier equal one
+    equal = within & within.T
+    np.fill_diagonal(within, False)
+    earlier = np.tril(equal, k=-1)
+    contained |= (within & ~equal).any(axis=1) | earlier.any(axis=1)
+    return ~contained
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+# Placeholder for the per-upload output directory inside cached analysis JSON
+OUTPUT_DIR_TOKEN = '$OUTPUT_DIR'
+
+ANALYSIS_FILE = 'analysis.json'
+ARTIFACTS_DIR = 'artifacts'
+
+
+class ProcessingCache:
+    """Content-addressed on-disk cache of FileProcessor results.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes plus the processor
+    version, and hold the analysis dict together with the preview/thumbnail
+    artifacts that were written to the output directory. A hit hard-links (or
+    copies) those artifacts into the new upload's output directory, so evicting
+    an entry never breaks floor plans that were served from it. The cache is
+    bounded by total size on disk and evicts least recently used entries.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        self.max_bytes = max_bytes
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def init_app(self, app) -> None:
+        self.root = app.config.get(
+            'PROCESSING_CACHE_DIR',
+            os.path.join(app.config['UPLOAD_FOLDER'], 'processed', 'cache')
+        )
+        self.max_bytes = app.config.get('PROCESSING_CACHE_MAX_BYTES', self.max_bytes)
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root) and self.max_bytes > 0
+
+    def key_for(self, file_path: str, version: str, with_artifacts: bool) -> str:
+        """Hash file contents, processor version and whether artifacts were requested"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest.update(f"|{version}|{'artifacts' if with_artifacts else 'analysis'}".encode())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str, output_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, materializing artifacts in ``output_dir``"""
+        if not self.enabled:
+            return None
+
+        entry_dir = self._entry_dir(key)
+        analysis_path = os.path.join(entry_dir, ANALYSIS_FILE)
+        try:
+            with open(analysis_path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            artifacts_dir = os.path.join(entry_dir, ARTIFACTS_DIR)
+            if output_dir and os.path.isdir(artifacts_dir):
+                _link_tree(artifacts_dir, output_dir)
+            # Mark as recently used for LRU eviction
+            os.utime(analysis_path)
+        except OSError as e:
+            self.logger.warning(f"Could not restore cached artifacts for {key}: {e}")
+            return None
+
+        return _replace_prefix(result, OUTPUT_DIR_TOKEN, output_dir or '')
+
+    def put(self, key: str, result: Dict[str, Any], output_dir: Optional[str] = None) -> None:
+        """Store a successful processing result and its artifacts"""
+        if not self.enabled:
+            return
+
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        parent = os.path.dirname(entry_dir)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=parent)
+        try:
+            if output_dir and os.path.isdir(output_dir):
+                _link_tree(output_dir, os.path.join(staging, ARTIFACTS_DIR))
+            stored = _replace_prefix(result, output_dir, OUTPUT_DIR_TOKEN) if output_dir else result
+            with open(os.path.join(staging, ANALYSIS_FILE), 'w') as f:
+                json.dump(stored, f)
+            # Atomic publish; losing a race with another writer is fine
+            os.rename(staging, entry_dir)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not cache processing result {key}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                try:
+                    last_used = os.stat(os.path.join(entry.path, ANALYSIS_FILE)).st_mtime
+                except OSError:
+                    continue
+                size = _tree_size(entry.path)
+                entries.append((last_used, size, entry.path))
+                total += size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def _link_tree(source: str, destination: str) -> None:
+    """Hard-link every file under ``source`` into ``destination``, copying across devices"""
+    for dirpath, _, filenames in os.walk(source):
+        target_dir = os.path.join(destination, os.path.relpath(dirpath, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            src = os.path.join(dirpath, name)
+            dst = os.path.join(target_dir, name)
+            if os.path.exists(dst):
+                continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _replace_prefix(value: Any, old: str, new: str) -> Any:
+    """Recursively rewrite string values that start with ``old``"""
+    if isinstance(value, str):
+        return new + value[len(old):] if value.startswith(old) else value
+    if isinstance(value, dict):
+        return {k: _replace_prefix(v, old, new) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_prefix(v, old, new) for v in value]
+    return value
+
+
+processing_cache = ProcessingCache()
@@ -0,0 +1,307 @@
+import json
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bump whenever the column layout changes; stores of other versions are not read
+STORE_VERSION = 2
+
+META_FILE = 'meta.json'
+
+# Record collections, in storage order, and the analysis keys they are moved out of
+COLLECTIONS = ('entities', 'walls', 'rooms', 'text')
+
+# Stored for entities without a color
+NO_COLOR = -1
+
+NAN3 = (math.nan, math.nan, math.nan)
+
+# Entity types stored as a vertex ring with a closed flag
+RING_KINDS = ('LWPOLYLINE', 'POLYLINE', 'HATCH')
+
+
+class RecordStore:
+    """Heavy per-entity analysis records of one floor plan, stored in columns.
+
+    ``split_analysis`` moves the DXF entity list, the wall and room
+    candidates and PDF page text out of a FileProcessor result into a
+    directory of ``.npy`` files next to the upload, leaving only a summary in
+    ``FloorPlan.analysis_data``. Each record has a kind (DXF type, ``wall``,
+    ``room`` or ``text``), a layer, a color, a bounding box, a slice of a
+    shared vertex buffer, three kind-specific numbers, a closed flag and a
+    slice of a shared UTF-8 text buffer. Collections are stored contiguously,
+    and columns are memory-mapped, so a filtered page only reads the rows it
+    returns; records are turned back into the original dicts on export.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta['version'] != STORE_VERSION:
+            raise ValueError(f"Record store version {meta['version']} is not {STORE_VERSION}")
+        self.kinds: List[str] = meta['kinds']
+        self.layers: List[str] = meta['layers']
+        self.ranges: Dict[str, Tuple[int, int]] = {name: tuple(bounds) for name, bounds in meta['ranges'].items()}
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return max((stop for _, stop in self.ranges.values()), default=0)
+
+    def count(self, collection: str) -> int:
+        start, stop = self.ranges.get(collection, (0, 0))
+        return stop - start
+
+    def column(self, name: str) -> np.ndarray:
+        array = self._columns.get(name)
+        if array is None:
+            array = self._columns[name] = np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+        return array
+
+    def select(self, collection: str, kind: Optional[str] = None, layer: Optional[str] = None,
+               bbox: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Indexes of the records of a collection matching every given filter
+
+        ``bbox`` is ``(min_x, min_y, max_x, max_y)``; records touching it
+        match, and records without coordinates never do.
+        """
+        start, stop = self.ranges.get(collection, (0, 0))
+        mask = np.ones(stop - start, dtype=bool)
+        for name, value, names in (('kind', kind, self.kinds), ('layer', layer, self.layers)):
+            if value is not None:
+                if value not in names:
+                    return np.zeros(0, dtype=np.intp)
+                mask &= self.column(name)[start:stop] == names.index(value)
+        if bbox is not None:
+            min_x, min_y, max_x, max_y = bbox
+            boxes = self.column('bbox')[start:stop]
+            # NaN boxes compare False
+            mask &= ((boxes[:, 0] <= max_x) & (boxes[:, 2] >= min_x) &
+                     (boxes[:, 1] <= max_y) & (boxes[:, 3] >= min_y))
+        return start + np.flatnonzero(mask)
+
+    def records(self, indexes: Sequence[int]) -> List[Dict[str, Any]]:
+        """The records at ``indexes`` as the dicts they were stored from"""
+        kinds, layers, colors = self.column('kind'), self.column('layer'), self.column('color')
+        vertex_offsets, vertices = self.column('vertex_offsets'), self.column('vertices')
+        params, closed = self.column('params'), self.column('closed')
+        text_offsets, text = self.column('text_offsets'), self.column('text')
+
+        records = []
+        for index in indexes:
+            kind = self.kinds[kinds[index]]
+            layer = self.layers[layers[index]]
+            color = int(colors[index])
+            points = vertices[vertex_offsets[index]:vertex_offsets[index + 1]].tolist()
+            first, second, third = params[index].tolist()
+            string = bytes(text[text_offsets[index]:text_offsets[index + 1]]).decode('utf-8')
+
+            if kind == 'wall':
+                record = {'type': 'wall', 'start': points[0], 'end': points[1], 'length': first, 'layer': layer}
+            elif kind == 'room':
+                record = {'type': 'room', 'points': points, 'area': first, 'layer': layer}
+            elif kind == 'text':
+                record = {'page': int(first), 'text': string}
+            else:
+                record = {'type': kind, 'layer': layer, 'color': None if color == NO_COLOR else color}
+                if kind == 'LINE':
+                    record['start'], record['end'] = points
+                elif kind in RING_KINDS:
+                    record['points'] = points
+                    record['closed'] = bool(closed[index])
+                elif kind == 'CIRCLE':
+                    record['center'] = points[0]
+                    record['radius'] = first
+                elif kind == 'ARC':
+                    record['center'] = points[0]
+                    record['radius'] = first
+                    record['start_angle'] = second
+                    record['end_angle'] = third
+                elif kind == 'TEXT':
+                    record['text'] = string
+                    record['position'] = points[0]
+                    record['height'] = first
+                    record['rotation'] = second
+            records.append(record)
+        return records
+
+    def page(self, collection: str, offset: int = 0, limit: int = 100,
+             **filters) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total matching records and the dicts of one page of them"""
+        indexes = self.select(collection, **filters)
+        return len(indexes), self.records(indexes[offset:offset + limit])
+
+
+class _RecordWriter:
+    """Builds the columns of a RecordStore one record at a time"""
+
+    def __init__(self):
+        self.kind_codes: Dict[str, int] = {}
+        self.layer_codes: Dict[str, int] = {}
+        self.kinds: List[int] = []
+        self.layers: List[int] = []
+        self.colors: List[int] = []
+        self.bboxes: List[Tuple[float, float, float, float]] = []
+        self.vertex_offsets = [0]
+        self.vertices: List[Sequence[float]] = []
+        self.params: List[Tuple[float, float, float]] = []
+        self.closed: List[bool] = []
+        self.text_offsets = [0]
+        self.text = bytearray()
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, kind: str, layer: str = '', color: Optional[int] = None,
+            points: Sequence[Sequence[float]] = (), params: Tuple[float, float, float] = NAN3,
+            closed: bool = False, text: str = '', radius: float = 0.0) -> None:
+        self.kinds.append(self.kind_codes.setdefault(kind, len(self.kind_codes)))
+        self.layers.append(self.layer_codes.setdefault(layer, len(self.layer_codes)))
+        self.colors.append(NO_COLOR if color is None else color)
+        if points:
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            self.bboxes.append((min(xs) - radius, min(ys) - radius, max(xs) + radius, max(ys) + radius))
+            self.vertices.extend(points)
+        else:
+            self.bboxes.append((math.nan,) * 4)
+        self.vertex_offsets.append(len(self.vertices))
+        self.params.append(params)
+        self.closed.append(closed)
+        self.text.extend(text.encode('utf-8'))
+        self.text_offsets.append(len(self.text))
+
+    def add_entity(self, entity: Dict[str, Any]) -> None:
+        kind = entity['type']
+        options: Dict[str, Any] = {}
+        if kind == 'LINE':
+            options['points'] = (entity['start'], entity['end'])
+        elif kind in RING_KINDS:
+            options['points'] = entity['points']
+            options['closed'] = entity['closed']
+        elif kind == 'CIRCLE':
+            options['points'] = (entity['center'],)
+            options['radius'] = entity['radius']
+            options['params'] = (entity['radius'], math.nan, math.nan)
+        elif kind == 'ARC':
+            # The whole circle bounds the arc
+            options['points'] = (entity['center'],)
+            options['radius'] = entity['radius']
+            options['params'] = (entity['radius'], entity['start_angle'], entity['end_angle'])
+        elif kind == 'TEXT':
+            options['points'] = (entity['position'],)
+            options['params'] = (entity['height'], entity['rotation'], math.nan)
+            options['text'] = entity['text']
+        self.add(kind, entity['layer'], entity['color'], **options)
+
+    def collection(self, name: str, start: int) -> None:
+        """Record that rows ``start`` up to now hold collection ``name``"""
+        if len(self.kinds) > start:
+            self.ranges[name] = (start, len(self.kinds))
+
+    def write(self, path: str) -> None:
+        columns = {
+            'kind': np.array(self.kinds, dtype=np.int32),
+            'layer': np.array(self.layers, dtype=np.int32),
+            'color': np.array(self.colors, dtype=np.int32),
+            'bbox': np.array(self.bboxes, dtype=np.float64).reshape(-1, 4),
+            'vertex_offsets': np.array(self.vertex_offsets, dtype=np.int64),
+            'vertices': np.array(self.vertices, dtype=np.float64).reshape(-1, 2),
+            'params': np.array(self.params, dtype=np.float64).reshape(-1, 3),
+            'closed': np.array(self.closed, dtype=bool),
+            'text_offsets': np.array(self.text_offsets, dtype=np.int64),
+            'text': np.frombuffer(bytes(self.text), dtype=np.uint8),
+        }
+        meta = {
+            'version': STORE_VERSION,
+            'kinds': list(self.kind_codes),
+            'layers': list(self.layer_codes),
+            'ranges': self.ranges,
+        }
+
+        write_columns(path, columns, meta)
+
+
+def write_columns(path: str, columns: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    """Write arrays as ``<name>.npy`` files plus ``meta.json`` into directory ``path``
+
+    The directory is written aside and renamed into place, replacing any
+    previous one, so readers never see a partial store.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=f'.{os.path.basename(path)}-')
+    try:
+        for name, array in columns.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def split_analysis(data: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """Move the heavy records of a FileProcessor result into a RecordStore at ``path``
+
+    Returns a copy of ``data`` without the DXF entity list, wall and room
+    candidates or PDF page text, and with a ``records`` entry giving the
+    store path and the number of records of each collection. Results with
+    none of those are returned unchanged and no store is written.
+    """
+    summary = dict(data)
+    analysis = summary.get('analysis')
+    if isinstance(analysis, dict):
+        analysis = summary['analysis'] = dict(analysis)
+    else:
+        analysis = {}
+    # Image analyses count potential rooms instead of listing them
+    walls = analysis.pop('potential_walls') if isinstance(analysis.get('potential_walls'), list) else None
+    rooms = analysis.pop('potential_rooms') if isinstance(analysis.get('potential_rooms'), list) else None
+    entities = summary.pop('entities', None)
+    text = summary.pop('text_content', None)
+    if not (entities or walls or rooms or text):
+        return data
+
+    writer = _RecordWriter()
+    start = len(writer.kinds)
+    for entity in entities or ():
+        writer.add_entity(entity)
+    writer.collection('entities', start)
+
+    start = len(writer.kinds)
+    for wall in walls or ():
+        writer.add('wall', wall['layer'], points=(wall['start'], wall['end']),
+                   params=(wall['length'], math.nan, math.nan))
+    writer.collection('walls', start)
+
+    start = len(writer.kinds)
+    for room in rooms or ():
+        writer.add('room', room['layer'], points=room['points'], params=(room['area'], math.nan, math.nan))
+    writer.collection('rooms', start)
+
+    start = len(writer.kinds)
+    for page in text or ():
+        writer.add('text', params=(page['page'], math.nan, math.nan), text=page['text'])
+    writer.collection('text', start)
+
+    writer.write(path)
+    summary['records'] = {
+        'path': path,
+        'counts': {name: writer.ranges[name][1] - writer.ranges[name][0] if name in writer.ranges else 0
+                   for name in COLLECTIONS},
+    }
+    return summary
+
+
+def open_store(analysis_data: Optional[Dict[str, Any]]) -> Optional[RecordStore]:
+    """The RecordStore a floor plan's analysis data points to, if it has one"""
+    records = (analysis_data or {}).get('records')
+    if not records or not os.path.isdir(records.get('path', '')):
+        return None
+    return RecordStore(records['path'])
@@ -1,5 +1,6 @@
 from flask import render_template, request, redirect, url_for, flash, jsonify
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import defer
 import os
 import uuid
 import traceback
@@ -7,18 +8,19 @@ from datetime import datetime
 from app import app, db
 from models import FloorPlan, IlotProfile, IlotPlacement, ZoneAnnotation, Project
 from file_processor import FileProcessor
+from ingestion import ingestion_queue, QueueFull, DEFAULT_PLAN_SIZE
 
 @app.route('/')
 def index():
     """Home page showing recent floor plans and profiles"""
-    recent_plans = FloorPlan.query.order_by(FloorPlan.created_at.desc()).limit(5).all()
+    recent_plans = FloorPlan.query.options(defer(FloorPlan.analysis_data)).order_by(FloorPlan.created_at.desc()).limit(5).all()
     recent_profiles = IlotProfile.query.order_by(IlotProfile.created_at.desc()).limit(5).all()
     return render_template('index.html', recent_plans=recent_plans, recent_profiles=recent_profiles)
 
 @app.route('/floor-plans')
 def floor_plans():
     """List all floor plans"""
-    plans = FloorPlan.query.order_by(FloorPlan.created_at.desc()).all()
+    plans = FloorPlan.query.options(defer(FloorPlan.analysis_data)).order_by(FloorPlan.created_at.desc()).all()
     return render_template('floor_plans.html', plans=plans)
 
 @app.route('/floor-plans/upload', methods=['GET', 'POST'])
@@ -35,6 +37,10 @@ def upload_floor_plan():
             return redirect(request.url)
         
         if file and allowed_file(file.filename):
+            if ingestion_queue.is_full():
+                flash('Too many uploads are being processed, please try again shortly', 'error')
+                return redirect(request.url)
+            
             filename = secure_filename(file.filename)
             file_id = str(uuid.uuid4())
             file_ext = filename.rsplit('.', 1)[1].lower()
@@ -43,63 +49,32 @@ def upload_floor_plan():
             
             file.save(file_path)
             
-            # Process the uploaded file
-            try:
-                processing_result = process_uploaded_file(file_path, filename)
-                
-                # Determine file type category
-                processor = FileProcessor()
-                detected_type = processor.detect_file_type(file_path)
-                
-                if detected_type == 'cad':
-                    file_type = 'cad'
-                elif detected_type == 'pdf':
-                    file_type = 'pdf'
-                elif detected_type == 'image':
-                    file_type = 'image'
-                else:
-                    file_type = 'unknown'
-                
-                # Create floor plan record
-                floor_plan = FloorPlan(
-                    project_id=1,  # Default project for now
-                    name=request.form.get('name', filename),
-                    original_file_name=filename,
-                    file_path=file_path,
-                    file_type=file_type,
-                    file_size=os.path.getsize(file_path),
-                    width=processing_result['width'],
-                    height=processing_result['height'],
-                    processed=processing_result['processed'],
-                    processed_at=datetime.utcnow() if processing_result['processed'] else None,
-                    analysis_data=processing_result['analysis_data']
-                )
-                
-                if processing_result['error']:
-                    flash(f'File uploaded but processing had issues: {processing_result["error"]}', 'warning')
-                
-            except Exception as e:
-                app.logger.error(f"File processing error for {filename}: {str(e)}")
-                app.logger.error(f"Traceback: {traceback.format_exc()}")
-                
-                # Create basic record even if processing fails
-                floor_plan = FloorPlan(
-                    project_id=1,
-                    name=request.form.get('name', filename),
-                    original_file_name=filename,
-                    file_path=file_path,
-                    file_type='unknown',
-                    file_size=os.path.getsize(file_path),
-                    width=100.0,
-                    height=100.0,
-                    processed=False
-                )
-                flash(f'File uploaded but could not be processed: {str(e)}', 'warning')
+            # Type, dimensions and analysis are filled in by the ingestion queue
+            floor_plan = FloorPlan(
+                project_id=1,  # Default project for now
+                name=request.form.get('name', filename),
+                original_file_name=filename,
+                file_path=file_path,
+                file_type='unknown',
+                file_size=os.path.getsize(file_path),
+                width=DEFAULT_PLAN_SIZE,
+                height=DEFAULT_PLAN_SIZE,
+                processed=False
+            )
             
             db.session.add(floor_plan)
             db.session.commit()
             
-            flash('Floor plan uploaded successfully!', 'success')
+            try:
+                ingestion_queue.submit(floor_plan.id)
+            except QueueFull:
+                db.session.delete(floor_plan)
+                db.session.commit()
+                os.remove(file_path)
+                flash('Too many uploads are being processed, please try again shortly', 'error')
+                return redirect(request.url)
+            
+            flash('Floor plan uploaded successfully! It is being processed in the background.', 'success')
             return redirect(url_for('view_floor_plan', id=floor_plan.id))
         else:
             flash('Invalid file type. Please upload DXF or image files.', 'error')
@@ -192,46 +167,6 @@ def allowed_file(filename):
     extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
     return extension in processor.get_supported_formats()
 
-def process_uploaded_file(file_path: str, filename: str) -> dict:
-    """Process uploaded file and extract relevant data"""
-    processor = FileProcessor()
-    
-    # Create output directory for processed files
-    file_id = os.path.splitext(os.path.basename(file_path))[0]
-    output_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'processed', file_id)
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Process the file
-    result = processor.process_file(file_path, output_dir)
-    
-    # Extract dimensions and other metadata
-    width = height = 100.0  # Default values
-    
-    if result['success'] and result['data']:
-        data = result['data']
-        
-        # Extract dimensions based on file type
-        if result['file_type'] == 'cad' and 'bounds' in data and data['bounds']:
-            bounds = data['bounds']
-            width = bounds['width']
-            height = bounds['height']
-        elif result['file_type'] == 'image' and 'width' in data:
-            width = data['width']
-            height = data['height']
-        elif result['file_type'] == 'pdf' and data['pages']:
-            # Use first page dimensions
-            first_page = data['pages'][0]
-            width = first_page['width']
-            height = first_page['height']
-    
-    return {
-        'width': width,
-        'height': height,
-        'analysis_data': result['data'] if result['success'] else None,
-        'processed': result['success'],
-        'error': result.get('error')
-    }
-
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
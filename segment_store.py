@@ -0,0 +1,194 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from record_store import META_FILE, write_columns
+
+# Bump whenever the file layout changes; stores of other versions are not read
+STORE_VERSION = 1
+
+# One fixed-width record per segment
+SEGMENT_DTYPE = np.dtype([('x0', '<f8'), ('y0', '<f8'), ('x1', '<f8'), ('y1', '<f8'), ('layer', '<i4')])
+
+# Children per tree node (and segments per leaf)
+DEFAULT_NODE_CAPACITY = 16
+
+
+class SegmentStore:
+    """Wall segments of one floor plan in a memory-mapped file, with a packed R-tree.
+
+    Segments are fixed-width ``SEGMENT_DTYPE`` records in ``segments.npy``,
+    written in Sort-Tile-Recursive order so every run of ``node_capacity``
+    records forms a compact leaf. ``nodes.npy`` holds the bounding box of
+    every tree node, level by level from the leaves up; node ``j`` of a level
+    covers entries ``j * node_capacity`` onwards of the level below. Both
+    files are memory-mapped and a query walks the tree one level at a time
+    with vectorized box tests, so it reads only the nodes and segments near
+    the query rectangle, without parsing the drawing again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta['version'] != STORE_VERSION:
+            raise ValueError(f"Segment store version {meta['version']} is not {STORE_VERSION}")
+        self.layers: List[str] = meta['layers']
+        self.node_capacity: int = meta['node_capacity']
+        # (start, stop) rows of nodes.npy per level, leaves first
+        self.levels = [tuple(level) for level in meta['levels']]
+        # Plain ndarray views of the maps skip np.memmap's per-operation wrapping
+        self.records = np.asarray(np.load(os.path.join(path, 'segments.npy'), mmap_mode='r'))
+        self.nodes = np.asarray(np.load(os.path.join(path, 'nodes.npy'), mmap_mode='r'))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Reopened by path, so pickling never copies the mapped files
+        return {'path': self.path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['path'])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def write(cls, path: str, x0: Sequence[float], y0: Sequence[float], x1: Sequence[float],
+              y1: Sequence[float], layers: Sequence[str],
+              node_capacity: int = DEFAULT_NODE_CAPACITY) -> 'SegmentStore':
+        """Bulk-load segments (coordinate columns and one layer name each) into a store at ``path``"""
+        capacity = max(2, node_capacity)
+        x0, y0, x1, y1 = (np.asarray(column, dtype=np.float64) for column in (x0, y0, x1, y1))
+        layer_names, layer_codes = np.unique(np.asarray(layers, dtype=object).astype(str), return_inverse=True)
+
+        order = _str_order((x0 + x1) / 2, (y0 + y1) / 2, capacity)
+        records = np.empty(len(order), dtype=SEGMENT_DTYPE)
+        for name, column in (('x0', x0), ('y0', y0), ('x1', x1), ('y1', y1), ('layer', layer_codes)):
+            records[name] = column[order]
+
+        # Leaf boxes, then each level's boxes grouped under the next one
+        boxes = np.column_stack((np.minimum(records['x0'], records['x1']),
+                                 np.minimum(records['y0'], records['y1']),
+                                 np.maximum(records['x0'], records['x1']),
+                                 np.maximum(records['y0'], records['y1'])))
+        levels, level_boxes, start = [], [], 0
+        while len(boxes):
+            boxes = _group_boxes(boxes, capacity)
+            level_boxes.append(boxes)
+            levels.append((start, start + len(boxes)))
+            start += len(boxes)
+            if len(boxes) == 1:
+                break
+
+        write_columns(path, {
+            'segments': records,
+            'nodes': np.concatenate(level_boxes) if level_boxes else np.zeros((0, 4)),
+        }, {
+            'version': STORE_VERSION,
+            'layers': layer_names.tolist(),
+            'node_capacity': capacity,
+            'levels': levels,
+        })
+        return cls(path)
+
+    @classmethod
+    def from_walls(cls, path: str, walls: Sequence[Dict[str, Any]], **kwargs) -> 'SegmentStore':
+        """Store wall candidates as produced by ``FileProcessor._identify_walls``"""
+        return cls.write(
+            path,
+            [wall['start'][0] for wall in walls], [wall['start'][1] for wall in walls],
+            [wall['end'][0] for wall in walls], [wall['end'][1] for wall in walls],
+            [wall.get('layer', 'unknown') for wall in walls], **kwargs
+        )
+
+    def _candidates(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """Segments in leaves whose boxes touch the query box"""
+        if not self.levels:
+            return np.zeros(0, dtype=np.intp)
+        capacity = self.node_capacity
+        nodes = self.nodes
+        hits = np.arange(self.levels[-1][1] - self.levels[-1][0])
+        for level in range(len(self.levels) - 1, -1, -1):
+            start, stop = self.levels[level]
+            boxes = nodes[start + hits]
+            hits = hits[(boxes[:, 0] <= max_x) & (boxes[:, 2] >= min_x) &
+                        (boxes[:, 1] <= max_y) & (boxes[:, 3] >= min_y)]
+            if not hits.size:
+                return hits
+            # Children of the hit nodes, clipped to the size of the level below
+            below = self.levels[level - 1][1] - self.levels[level - 1][0] if level else len(self.records)
+            hits = (hits[:, np.newaxis] * capacity + np.arange(capacity)).ravel()
+            hits = hits[hits < below]
+        return hits
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """Indexes of the segments that intersect the closed box, in storage order"""
+        candidates = self._candidates(min_x, min_y, max_x, max_y)
+        if not candidates.size:
+            return candidates
+        records = self.records[candidates]
+        return candidates[_segments_touch_box(records, min_x, min_y, max_x, max_y)]
+
+    def intersects_any(self, rect: Any) -> bool:
+        """Whether any segment touches a rectangle (``x``, ``y``, ``width``, ``height``)"""
+        return bool(self.query(rect.x, rect.y, rect.x + rect.width, rect.y + rect.height).size)
+
+    def segments(self, indexes: Sequence[int]) -> List[Dict[str, Any]]:
+        """Segment dicts (``start``, ``end``, ``layer``) for the given indexes"""
+        layers = self.layers
+        return [{'start': [x0, y0], 'end': [x1, y1], 'layer': layers[layer]}
+                for x0, y0, x1, y1, layer in self.records[np.asarray(indexes, dtype=np.intp)].tolist()]
+
+
+def _str_order(cx: np.ndarray, cy: np.ndarray, capacity: int) -> np.ndarray:
+    """Vectorized ``spatial_index.str_pack_order``: x slices of leaves, sorted by y within each"""
+    count = len(cx)
+    if count == 0:
+        return np.zeros(0, dtype=np.intp)
+    slice_size = math.ceil(math.sqrt(math.ceil(count / capacity))) * capacity
+    slices = np.empty(count, dtype=np.intp)
+    slices[np.argsort(cx, kind='stable')] = np.arange(count) // slice_size
+    return np.lexsort((cy, slices))
+
+
+def _group_boxes(boxes: np.ndarray, capacity: int) -> np.ndarray:
+    """Bounding box of each consecutive run of ``capacity`` boxes"""
+    starts = np.arange(0, len(boxes), capacity)
+    return np.column_stack((np.minimum.reduceat(boxes[:, 0], starts),
+                            np.minimum.reduceat(boxes[:, 1], starts),
+                            np.maximum.reduceat(boxes[:, 2], starts),
+                            np.maximum.reduceat(boxes[:, 3], starts)))
+
+
+def _segments_touch_box(records: np.ndarray, min_x: float, min_y: float,
+                        max_x: float, max_y: float) -> np.ndarray:
+    """Mask of segments that intersect a closed axis-aligned box
+
+    Separating axes: the box's two axes (a bounding-box test) and the
+    segment's normal (the box corners all strictly on one side of its line).
+    """
+    x0, y0, x1, y1 = records['x0'], records['y0'], records['x1'], records['y1']
+    mask = ((np.minimum(x0, x1) <= max_x) & (np.maximum(x0, x1) >= min_x) &
+            (np.minimum(y0, y1) <= max_y) & (np.maximum(y0, y1) >= min_y))
+    overlap = np.flatnonzero(mask)
+    if not overlap.size:
+        return mask
+    # The line test only for segments whose boxes overlap
+    x0, y0, x1, y1 = x0[overlap], y0[overlap], x1[overlap], y1[overlap]
+    dx, dy = x1 - x0, y1 - y0
+    sides = [dx * (cy - y0) - dy * (cx - x0)
+             for cx, cy in ((min_x, min_y), (max_x, min_y), (min_x, max_y), (max_x, max_y))]
+    above = (sides[0] > 0) & (sides[1] > 0) & (sides[2] > 0) & (sides[3] > 0)
+    below = (sides[0] < 0) & (sides[1] < 0) & (sides[2] < 0) & (sides[3] < 0)
+    mask[overlap] = ~above & ~below
+    return mask
+
+
+def open_segments(analysis_data: Optional[Dict[str, Any]]) -> Optional[SegmentStore]:
+    """The SegmentStore a floor plan's analysis data points to, if it has one"""
+    segments = (analysis_data or {}).get('segments')
+    if not segments or not os.path.isdir(segments.get('path', '')):
+        return None
+    return SegmentStore(segments['path'])
@@ -0,0 +1,304 @@
+import math
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+class SpatialIndex:
+    """Base interface for rectangle indexes used by the layout generator.
+
+    Items are stored under a hashable key together with an object exposing
+    ``x``, ``y``, ``width``, ``height`` and ``intersects(rect)``. Queries return
+    the keys of stored items whose exact geometry intersects the query rectangle.
+    """
+
+    def insert(self, key: Hashable, item: Any) -> None:
+        raise NotImplementedError
+
+    def remove(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def query(self, rect: Any) -> List[Hashable]:
+        raise NotImplementedError
+
+    def intersects_any(self, rect: Any, ignore: Optional[Hashable] = None) -> bool:
+        return any(key != ignore for key in self.query(rect))
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class GridIndex(SpatialIndex):
+    """Bucketed uniform grid supporting incremental insert and remove"""
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = float(cell_size)
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = defaultdict(set)
+        self._items: Dict[Hashable, Any] = {}
+
+    def _cell_range(self, rect: Any) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (
+            math.floor(rect.x / size),
+            math.floor(rect.y / size),
+            math.floor((rect.x + rect.width) / size),
+            math.floor((rect.y + rect.height) / size),
+        )
+
+    def insert(self, key: Hashable, item: Any) -> None:
+        if key in self._items:
+            self.remove(key)
+        self._items[key] = item
+        x0, y0, x1, y1 = self._cell_range(item)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self._cells[(cx, cy)].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        x0, y0, x1, y1 = self._cell_range(item)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._cells[(cx, cy)]
+
+    def _candidates(self, rect: Any) -> Iterable[Hashable]:
+        x0, y0, x1, y1 = self._cell_range(rect)
+        cell_count = (x1 - x0 + 1) * (y1 - y0 + 1)
+        # Very large queries (e.g. full-width corridors) are cheaper as a scan
+        if cell_count >= len(self._items):
+            return self._items.keys()
+        candidates = set()
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    candidates.update(bucket)
+        return candidates
+
+    def query(self, rect: Any) -> List[Hashable]:
+        items = self._items
+        return [key for key in self._candidates(rect) if items[key].intersects(rect)]
+
+    def intersects_any(self, rect: Any, ignore: Optional[Hashable] = None) -> bool:
+        items = self._items
+        for key in self._candidates(rect):
+            if key != ignore and items[key].intersects(rect):
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ArrayIndex(SpatialIndex):
+    """Rectangle bounds in NumPy arrays under the keys ``0..n-1``.
+
+    Every query is one vectorized scan, with no buckets to maintain, so
+    updating a key is O(1) and a copy is four array copies. It suits small
+    sets that are edited in place and copied often, such as the ilots of one
+    layout. Only the next key may be appended; removed keys keep their slot
+    but never match.
+    """
+
+    def __init__(self, items: Sequence[Any] = ()):
+        self.min_x = np.array([item.x for item in items], dtype=np.float64)
+        self.min_y = np.array([item.y for item in items], dtype=np.float64)
+        self.max_x = np.array([item.x + item.width for item in items], dtype=np.float64)
+        self.max_y = np.array([item.y + item.height for item in items], dtype=np.float64)
+
+    @classmethod
+    def from_arrays(cls, x: np.ndarray, y: np.ndarray, width: np.ndarray,
+                    height: np.ndarray) -> 'ArrayIndex':
+        """Index over columns of rectangle coordinates (copied)"""
+        index = cls()
+        index.min_x = np.array(x, dtype=np.float64)
+        index.min_y = np.array(y, dtype=np.float64)
+        index.max_x = index.min_x + width
+        index.max_y = index.min_y + height
+        return index
+
+    def insert(self, key: int, item: Any) -> None:
+        bounds = (item.x, item.y, item.x + item.width, item.y + item.height)
+        size = self.min_x.size
+        if key == size:
+            self.min_x, self.min_y, self.max_x, self.max_y = (
+                np.append(array, value) for array, value in
+                zip((self.min_x, self.min_y, self.max_x, self.max_y), bounds)
+            )
+        elif 0 <= key < size:
+            self.min_x[key], self.min_y[key], self.max_x[key], self.max_y[key] = bounds
+        else:
+            raise KeyError(key)
+
+    def remove(self, key: int) -> None:
+        if 0 <= key < self.min_x.size:
+            self.min_x[key] = self.min_y[key] = math.inf
+            self.max_x[key] = self.max_y[key] = -math.inf
+
+    def copy(self) -> 'ArrayIndex':
+        clone = ArrayIndex()
+        clone.min_x, clone.min_y = self.min_x.copy(), self.min_y.copy()
+        clone.max_x, clone.max_y = self.max_x.copy(), self.max_y.copy()
+        return clone
+
+    def _hits(self, rect: Any) -> np.ndarray:
+        # Closed intervals, as Rectangle.intersects
+        return ~((self.max_x < rect.x) | (rect.x + rect.width < self.min_x) |
+                 (self.max_y < rect.y) | (rect.y + rect.height < self.min_y))
+
+    def query(self, rect: Any) -> List[Hashable]:
+        return np.flatnonzero(self._hits(rect)).tolist()
+
+    def intersects_any(self, rect: Any, ignore: Optional[Hashable] = None) -> bool:
+        hits = self._hits(rect)
+        if isinstance(ignore, int) and 0 <= ignore < hits.size:
+            hits[ignore] = False
+        return bool(hits.any())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.min_x <= self.max_x))
+
+
+class _STRNode:
+    __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', 'children', 'entries')
+
+    def __init__(self, children=None, entries=None):
+        self.children = children
+        self.entries = entries
+        if children is not None:
+            boxes = [(c.min_x, c.min_y, c.max_x, c.max_y) for c in children]
+        else:
+            boxes = [entry[2] for entry in entries]
+        self.min_x = min(b[0] for b in boxes)
+        self.min_y = min(b[1] for b in boxes)
+        self.max_x = max(b[2] for b in boxes)
+        self.max_y = max(b[3] for b in boxes)
+
+
+def str_pack_order(centers: List[Tuple[float, float]], node_capacity: int) -> List[int]:
+    """Return item indices in Sort-Tile-Recursive order.
+
+    Items are sorted by x centre into vertical slices of
+    ``ceil(sqrt(n / capacity))`` leaves each, then by y within every slice, so
+    that consecutive runs of ``node_capacity`` items form compact leaves.
+    """
+    count = len(centers)
+    if count == 0:
+        return []
+    leaf_count = math.ceil(count / node_capacity)
+    slice_count = math.ceil(math.sqrt(leaf_count))
+    slice_size = slice_count * node_capacity
+
+    by_x = sorted(range(count), key=lambda i: centers[i][0])
+    order = []
+    for start in range(0, count, slice_size):
+        chunk = by_x[start:start + slice_size]
+        chunk.sort(key=lambda i: centers[i][1])
+        order.extend(chunk)
+    return order
+
+
+class STRTree(SpatialIndex):
+    """Static R-tree bulk-loaded with Sort-Tile-Recursive packing.
+
+    Best suited to obstacles that are known up front. ``insert`` and ``remove``
+    rebuild the tree, so use :class:`GridIndex` for frequently changing sets.
+    """
+
+    def __init__(self, items: Optional[Dict[Hashable, Any]] = None, node_capacity: int = 8):
+        self.node_capacity = max(2, node_capacity)
+        self._items: Dict[Hashable, Any] = dict(items or {})
+        self._root: Optional[_STRNode] = None
+        self._build()
+
+    def _build(self) -> None:
+        entries = []
+        for key, item in self._items.items():
+            box = (item.x, item.y, item.x + item.width, item.y + item.height)
+            entries.append((key, item, box))
+        if not entries:
+            self._root = None
+            return
+
+        capacity = self.node_capacity
+        centers = [((b[0] + b[2]) / 2, (b[1] + b[3]) / 2) for _, _, b in entries]
+        order = str_pack_order(centers, capacity)
+        level = [_STRNode(entries=[entries[i] for i in order[start:start + capacity]])
+                 for start in range(0, len(order), capacity)]
+
+        while len(level) > 1:
+            centers = [((n.min_x + n.max_x) / 2, (n.min_y + n.max_y) / 2) for n in level]
+            order = str_pack_order(centers, capacity)
+            level = [_STRNode(children=[level[i] for i in order[start:start + capacity]])
+                     for start in range(0, len(order), capacity)]
+
+        self._root = level[0]
+
+    def insert(self, key: Hashable, item: Any) -> None:
+        self._items[key] = item
+        self._build()
+
+    def remove(self, key: Hashable) -> None:
+        if self._items.pop(key, None) is not None:
+            self._build()
+
+    def _iter_hits(self, rect: Any):
+        if self._root is None:
+            return
+        min_x, min_y = rect.x, rect.y
+        max_x, max_y = rect.x + rect.width, rect.y + rect.height
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if (node.max_x < min_x or node.min_x > max_x or
+                    node.max_y < min_y or node.min_y > max_y):
+                continue
+            if node.children is not None:
+                stack.extend(node.children)
+                continue
+            for key, item, box in node.entries:
+                if (box[2] < min_x or box[0] > max_x or
+                        box[3] < min_y or box[1] > max_y):
+                    continue
+                if item.intersects(rect):
+                    yield key
+
+    def query(self, rect: Any) -> List[Hashable]:
+        return list(self._iter_hits(rect))
+
+    def intersects_any(self, rect: Any, ignore: Optional[Hashable] = None) -> bool:
+        for key in self._iter_hits(rect):
+            if key != ignore:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+SPATIAL_INDEXES = {
+    'grid': GridIndex,
+    'rtree': STRTree,
+}
+
+
+def build_index(kind: str, items: Dict[Hashable, Any], cell_size: float) -> SpatialIndex:
+    """Build a spatial index of the requested kind over ``items``"""
+    if kind not in SPATIAL_INDEXES:
+        raise ValueError(f"Unknown spatial index: {kind}")
+    if kind == 'rtree':
+        return STRTree(items)
+    index = GridIndex(cell_size)
+    for key, item in items.items():
+        index.insert(key, item)
+    return index
@@ -0,0 +1,108 @@
+import math
+import os
+import shutil
+import tempfile
+from typing import Tuple, Union
+
+from PIL import Image
+
+from tiled_image import BandSource
+
+# Tile edge in pixels, as Deep Zoom viewers expect by default
+DEFAULT_TILE_SIZE = 256
+
+DZI_FILE = 'tiles.dzi'
+TILES_DIR = 'tiles_files'
+TILE_FORMAT = 'png'
+
+DZI_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{format}" '
+    'Overlap="0" TileSize="{tile_size}">\n'
+    '  <Size Width="{width}" Height="{height}"/>\n'
+    '</Image>\n'
+)
+
+
+def level_count(width: int, height: int) -> int:
+    """Deep Zoom levels of an image: level 0 is 1x1, the last one full size"""
+    return math.ceil(math.log2(max(width, height, 1))) + 1
+
+
+def level_size(width: int, height: int, level: int) -> Tuple[int, int]:
+    """Pixel size of one level, each level halving the next (rounding up)"""
+    scale = 2 ** (level_count(width, height) - 1 - level)
+    return max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+
+
+def tile_path(root: str, level: int, column: int, row: int) -> str:
+    return os.path.join(root, TILES_DIR, str(level), f'{column}_{row}.{TILE_FORMAT}')
+
+
+def write_pyramid(source: Union[Image.Image, BandSource], output_dir: str,
+                  tile_size: int = DEFAULT_TILE_SIZE) -> str:
+    """Write a Deep Zoom tile pyramid of ``source`` into ``output_dir``; returns the .dzi path
+
+    ``source`` is a PIL image or, for large images, a grayscale
+    BandSource. Full-size tiles are cut from bands of ``tile_size`` rows,
+    and every tile of a smaller level is the half-size reduction of the
+    (up to) four tiles it covers in the level above, so besides the source
+    itself memory stays within one band plus four tiles whatever its
+    size. Callers bound the source: see ``FileProcessor.render_tiles``.
+    The pyramid is written aside and renamed into place.
+    """
+    width, height = source.width, source.height
+    top = level_count(width, height) - 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=output_dir, prefix='.tiles-')
+    try:
+        columns, rows = math.ceil(width / tile_size), math.ceil(height / tile_size)
+        os.makedirs(os.path.join(tmp_dir, TILES_DIR, str(top)))
+        for row in range(rows):
+            y0, y1 = row * tile_size, min(height, (row + 1) * tile_size)
+            if isinstance(source, Image.Image):
+                band = source.crop((0, y0, width, y1))
+            else:
+                band = Image.fromarray(source.read_gray(y0, y1))
+            for column in range(columns):
+                x0, x1 = column * tile_size, min(width, (column + 1) * tile_size)
+                band.crop((x0, 0, x1, y1 - y0)).save(tile_path(tmp_dir, top, column, row))
+
+        for level in range(top - 1, -1, -1):
+            os.makedirs(os.path.join(tmp_dir, TILES_DIR, str(level)))
+            level_width, level_height = level_size(width, height, level)
+            for row in range(math.ceil(level_height / tile_size)):
+                for column in range(math.ceil(level_width / tile_size)):
+                    _reduce_tile(tmp_dir, level, column, row, tile_size)
+
+        with open(os.path.join(tmp_dir, DZI_FILE), 'w') as f:
+            f.write(DZI_TEMPLATE.format(format=TILE_FORMAT, tile_size=tile_size, width=width, height=height))
+
+        for name in (DZI_FILE, TILES_DIR):
+            target = os.path.join(output_dir, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.replace(os.path.join(tmp_dir, name), target)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return os.path.join(output_dir, DZI_FILE)
+
+
+def _reduce_tile(root: str, level: int, column: int, row: int, tile_size: int) -> None:
+    """Build a tile from the up to four tiles it covers one level up"""
+    parts = {}
+    for dx in (0, 1):
+        for dy in (0, 1):
+            path = tile_path(root, level + 1, column * 2 + dx, row * 2 + dy)
+            if os.path.exists(path):
+                with Image.open(path) as part:
+                    part.load()
+                parts[dx, dy] = part
+    width = sum(parts[dx, 0].width for dx in (0, 1) if (dx, 0) in parts)
+    height = sum(parts[0, dy].height for dy in (0, 1) if (0, dy) in parts)
+    base = parts[0, 0]
+    combined = Image.new(base.mode, (width, height))
+    for (dx, dy), part in parts.items():
+        combined.paste(part, (dx * tile_size, dy * tile_size))
+    combined.reduce(2).save(tile_path(root, level, column, row))
@@ -0,0 +1,612 @@
+import logging
+import math
+import os
+import struct
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+# Default ceiling for the analysis working set (decoded band plus one tile)
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Context shared by neighbouring tiles so edges and contours survive the seams
+TILE_OVERLAP = 32
+MIN_TILE_SIZE = 256
+MAX_TILE_SIZE = 4096
+
+# Estimated bytes per pixel: band reading, gray conversion and region labels, and Canny/Hough/contours
+BAND_BYTES_PER_PIXEL = 20
+TILE_BYTES_PER_PIXEL = 28
+
+# Pixels along a tile's cut edges where Canny output differs from a whole-image pass
+SEAM_EDGE_MARGIN = 3
+
+# Background region labels: the image frame, edge pixels, and holes closed within one tile core
+FRAME_REGION = 0
+EDGE_PIXEL = -1
+HOLE_REGION = -2
+
+# Hough lines from different tiles closer than this are the same line
+RHO_TOLERANCE = 2.0
+THETA_STEP = np.pi / 180
+
+# Raw pixel layouts that can be read through a memory map: bytes per pixel and RGB channel order
+_RAW_LAYOUTS = {
+    'L': (1, None),
+    'RGB': (3, (0, 1, 2)),
+    'BGR': (3, (2, 1, 0)),
+    'RGBX': (4, (0, 1, 2)),
+    'BGRX': (4, (2, 1, 0)),
+}
+
+
+def open_image_header(path: str) -> Image.Image:
+    """Open ``path`` lazily, skipping PIL's decompression-bomb size check.
+
+    Only for reading the header and raw tile layout of images too large for
+    ``Image.open``; the pixels must not be decoded through the result.
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(16)
+    for loader in (Image.preinit, Image.init):
+        loader()
+        for format_id in Image.ID:
+            factory, accept = Image.OPEN[format_id]
+            accepted = not accept or accept(prefix)
+            if not accepted or isinstance(accepted, str):
+                continue
+            try:
+                return factory(path)
+            except (SyntaxError, IndexError, TypeError, struct.error):
+                continue
+    raise Image.UnidentifiedImageError(f"cannot identify image file {path!r}")
+
+
+class BandSource:
+    """Row-band access to an 8-bit grayscale image"""
+
+    width = 0
+    height = 0
+    # Extra bytes per pixel needed to produce a band (0 when already in memory)
+    bytes_per_pixel = 0
+
+    def read_gray(self, y0: int, y1: int, x0: int = 0, x1: Optional[int] = None) -> np.ndarray:
+        """Rows ``y0:y1`` and columns ``x0:x1`` as a uint8 array"""
+        raise NotImplementedError
+
+
+class ArrayBandSource(BandSource):
+    """Bands of an already decoded grayscale array"""
+
+    def __init__(self, gray: np.ndarray):
+        self.gray = gray
+        self.height, self.width = gray.shape
+
+    def read_gray(self, y0: int, y1: int, x0: int = 0, x1: Optional[int] = None) -> np.ndarray:
+        return self.gray[y0:y1, x0:x1]
+
+
+class RawBandSource(BandSource):
+    """Bands read directly from uncompressed pixel data on disk.
+
+    Covers the files PIL decodes with its ``raw`` codec (uncompressed TIFF,
+    BMP, PPM/PGM). Only the requested rows are read, with positioned reads
+    rather than a memory map so file pages never count against the
+    process's resident memory.
+    """
+
+    def __init__(self, path: str, width: int, height: int, tiles: List[Tuple]):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.tiles = tiles
+        self.bytes_per_pixel = max(layout[0] for *_, layout in tiles)
+
+    @classmethod
+    def open(cls, path: str) -> Optional['RawBandSource']:
+        """Open ``path`` if its pixel data is stored raw, otherwise return None"""
+        try:
+            with open_image_header(path) as image:
+                if image.mode not in ('L', 'RGB'):
+                    return None
+                width, height = image.size
+                descriptors = list(image.tile)
+        except Exception:
+            return None
+
+        tiles = []
+        for descriptor in descriptors:
+            codec, extents, offset, args = descriptor[0], descriptor[1], descriptor[2], descriptor[3]
+            if codec != 'raw':
+                return None
+            if isinstance(args, str):
+                args = (args,)
+            rawmode = args[0]
+            stride = args[1] if len(args) > 1 else 0
+            orientation = args[2] if len(args) > 2 else 1
+            if rawmode not in _RAW_LAYOUTS:
+                return None
+
+            x0, y0, x1, y1 = extents
+            bpp = _RAW_LAYOUTS[rawmode][0]
+            stride = stride or (x1 - x0) * bpp
+            tiles.append((x0, y0, x1, y1, offset, stride, orientation, _RAW_LAYOUTS[rawmode]))
+
+        if not tiles:
+            return None
+        # Reject truncated files up front rather than failing halfway through
+        end = max(offset + (y1 - y0) * stride for _, y0, _, y1, offset, stride, _, _ in tiles)
+        if os.path.getsize(path) < end:
+            return None
+        return cls(path, width, height, tiles)
+
+    def read_gray(self, y0: int, y1: int, x0: int = 0, x1: Optional[int] = None) -> np.ndarray:
+        x1 = self.width if x1 is None else x1
+        band = np.empty((y1 - y0, x1 - x0), dtype=np.uint8)
+        with open(self.path, 'rb') as f:
+            for tx0, ty0, tx1, ty1, offset, stride, orientation, (bpp, order) in self.tiles:
+                start, stop = max(y0, ty0), min(y1, ty1)
+                left, right = max(x0, tx0), min(x1, tx1)
+                if start >= stop or left >= right:
+                    continue
+                # Bottom-up storage (BMP) keeps the last image row first
+                first = start - ty0 if orientation == 1 else ty1 - stop
+                f.seek(offset + first * stride)
+                data = np.fromfile(f, dtype=np.uint8, count=(stop - start) * stride)
+                data = data.reshape(stop - start, stride)
+                if orientation != 1:
+                    data = data[::-1]
+                pixels = data[:, (left - tx0) * bpp:(right - tx0) * bpp]
+                pixels = pixels.reshape(stop - start, right - left, bpp)
+                band[start - y0:stop - y0, left - x0:right - x0] = _to_gray(pixels, order)
+        return band
+
+
+def _to_gray(pixels: np.ndarray, order: Optional[Tuple[int, int, int]]) -> np.ndarray:
+    """ITU-R 601-2 luma with PIL's fixed-point rounding, so results match ``convert('L')``"""
+    if order is None:
+        return pixels[..., 0]
+    r, g, b = order
+    gray = np.empty(pixels.shape[:2], dtype=np.uint32)
+    term = np.empty_like(gray)
+    np.multiply(pixels[..., r], 19595, out=gray, dtype=np.uint32)
+    np.multiply(pixels[..., g], 38470, out=term, dtype=np.uint32)
+    gray += term
+    np.multiply(pixels[..., b], 7471, out=term, dtype=np.uint32)
+    gray += term
+    gray += 0x8000
+    gray >>= 16
+    return gray.astype(np.uint8)
+
+
+class TiledImageAnalyzer:
+    """Floor plan image analysis over overlapping tiles with a bounded working set.
+
+    The image is read in bands of rows and each band is cut into tiles that
+    share ``overlap`` pixels with their neighbours. Edge statistics are taken
+    from each tile's core, Hough lines are moved to global (rho, theta) and
+    de-duplicated, and contours cut by a tile border are stitched together
+    through the boundary pixels they share. Whether a contour is external is
+    decided exactly, from the background regions of the tile cores joined
+    across seams. A stitched contour's area is re-measured in a window around
+    it; one too large for a window within the memory budget is counted as
+    room-sized, since the cut fragments alone cannot tell what it encloses.
+    The result has the keys of
+    ``FileProcessor._analyze_floor_plan_image`` and
+    ``FileProcessor._advanced_image_analysis``; line and contour counts are
+    close to, but not guaranteed identical with, a whole-image pass.
+    """
+
+    def __init__(self, memory_limit: int = DEFAULT_MEMORY_LIMIT, overlap: int = TILE_OVERLAP,
+                 tile_size: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.memory_limit = memory_limit
+        self.overlap = overlap
+        self.tile_size = tile_size
+
+    def plan(self, source: BandSource) -> int:
+        """Largest tile edge whose band and tile working set fit in memory_limit"""
+        size = min(self.tile_size or MAX_TILE_SIZE, max(source.width, source.height, MIN_TILE_SIZE))
+        while size > MIN_TILE_SIZE and self.working_set(source, size) > self.memory_limit:
+            size = max(MIN_TILE_SIZE, size * 3 // 4)
+        if self.working_set(source, size) > self.memory_limit:
+            self.logger.warning(
+                f"Tiled analysis needs ~{self.working_set(source, size) >> 20} MB, "
+                f"above the {self.memory_limit >> 20} MB limit"
+            )
+        return size
+
+    def working_set(self, source: BandSource, size: int) -> int:
+        rows = size + 2 * self.overlap
+        band = rows * source.width * (BAND_BYTES_PER_PIXEL + source.bytes_per_pixel)
+        tile = rows * min(rows, source.width + 2 * self.overlap) * TILE_BYTES_PER_PIXEL
+        return band + tile
+
+    def analyze(self, source: BandSource) -> Dict[str, Any]:
+        size = self.plan(source)
+        width, height = source.width, source.height
+        overlap = self.overlap
+        state = _TileMerge(width, overlap)
+
+        total_pixels = width * height
+        dark_pixels = 0
+        brightness = 0
+
+        for y0 in range(0, height, size):
+            y1 = min(height, y0 + size)
+            band_y0, band_y1 = max(0, y0 - overlap), min(height, y1 + overlap)
+            band = source.read_gray(band_y0, band_y1)
+
+            core = band[y0 - band_y0:y1 - band_y0]
+            dark_pixels += int(np.count_nonzero(core < 128))
+            brightness += int(core.sum(dtype=np.uint64))
+
+            if not CV2_AVAILABLE:
+                continue
+            # Global background region of every core pixel in the band
+            labels = np.empty((y1 - y0, width), dtype=np.int32)
+            for x0 in range(0, width, size):
+                x1 = min(width, x0 + size)
+                tile_x0, tile_x1 = max(0, x0 - overlap), min(width, x1 + overlap)
+                self._analyze_tile(
+                    np.ascontiguousarray(band[:, tile_x0:tile_x1]), (tile_x0, band_y0),
+                    (x0, y0, x1, y1), size, (width, height), state, labels
+                )
+            state.finish_band(y0, labels)
+
+        light_pixels = total_pixels - dark_pixels
+        analysis = {
+            'total_pixels': total_pixels,
+            'dark_pixel_ratio': dark_pixels / total_pixels,
+            'light_pixel_ratio': light_pixels / total_pixels,
+            'average_brightness': brightness / total_pixels,
+            'estimated_wall_coverage': dark_pixels / total_pixels
+        }
+        if CV2_AVAILABLE:
+            analysis.update(state.result(total_pixels, lambda box, top_left: self._window_area(
+                source, box, top_left, self.memory_limit // (TILE_BYTES_PER_PIXEL + BAND_BYTES_PER_PIXEL)
+            )))
+        return analysis
+    
+    def _window_area(self, source: BandSource, box: Tuple[int, int, int, int],
+                     top_left: Tuple[int, int], max_pixels: int) -> Optional[float]:
+        """Re-detect a stitched contour in one window around ``box`` and return its area.
+        
+        Returns None when the window would not fit the memory budget.
+        """
+        margin = self.overlap
+        x0, y0 = max(0, box[0] - margin), max(0, box[1] - margin)
+        x1, y1 = min(source.width, box[2] + margin), min(source.height, box[3] + margin)
+        if (x1 - x0) * (y1 - y0) > max_pixels:
+            return None
+
+        window = np.ascontiguousarray(source.read_gray(y0, y1, x0, x1))
+        contours, _ = cv2.findContours(cv2.Canny(window, 50, 150, apertureSize=3),
+                                       cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # The stitched contour is the one starting at its top-left-most pixel
+        start = (top_left[0] - x0, top_left[1] - y0)
+        for contour in contours:
+            if tuple(contour[0, 0]) == start:
+                return cv2.contourArea(contour)
+        return None
+
+    def _owner_sees(self, box: Tuple[int, int, int, int], tile_size: int,
+                    image_size: Tuple[int, int]) -> bool:
+        """Whether the tile owning ``box``'s top-left corner has all of it in view"""
+        overlap = self.overlap
+        view_x1 = min(image_size[0], (box[0] // tile_size + 1) * tile_size + overlap)
+        view_y1 = min(image_size[1], (box[1] // tile_size + 1) * tile_size + overlap)
+        # Touching the view edge means the owner sees the contour cut
+        return (box[2] < view_x1 or view_x1 == image_size[0]) and \
+            (box[3] < view_y1 or view_y1 == image_size[1])
+    
+    def _analyze_tile(self, tile: np.ndarray, origin: Tuple[int, int], core: Tuple[int, int, int, int],
+                      tile_size: int, image_size: Tuple[int, int], state: '_TileMerge',
+                      labels: np.ndarray) -> None:
+        origin_x, origin_y = origin
+        x0, y0, x1, y1 = core
+        width, height = image_size
+        tile_h, tile_w = tile.shape
+
+        edges = cv2.Canny(tile, 50, 150, apertureSize=3)
+        core_edges = edges[y0 - origin_y:y1 - origin_y, x0 - origin_x:x1 - origin_x]
+        state.edge_pixels += int(np.count_nonzero(core_edges))
+        state.label_background(core_edges, core, image_size, labels)
+
+        lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
+        if lines is not None:
+            for rho, theta in lines[:, 0]:
+                state.add_line(rho + origin_x * math.cos(theta) + origin_y * math.sin(theta), theta)
+
+        # Every boundary pixel is kept so fragments can be matched pixel by pixel
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        cut_left, cut_top = origin_x > 0, origin_y > 0
+        cut_right, cut_bottom = origin_x + tile_w < width, origin_y + tile_h < height
+        overlap, margin = self.overlap, SEAM_EDGE_MARGIN
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            box = (x + origin_x, y + origin_y, x + w + origin_x, y + h + origin_y)
+            cut = ((cut_left and x == 0) or (cut_top and y == 0) or
+                   (cut_right and x + w == tile_w) or (cut_bottom and y + h == tile_h))
+            owned = not cut and x0 <= box[0] < x1 and y0 <= box[1] < y1
+            if not cut and not owned and self._owner_sees(box, tile_size, image_size):
+                # The owning tile sees this contour whole and counts it
+                continue
+
+            local = contour[:, 0]
+            points = local + origin
+            # Boundary pixels shared with neighbouring views: outside the core's
+            # interior, and clear of this view's cut edges where Canny differs
+            shared = ~((points[:, 0] >= x0 + overlap) & (points[:, 0] < x1 - overlap) &
+                       (points[:, 1] >= y0 + overlap) & (points[:, 1] < y1 - overlap))
+            if cut_left:
+                shared &= local[:, 0] >= margin
+            if cut_top:
+                shared &= local[:, 1] >= margin
+            if cut_right:
+                shared &= local[:, 0] < tile_w - margin
+            if cut_bottom:
+                shared &= local[:, 1] < tile_h - margin
+            shared_keys = points[shared, 1].astype(np.int64) * width + points[shared, 0]
+
+            # findContours starts each contour at its top-left-most pixel
+            top_left = (int(points[0, 0]), int(points[0, 1]))
+            if owned:
+                # Whole contour seen, and this tile owns its top-left corner
+                state.add_contour(cv2.contourArea(contour), top_left, shared_keys)
+            elif len(shared_keys):
+                state.add_fragment(box, top_left, shared_keys)
+            # A fragment with no shared pixels lies along the cut edge, inside a
+            # neighbour's core, and is counted there
+
+
+class _TileMerge:
+    """Accumulates per-tile features and merges them across seams.
+
+    Contours seen whole by the tile owning their top-left corner are counted
+    directly. Cut contours become fragments, and fragments and seam-side
+    direct contours that share a boundary pixel are joined with a union-find;
+    each joined group without a direct contour is one stitched contour.
+    Pixels are linked at the end of every band, and only those a later band's
+    view can still see are kept.
+
+    A contour is external, as with ``RETR_EXTERNAL`` on the whole image, when
+    the background region just above its top-left pixel reaches the image
+    border. Background regions are labelled per tile core; those touching the
+    core's border are joined across seams and with the image frame in a second
+    union-find, and those that do not are holes enclosed inside the core.
+    """
+
+    def __init__(self, width: int, overlap: int):
+        self.width = width
+        self.overlap = overlap
+        self.edge_pixels = 0
+        self.lines: Dict[Tuple[int, int], float] = {}
+        self.horizontal_lines = 0
+        self.vertical_lines = 0
+        # Directly counted contours: whether room-sized, and their outside-region query
+        self.room_flags = array('b')
+        self.direct_queries = array('q')
+        # Union-find nodes: (box, top-left pixel, query) for fragments and None
+        # for direct contours, with the shared boundary pixels (y * width + x)
+        # of the current band's nodes and those still open from earlier bands
+        self.nodes: List[Optional[Tuple[Tuple[int, int, int, int], Tuple[int, int], int]]] = []
+        self.parents = array('q')
+        self.band_keys: List[np.ndarray] = []
+        self.band_owners: List[int] = []
+        self.open_keys = np.empty(0, dtype=np.int64)
+        self.open_owners = np.empty(0, dtype=np.int64)
+
+        # Background regions: node 0 is the image frame
+        self.regions = array('q', [FRAME_REGION])
+        # Region of the pixel above each contour's top-left pixel, once its band is labelled
+        self.query_regions = array('q')
+        self.pending = array('q')
+        # Last rows of the previous band's labels, for queries and the top seam
+        self.tail_rows = overlap + 1
+        self.tail: Optional[np.ndarray] = None
+        self.tail_y0 = 0
+        self.band_y0 = 0
+
+    def add_line(self, rho: float, theta: float) -> None:
+        theta_bin = int(round(theta / THETA_STEP))
+        rho_bin = int(round(rho / RHO_TOLERANCE))
+        for dt in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                seen = self.lines.get((theta_bin + dt, rho_bin + dr))
+                if seen is not None and abs(seen - rho) <= RHO_TOLERANCE:
+                    return
+        self.lines[(theta_bin, rho_bin)] = rho
+
+        # Same classification as FileProcessor._advanced_image_analysis
+        if abs(theta) < np.pi/4 or abs(theta - np.pi) < np.pi/4:
+            self.horizontal_lines += 1
+        elif abs(theta - np.pi/2) < np.pi/4:
+            self.vertical_lines += 1
+
+    def add_contour(self, area: float, top_left: Tuple[int, int], shared_keys: np.ndarray) -> None:
+        self.room_flags.append(area > 1000)
+        self.direct_queries.append(self._query(*top_left))
+        if len(shared_keys):
+            self._link(None, shared_keys)
+
+    def add_fragment(self, box: Tuple[int, int, int, int], top_left: Tuple[int, int],
+                     shared_keys: np.ndarray) -> None:
+        self._link((box, top_left, self._query(*top_left)), shared_keys)
+
+    def _link(self, node, keys: np.ndarray) -> None:
+        self.band_owners.append(len(self.nodes))
+        self.band_keys.append(keys)
+        self.parents.append(len(self.nodes))
+        self.nodes.append(node)
+
+    def _find_node(self, index: int) -> int:
+        parents = self.parents
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    def _link_band(self, y1: int) -> None:
+        """Union nodes sharing a boundary pixel and keep the pixels later views overlap"""
+        if not self.band_keys:
+            return
+        keys = np.concatenate([self.open_keys] + self.band_keys)
+        owners = np.concatenate([self.open_owners, np.repeat(
+            np.array(self.band_owners, dtype=np.int64), [len(k) for k in self.band_keys]
+        )])
+        self.band_keys, self.band_owners = [], []
+
+        order = np.argsort(keys, kind='stable')
+        keys, owners = keys[order], owners[order]
+        same = keys[1:] == keys[:-1]
+        pairs = np.unique(np.stack([owners[:-1][same], owners[1:][same]], axis=1), axis=0)
+        for a, b in pairs.tolist():
+            self.parents[self._find_node(a)] = self._find_node(b)
+
+        # One owner per pixel is enough once its sharers are joined
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = ~same
+        keep &= keys >= (y1 - self.overlap) * self.width
+        self.open_keys, self.open_owners = keys[keep], owners[keep]
+
+    def label_background(self, core_edges: np.ndarray, core: Tuple[int, int, int, int],
+                         image_size: Tuple[int, int], labels: np.ndarray) -> None:
+        """Label one core's background into ``labels`` and join it to its left and upper neighbours"""
+        x0, y0, x1, y1 = core
+        width, height = image_size
+        # Background is 4-connected where OpenCV's contours are 8-connected
+        count, local = cv2.connectedComponents((core_edges == 0).view(np.uint8), connectivity=4,
+                                               ltype=cv2.CV_32S)
+        border = np.unique(np.concatenate([local[0], local[-1], local[:, 0], local[:, -1]]))
+        border = border[border > 0]
+
+        mapping = np.full(count, HOLE_REGION, dtype=np.int32)
+        mapping[0] = EDGE_PIXEL
+        mapping[border] = np.arange(len(self.regions), len(self.regions) + len(border))
+        self.regions.extend(range(len(self.regions), len(self.regions) + len(border)))
+        tile_labels = labels[:, x0:x1]
+        np.take(mapping, local, out=tile_labels)
+
+        if x0 == 0:
+            self._join_frame(tile_labels[:, 0])
+        if x1 == width:
+            self._join_frame(tile_labels[:, -1])
+        if y0 == 0:
+            self._join_frame(tile_labels[0])
+        if y1 == height:
+            self._join_frame(tile_labels[-1])
+        if x0 > 0:
+            self._join(labels[:, x0 - 1], tile_labels[:, 0])
+        if y0 > 0:
+            self._join(self.tail[-1, x0:x1], tile_labels[0])
+
+    def _find(self, region: int) -> int:
+        regions = self.regions
+        while regions[region] != region:
+            regions[region] = regions[regions[region]]
+            region = regions[region]
+        return region
+
+    def _join_frame(self, line: np.ndarray) -> None:
+        for region in np.unique(line[line >= 0]).tolist():
+            self.regions[self._find(region)] = self._find(FRAME_REGION)
+
+    def _join(self, first: np.ndarray, second: np.ndarray) -> None:
+        both = (first >= 0) & (second >= 0)
+        pairs = np.unique(np.stack([first[both], second[both]], axis=1), axis=0)
+        for a, b in pairs.tolist():
+            self.regions[self._find(a)] = self._find(b)
+
+    def _query(self, x: int, y: int) -> int:
+        """Register a lookup of the region at (x, y - 1); returns its query index"""
+        index = len(self.query_regions)
+        row = y - 1
+        if row < 0:
+            self.query_regions.append(FRAME_REGION)
+        elif row < self.band_y0:
+            self.query_regions.append(int(self.tail[row - self.tail_y0, x]))
+        else:
+            self.query_regions.append(EDGE_PIXEL)
+            self.pending.extend((row, x, index))
+        return index
+
+    def finish_band(self, y0: int, labels: np.ndarray) -> None:
+        """Link the band's contours, resolve queries falling in it and keep its last rows"""
+        y1 = y0 + len(labels)
+        self._link_band(y1)
+        if len(self.pending):
+            pending = np.frombuffer(self.pending, dtype=np.int64).reshape(-1, 3)
+            ready = pending[:, 0] < y1
+            for index, region in zip(pending[ready, 2].tolist(),
+                                     labels[pending[ready, 0] - y0, pending[ready, 1]].tolist()):
+                self.query_regions[index] = region
+            self.pending = array('q', pending[~ready].ravel().tolist())
+        self.tail = labels[-self.tail_rows:].copy()
+        self.tail_y0 = y1 - len(self.tail)
+        self.band_y0 = y1
+
+    def _external(self, query: int) -> bool:
+        region = self.query_regions[query]
+        if region == HOLE_REGION:
+            return False
+        # An edge pixel here means tiles disagreed about the edges; keep the contour
+        return region < 0 or self._find(region) == self._find(FRAME_REGION)
+
+    def result(self, total_pixels: int, measure) -> Dict[str, Any]:
+        """Final statistics; ``measure(box, top_left)`` returns a stitched contour's area or None"""
+        contours = 0
+        room_count = 0
+        for is_room, query in zip(self.room_flags, self.direct_queries):
+            if self._external(query):
+                contours += 1
+                room_count += is_room
+
+        groups: Dict[int, List] = {}
+        for index, node in enumerate(self.nodes):
+            groups.setdefault(self._find_node(index), []).append(node)
+        for fragments in groups.values():
+            if any(fragment is None for fragment in fragments):
+                # Part of a contour its owner tile saw whole and already counted
+                continue
+            # The group's top-left-most pixel decides whether it is external
+            top = min(fragments, key=lambda f: (f[1][1], f[1][0]))
+            if not self._external(top[2]):
+                continue
+            box = (min(f[0][0] for f in fragments), min(f[0][1] for f in fragments),
+                   max(f[0][2] for f in fragments), max(f[0][3] for f in fragments))
+            area = measure(box, top[1])
+            contours += 1
+            room_count += area is None or area > 1000
+
+        return {
+            'detected_lines': len(self.lines),
+            'horizontal_lines': self.horizontal_lines,
+            'vertical_lines': self.vertical_lines,
+            'detected_contours': contours,
+            'potential_rooms': room_count,
+            'edge_density': self.edge_pixels / total_pixels
+        }
+
+
+def make_thumbnail(source: BandSource, max_size: int = 400, band_rows: int = 1024) -> Image.Image:
+    """Grayscale thumbnail built band by band with block averaging"""
+    factor = max(1, math.ceil(max(source.width, source.height) / max_size))
+    band_rows = max(factor, band_rows // factor * factor)
+    out_w = source.width // factor
+    rows = []
+    for y0 in range(0, source.height - factor + 1, band_rows):
+        y1 = min(source.height, y0 + band_rows)
+        y1 -= (y1 - y0) % factor
+        band = source.read_gray(y0, y1, 0, out_w * factor)
+        rows.append(band.reshape((y1 - y0) // factor, factor, out_w, factor).mean(axis=(1, 3)))
+    thumbnail = np.concatenate(rows) if rows else np.zeros((0, out_w))
+    return Image.fromarray(np.round(thumbnail).astype(np.uint8))